@@ -8,6 +8,8 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import os
 import sys
@@ -30,6 +32,11 @@ import pydicom
 from pydicom.dataset import Dataset, FileDataset
 from pydicom.uid import ExplicitVRLittleEndian, generate_uid
 
+try:
+    import socketio as socketio_client
+except ImportError:
+    socketio_client = None
+
 # 可以通过环境变量 SERVER_URL 覆盖默认地址，例如：
 # export SERVER_URL="http://192.0.0.222:5005"
 SERVER_URL = os.environ.get("SERVER_URL", "http://172.17.250.136:5005")
@@ -45,6 +52,138 @@ task_process_queue = Queue()  # 待整理任务队列 (task_id, accession, zip_p
 progress_lock = threading.Lock()
 
 
+# 下载结果 ZIP 时每次读写的块大小
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# 每个线程复用一个 requests.Session（连接池 + keep-alive），轮询/提交/下载不再每次重新建立连接
+_thread_local = threading.local()
+
+
+def _session():
+    """返回当前线程的 HTTP 会话；连接失败时自动重试（不会重复发送已送达的 POST）"""
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                              max_retries=Retry(total=3, backoff_factor=0.2))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _thread_local.session = session
+    return session
+
+
+# 任务结束状态
+_TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+# 无 WebSocket 时的轮询间隔；有 WebSocket 时作为兜底的 HTTP 复查间隔（秒）
+POLL_INTERVAL_SEC = 2
+WS_FALLBACK_SEC = 30
+# 跟踪进度时两次状态查询的最小间隔（秒）
+WS_MIN_INTERVAL_SEC = 0.5
+
+
+class _TaskWatcher:
+    """通过 WebSocket 订阅任务更新（subscribe_task），收到推送时唤醒等待线程，替代固定间隔的 HTTP 轮询"""
+
+    def __init__(self, server_url):
+        self._waiters = {}  # {task_id: {'event': Event, 'terminal': bool}}
+        self._lock = threading.Lock()
+        self._sio = socketio_client.Client(reconnection=True)
+        self._sio.on('task_update', self._on_update)
+        self._sio.on('connect', self._on_connect)
+        self._sio.connect(server_url, wait_timeout=10)
+
+    def _on_connect(self):
+        # 断线重连后服务端房间已失效，重新订阅仍在等待的任务
+        with self._lock:
+            task_ids = list(self._waiters)
+        for task_id in task_ids:
+            self._sio.emit('subscribe_task', {'task_id': task_id})
+
+    def _on_update(self, data):
+        waiter = self._waiters.get(data.get('task_id'))
+        if waiter is None:
+            return
+        if data.get('status') in _TERMINAL_STATUSES:
+            waiter['terminal'] = True
+        waiter['event'].set()
+
+    def wait(self, task_id, timeout, terminal_only=False):
+        """等待任务的下一次推送（terminal_only=True 时只等结束状态），最多 timeout 秒"""
+        with self._lock:
+            waiter = self._waiters.get(task_id)
+            subscribe = waiter is None
+            if subscribe:
+                waiter = self._waiters[task_id] = {'event': threading.Event(), 'terminal': False}
+        if subscribe:
+            self._sio.emit('subscribe_task', {'task_id': task_id})
+        deadline = time.monotonic() + timeout
+        while not waiter['terminal']:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if waiter['event'].wait(remaining):
+                waiter['event'].clear()
+                if not terminal_only:
+                    return
+
+    def release(self, task_id):
+        with self._lock:
+            if self._waiters.pop(task_id, None) is None:
+                return
+        try:
+            self._sio.emit('unsubscribe_task', {'task_id': task_id})
+        except Exception:
+            pass
+
+
+_watcher_state = {'watcher': None, 'failed': False}
+_watcher_lock = threading.Lock()
+
+
+def _task_watcher():
+    """返回共享的 _TaskWatcher；未安装 python-socketio 或连接失败时返回 None（退回 HTTP 轮询）"""
+    if socketio_client is None or _watcher_state['failed']:
+        return None
+    with _watcher_lock:
+        if _watcher_state['watcher'] is None and not _watcher_state['failed']:
+            try:
+                _watcher_state['watcher'] = _TaskWatcher(SERVER_URL)
+            except Exception as e:
+                _watcher_state['failed'] = True
+                tqdm.write(f"[!] WebSocket 连接失败，改用 HTTP 轮询: {e}")
+        return _watcher_state['watcher']
+
+
+def _wait_task_update(task_id, terminal_only=False):
+    """两次状态查询之间的等待：有 WebSocket 时等推送，否则固定间隔休眠"""
+    watcher = _task_watcher()
+    if watcher is None:
+        time.sleep(POLL_INTERVAL_SEC)
+        return
+    started = time.monotonic()
+    watcher.wait(task_id, WS_FALLBACK_SEC, terminal_only=terminal_only)
+    if not terminal_only:
+        # 推送频繁时限制查询频率，期间的日志由 since 游标一并取回
+        remaining = WS_MIN_INTERVAL_SEC - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+def _release_task_watch(task_id):
+    watcher = _watcher_state['watcher']
+    if watcher is not None:
+        watcher.release(task_id)
+
+
+def _stream_download(url, target_path):
+    """流式下载到文件：直接从底层连接按 1 MiB 块复制，避免 8 KB 小块的逐块 Python 循环"""
+    with _session().get(url, stream=True, timeout=(30, 300)) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        with open(target_path, 'wb') as f:
+            shutil.copyfileobj(r.raw, f, DOWNLOAD_CHUNK_SIZE)
+
+
 def submit_task_worker(server_url, api_single, max_retries=3, retry_delay=2, queue_full_retry_delay=10):
     """生产者工作线程：提交任务到服务器"""
     while True:
@@ -63,7 +202,7 @@ def submit_task_worker(server_url, api_single, max_retries=3, retry_delay=2, que
             # 提交任务，带重试机制
             for attempt in range(max_retries):
                 try:
-                    response = requests.post(api_single, json=payload, timeout=REQUEST_TIMEOUT)
+                    response = _session().post(api_single, json=payload, timeout=REQUEST_TIMEOUT)
 
                     # 处理队列满的情况 (HTTP 503)
                     if response.status_code == 503:
@@ -111,24 +250,27 @@ def submit_task_worker(server_url, api_single, max_retries=3, retry_delay=2, que
 
 
 def poll_task_status(task_id, server_url, api_status, timeout=30):
-    """轮询任务状态直到完成或失败"""
-    while True:
-        try:
-            response = requests.get(api_status(task_id), timeout=timeout)
-            if response.status_code != 200:
-                return False, None
+    """等待任务完成或失败：WebSocket 推送结束状态后再以 HTTP 取一次结果"""
+    try:
+        while True:
+            try:
+                response = _session().get(api_status(task_id), timeout=timeout)
+                if response.status_code != 200:
+                    return False, None
 
-            data = response.json()
-            status = data.get('status')
+                data = response.json()
+                status = data.get('status')
 
-            if status == 'completed':
-                return True, data.get('result')
-            elif status in ('failed', 'cancelled'):
-                return False, data.get('error')
+                if status == 'completed':
+                    return True, data.get('result')
+                elif status in ('failed', 'cancelled'):
+                    return False, data.get('error')
 
-            time.sleep(2)
-        except Exception as e:
-            return False, str(e)
+                _wait_task_update(task_id, terminal_only=True)
+            except Exception as e:
+                return False, str(e)
+    finally:
+        _release_task_watch(task_id)
 
 
 def download_worker(output_dir, server_url, api_download, progress_tracker=None):
@@ -158,11 +300,7 @@ def download_worker(output_dir, server_url, api_download, progress_tracker=None)
             target_zip = os.path.join(output_dir, f"result_{task_id}.zip")
 
             try:
-                with requests.get(download_url, stream=True, timeout=(30, 300)) as r:
-                    r.raise_for_status()
-                    with open(target_zip, 'wb') as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                _stream_download(download_url, target_zip)
 
                 tqdm.write(f"[+] 下载完成: {accession}")
 
@@ -751,7 +889,7 @@ def _main_single(args):
     for attempt in range(max_retries):
         try:
             print(f"[*] 正在提交任务 (尝试 {attempt + 1}/{max_retries})...")
-            response = requests.post(API_SINGLE, json=payload, timeout=REQUEST_TIMEOUT)
+            response = _session().post(API_SINGLE, json=payload, timeout=REQUEST_TIMEOUT)
 
             if response.status_code == 503:
                 error_msg = response.json().get('error', 'Task queue is full')
@@ -809,43 +947,51 @@ def poll_task_status_single(task_id):
     print(f"[*] 正在监控任务: {task_id}")
     last_log_idx = 0
 
-    while True:
-        try:
-            response = requests.get(API_STATUS(task_id), timeout=30)
-            if response.status_code != 200:
-                print(f"[!] 获取状态失败: {response.text}")
-                return False, None
-
-            data = response.json()
-            status = data.get('status')
-            progress = data.get('progress', 0)
-            step = data.get('current_step', '')
-            logs = data.get('logs', [])
-
-            # 打印新日志
-            if len(logs) > last_log_idx:
-                for log in logs[last_log_idx:]:
+    try:
+        while True:
+            try:
+                # since 游标：服务端只返回上次之后的新日志
+                response = _session().get(API_STATUS(task_id), params={'since': last_log_idx}, timeout=30)
+                if response.status_code != 200:
+                    print(f"[!] 获取状态失败: {response.text}")
+                    return False, None
+
+                data = response.json()
+                status = data.get('status')
+                progress = data.get('progress', 0)
+                step = data.get('current_step', '')
+                logs = data.get('logs', [])
+
+                # 打印新日志（旧版服务端不支持 since，返回全部日志，按数量截取）
+                if 'logs_next' in data:
+                    new_logs = logs
+                    last_log_idx = data['logs_next']
+                else:
+                    new_logs = logs[last_log_idx:]
+                    last_log_idx = max(last_log_idx, len(logs))
+                for log in new_logs:
                     print(f"  [{log['timestamp']}] {log['message']}")
-                last_log_idx = len(logs)
 
-            # 打印进度
-            sys.stdout.write(f"\r    进度: [{progress}%] 步骤: {step} ".ljust(60))
-            sys.stdout.flush()
-
-            if status == 'completed':
-                print("\n[+] 任务处理成功完成！")
-                return True, data.get('result')
-            elif status == 'failed':
-                print(f"\n[!] 任务失败: {data.get('error')}")
-                return False, None
-            elif status == 'cancelled':
-                print("\n[!] 任务被取消")
+                # 打印进度
+                sys.stdout.write(f"\r    进度: [{progress}%] 步骤: {step} ".ljust(60))
+                sys.stdout.flush()
+
+                if status == 'completed':
+                    print("\n[+] 任务处理成功完成！")
+                    return True, data.get('result')
+                elif status == 'failed':
+                    print(f"\n[!] 任务失败: {data.get('error')}")
+                    return False, None
+                elif status == 'cancelled':
+                    print("\n[!] 任务被取消")
+                    return False, None
+
+                _wait_task_update(task_id)
+            except Exception as e:
+                print(f"\n[!] 轮询出错: {e}")
                 return False, None
-
-            time.sleep(2)
-        except Exception as e:
-            print(f"\n[!] 轮询出错: {e}")
-            return False, None
+    finally:
+        _release_task_watch(task_id)
 
 
 def download_and_extract(task_id, output_dir, accession=None):
@@ -862,11 +1008,7 @@ def download_and_extract(task_id, output_dir, accession=None):
     print(f"[*] 正在下载结果到: {target_zip}")
 
     try:
-        with requests.get(download_url, stream=True, timeout=(30, 300)) as r:
-            r.raise_for_status()
-            with open(target_zip, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        _stream_download(download_url, target_zip)
 
         print(f"[+] 下载完成，正在解压...")
 
@@ -5,6 +5,7 @@ DICOM 客户端模块
 提供与 PACS 服务器通信的功能，支持 C-FIND/C-MOVE 操作。
 """
 
+from src.client.pool import DICOMClientPool
 from src.client.unified import DICOMDownloadClient
 
-__all__ = ["DICOMDownloadClient"]
+__all__ = ["DICOMClientPool", "DICOMDownloadClient"]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+DICOM 客户端池
+
+任务执行时从池中借出已初始化（AE、字段列表、虚拟登录）的客户端，结束后归还复用，
+避免每个任务重复构造客户端；PACS 配置变更或客户端超龄时自动换新。
+"""
+
+import logging
+import os
+import threading
+import time
+from queue import Empty, Full, LifoQueue
+from typing import Callable, Optional
+
+from src.client.unified import DICOMDownloadClient
+
+logger = logging.getLogger('DICOMApp')
+
+try:
+    CLIENT_POOL_MAX_AGE_SEC = float(os.getenv('CLIENT_POOL_MAX_AGE_SEC', '3600'))
+except Exception:
+    CLIENT_POOL_MAX_AGE_SEC = 3600.0
+
+
+class DICOMClientPool:
+    """DICOMDownloadClient 对象池
+
+    池空时直接新建客户端（借出不会阻塞），归还时超出容量的客户端被丢弃。
+    """
+
+    def __init__(self, size: int, factory: Optional[Callable[[], DICOMDownloadClient]] = None,
+                 max_age_sec: float = CLIENT_POOL_MAX_AGE_SEC):
+        self.size = max(1, int(size))
+        self.max_age_sec = max_age_sec
+        self._factory = factory or DICOMDownloadClient
+        # 后进先出：优先复用最近归还的客户端（其复用关联更可能仍然有效）
+        self._idle = LifoQueue(maxsize=self.size)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _create(self) -> DICOMDownloadClient:
+        client = self._factory()
+        client.login(os.getenv('DICOM_USERNAME', ''), os.getenv('DICOM_PASSWORD', ''))
+        client._pool_generation = self._generation
+        client._pool_created = time.monotonic()
+        return client
+
+    def _is_stale(self, client: DICOMDownloadClient) -> bool:
+        if getattr(client, '_pool_generation', None) != self._generation:
+            return True
+        return self.max_age_sec > 0 and time.monotonic() - client._pool_created > self.max_age_sec
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """预先创建客户端放入池中"""
+        for _ in range(min(count or self.size, self.size) - self._idle.qsize()):
+            try:
+                self._idle.put_nowait(self._create())
+            except Full:
+                break
+            except Exception as e:
+                logger.warning(f"预创建DICOM客户端失败: {e}")
+                break
+
+    def acquire(self) -> DICOMDownloadClient:
+        """借出一个客户端；池中无可用客户端时新建"""
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except Empty:
+                return self._create()
+            if not self._is_stale(client):
+                return client
+
+    def release(self, client: Optional[DICOMDownloadClient]) -> None:
+        """归还客户端：清除任务状态后放回池中，过期或池满时丢弃"""
+        if client is None:
+            return
+        try:
+            client.reset_task_state()
+        except Exception as e:
+            logger.warning(f"重置DICOM客户端状态失败，丢弃该客户端: {e}")
+            return
+        if self._is_stale(client):
+            return
+        try:
+            self._idle.put_nowait(client)
+        except Full:
+            pass
+
+    def invalidate(self) -> None:
+        """PACS 配置变更后调用：丢弃池中及借出中的旧客户端，之后按新配置创建"""
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    self._idle.get_nowait()
+                except Empty:
+                    break
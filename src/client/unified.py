@@ -10,22 +10,31 @@ DICOM 客户端统一模块
 import os
 import json
 import time
+import heapq
 import threading
 import zipfile
-from queue import Queue, Empty
+import mmap
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 import pydicom
 import re
 import sys
 import logging
 import hashlib
+import io
 import socket
+import weakref
 from contextlib import contextmanager
+from functools import lru_cache
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Set, Callable, Any, Tuple
-from types import SimpleNamespace
+from types import MappingProxyType, SimpleNamespace
 from src.core.constants import get_derived_keywords
+from src.utils.json_cache import read_json_cache, write_json_cache
 from src.core.metadata import extract_dicom_metadata as extract_dicom_metadata_impl
+from src.core.metadata import KeywordTag, read_dicom_header, read_keyword_values, resolve_keyword_tags
 from src.core.organize import organize_dicom_files as organize_dicom_files_impl
 from src.core.organize import process_single_series as process_single_series_impl
 from src.core.convert import convert_dicom_to_nifti as convert_dicom_to_nifti_impl
@@ -52,6 +61,7 @@ from pynetdicom.sop_class import (
     StudyRootQueryRetrieveInformationModelMove
 )
 from pydicom.dataset import Dataset
+from pydicom.datadict import tag_for_keyword
 
 logger = logging.getLogger('DICOMApp')
 
@@ -128,10 +138,21 @@ class AssociationManager:
                 logger.warning(f"Error releasing association: {e}")
 
 
+def _release_assoc_state(state: Dict) -> None:
+    """释放复用关联状态中保存的关联（用于空闲超时、出错及客户端回收时）。"""
+    assoc = state.get('assoc')
+    state['assoc'] = None
+    if assoc is not None and assoc.is_established:
+        try:
+            assoc.release()
+        except Exception as e:
+            logger.warning(f"Error releasing association: {e}")
+
+
 class QueueWatchdog:
     """P2: 队列看门狗，防止死锁"""
 
-    def __init__(self, queue: Queue, timeout: float = 300.0):
+    def __init__(self, queue: Optional[Queue] = None, timeout: float = 300.0):
         self.queue = queue
         self.timeout = timeout
         self.last_activity = time.time()
@@ -153,6 +174,8 @@ class QueueWatchdog:
             time.sleep(5.0)
             if time.time() - self.last_activity > self.timeout:
                 logger.error(f"Queue watchdog: No activity for {self.timeout}s, potential deadlock detected")
+                if self.queue is None:
+                    continue
                 # 放入哨兵值来唤醒可能阻塞的 worker
                 try:
                     self.queue.put(None, timeout=1.0)
@@ -160,6 +183,163 @@ class QueueWatchdog:
                     pass
 
 
+# 明确不是 DICOM 的扩展名，_is_dicom_file 直接跳过
+_NON_DICOM_EXTENSIONS = (
+    '.json', '.csv', '.txt', '.nii', '.nii.gz', '.npz',
+    '.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp',
+)
+
+
+# 按惯例只用于 DICOM 的扩展名，_is_dicom_file 直接认定，不再打开文件读取魔数
+_TRUSTED_DICOM_EXTENSIONS = ('.dcm', '.ima', '.dicom')
+
+
+# _sanitize_folder_name 使用的字符替换表与预编译正则
+_FOLDER_NAME_ILLEGAL_TABLE = str.maketrans({c: '_' for c in '<>"/\\|?*:[]'})
+_FOLDER_NAME_COLLAPSE_RE = re.compile(r'\.\s+|\s+|\.+')
+_FOLDER_NAME_UNDERSCORE_RE = re.compile(r'_+')
+
+
+def _collapse_folder_name_run(match):
+    """连续点 -> 单个点；点+空格、空白 -> 下划线。"""
+    return '.' if match.group()[-1] == '.' else '_'
+
+
+_HAS_PREAD = hasattr(os, 'pread')
+
+
+def _read_file_head(filepath: str, size: int) -> bytes:
+    """读取文件开头 size 字节；支持 os.pread 的平台上绕过缓冲 IO，只需一次系统调用。"""
+    if _HAS_PREAD:
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            return os.pread(fd, size, 0)
+        finally:
+            os.close(fd)
+    with open(filepath, 'rb', buffering=0) as f:
+        return f.read(size)
+
+
+
+class _ZipMmap(mmap.mmap):
+    """zipfile 需要 seekable()，mmap 在 Python 3.13 之前未提供该方法"""
+
+    def seekable(self):
+        return True
+
+
+@contextmanager
+def _open_zip_mapped(zip_filepath: str):
+    """以只读内存映射打开 ZIP：目录与条目读取直接命中页缓存，不再逐次 read/seek 系统调用。
+
+    每次调用建立独立的映射（各自的读位置），可供多个解压线程同时使用；
+    空文件或无法映射时退回普通文件读取。
+    """
+    with open(zip_filepath, 'rb') as f:
+        try:
+            mapped = _ZipMmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mapped = None
+        try:
+            with zipfile.ZipFile(mapped if mapped is not None else f, 'r') as zip_ref:
+                yield zip_ref
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+
+# 显式 VR 编码的 VR 取值；其中 _LONG_VRS 之后是 2 字节保留位（须为 0）加 4 字节长度
+_EXPLICIT_VRS = frozenset(
+    vr.encode('ascii') for vr in (
+        'AE', 'AS', 'AT', 'CS', 'DA', 'DS', 'DT', 'FL', 'FD', 'IS', 'LO', 'LT', 'OB', 'OD', 'OF',
+        'OL', 'OV', 'OW', 'PN', 'SH', 'SL', 'SQ', 'SS', 'ST', 'SV', 'TM', 'UC', 'UI', 'UL', 'UN',
+        'UR', 'US', 'UT', 'UV'
+    )
+)
+_LONG_VRS = frozenset(vr.encode('ascii') for vr in ('OB', 'OD', 'OF', 'OL', 'OV', 'OW', 'SQ', 'UC', 'UN', 'UR', 'UT'))
+# 无前导文件首个元素的元素号上限：File Meta / Identifying 组的首个元素都在 (gggg,0000)~(gggg,0020) 之间
+_BARE_FIRST_ELEMENT_MAX = 0x0020
+# 隐式 VR 首个元素的值长度上限（组长度或 UID/CS 等短字符串）
+_BARE_IMPLICIT_MAX_LENGTH = 1024
+
+
+def _looks_like_bare_dicom(head: bytes, bare_groups) -> bool:
+    """无前导 DICOM 的判断：首个元素的组号、元素号及 VR/长度字段都须符合 DICOM 编码。"""
+    if len(head) < 8 or int.from_bytes(head[:2], 'little') not in bare_groups:
+        return False
+    element = int.from_bytes(head[2:4], 'little')
+    if element > _BARE_FIRST_ELEMENT_MAX:
+        return False
+    vr = head[4:6]
+    if vr in _EXPLICIT_VRS:
+        # 显式 VR：长 VR 后两字节保留位必须为 0
+        return vr not in _LONG_VRS or head[6:8] == b'\x00\x00'
+    # 隐式 VR：4 字节长度，组长度元素固定为 4，其余为较短的偶数长度
+    length = int.from_bytes(head[4:8], 'little')
+    if element == 0:
+        return length == 4
+    return 0 < length <= _BARE_IMPLICIT_MAX_LENGTH and length % 2 == 0
+
+
+def _probe_dicom_file(filepath: str,
+                      _trusted=_TRUSTED_DICOM_EXTENSIONS,
+                      _non_dicom=_NON_DICOM_EXTENSIONS,
+                      _read_head=_read_file_head,
+                      _magic=b'DICM',
+                      _bare_groups=(0x0002, 0x0008)) -> Optional[bool]:
+    """
+    _is_dicom_file 的快速判断（扫描循环中每个文件调用一次，常量通过默认参数绑定为局部变量）。
+
+    返回 True/False 表示已确定；返回 None 表示文件头无法识别，需要时由调用方深度解析。
+    """
+    lower_path = filepath.lower()
+    if lower_path.endswith(_trusted):
+        return True
+    if lower_path.endswith(_non_dicom):
+        return False
+    try:
+        head = _read_head(filepath, 132)
+    except OSError:
+        return False
+    if len(head) == 132 and head[128:132] == _magic:
+        return True
+    # 无前导的 DICOM（部分旧设备/导出工具）：首个元素为 File Meta 或 Identifying 组，
+    # 且元素号与 VR/长度字段合法；仅组号吻合的任意二进制文件交给调用方深度解析
+    if _looks_like_bare_dicom(head, _bare_groups):
+        return True
+    return None
+
+
+@lru_cache(maxsize=64)
+def _read_sample_header_cached(filepath: str, mtime_ns: int, tags: Tuple[int, ...]):
+    """按 (路径, 修改时间) 缓存样本文件的头部解析结果，调用方不得修改返回的数据集。"""
+    return pydicom.dcmread(filepath, force=True, stop_before_pixels=True, specific_tags=list(tags))
+
+
+@lru_cache(maxsize=8)
+def _parse_pacs_config(pacs_ip: str, pacs_port: str, calling_aet: str, called_aet: str,
+                       calling_port: str) -> MappingProxyType:
+    """按环境变量原始值缓存解析后的 PACS 配置（只读）；配置保存后取值变化即自动重新解析。"""
+    return MappingProxyType({
+        'PACS_IP': pacs_ip,
+        'PACS_PORT': int(pacs_port),
+        'CALLING_AET': calling_aet,
+        'CALLED_AET': called_aet,
+        'CALLING_PORT': int(calling_port)
+    })
+
+
+def _load_pacs_config() -> MappingProxyType:
+    """从环境变量读取 PACS 配置（提供默认值），多个客户端实例共享同一份解析结果。"""
+    return _parse_pacs_config(
+        os.getenv('PACS_IP', '172.17.250.192'),
+        os.getenv('PACS_PORT', '2104'),
+        os.getenv('CALLING_AET', 'WMX01'),
+        os.getenv('CALLED_AET', 'pacsFIR'),
+        os.getenv('CALLING_PORT', '1103')
+    )
+
+
 def compute_file_checksum(filepath: str, algorithm: str = 'md5') -> Optional[str]:
     """P3: 计算文件校验和"""
     try:
@@ -225,14 +405,8 @@ class DICOMDownloadClient:
     
     def __init__(self):
         """初始化客户端"""
-        # PACS配置（从环境变量加载，提供默认值）
-        self.pacs_config = {
-            'PACS_IP': os.getenv('PACS_IP', '172.17.250.192'),
-            'PACS_PORT': int(os.getenv('PACS_PORT', 2104)),
-            'CALLING_AET': os.getenv('CALLING_AET', 'WMX01'),
-            'CALLED_AET': os.getenv('CALLED_AET', 'pacsFIR'),
-            'CALLING_PORT': int(os.getenv('CALLING_PORT', 1103))
-        }
+        # PACS配置（从环境变量加载，提供默认值；相同配置只解析一次）
+        self.pacs_config = dict(_load_pacs_config())
         
         # 初始化AE
         self.ae = AE(ae_title=self.pacs_config['CALLING_AET'])
@@ -244,6 +418,12 @@ class DICOMDownloadClient:
         
         # 加载DICOM字段列表
         self.modality_keywords = self._load_keywords()
+        # 按模态缓存 get_keywords 的结果，避免逐文件重复查找
+        self._keywords_cache: Dict[str, List[str]] = {}
+        self._keyword_tags_cache: Dict[str, List[KeywordTag]] = {}
+        self._header_tags_cache: Dict[str, List[int]] = {}
+        self._sample_header_tags: Optional[List[int]] = None
+        self._required_tags: Optional[Tuple[int, ...]] = None
         
         # 兼容性属性
         self.session_id = "dummy_session"
@@ -261,19 +441,46 @@ class DICOMDownloadClient:
             self._download_high_watermark_gb = 45.0
             self._download_low_watermark_gb = 40.0
 
+        # 并发 C-MOVE 的序列数（每个序列独立关联，共享同一个 C-STORE SCP 接收）
+        try:
+            self.move_concurrency = int(os.getenv('DICOM_MOVE_CONCURRENCY', '4'))
+            if self.move_concurrency <= 0:
+                self.move_concurrency = 4
+        except Exception:
+            self.move_concurrency = 4
+
+        # DR/MG 等投影序列尺寸一致时，是否合并为单个 3D NIfTI（默认关闭，保持逐文件输出）
+        self.dr_merge_when_uniform = os.getenv('DR_MERGE_WHEN_UNIFORM', 'false').lower() in ('true', '1', 'yes')
+        # DR/MG 等投影图像是否按窗宽窗位输出 uint8（默认关闭，保持 float32 原始值；仅 Python 转换路径）
+        self.projection_uint8 = os.getenv('PROJECTION_UINT8', 'false').lower() in ('true', '1', 'yes')
+
         # P0: 下载统计信息
         self.download_stats = DownloadStats()
         # P0: 失败序列追踪器
         self.failed_series_tracker = FailedSeriesTracker()
         # P1: AE使用锁（防止多线程并发使用同一个AE）
         self._ae_lock = threading.Lock()
+        # P1: 查询（C-FIND）关联复用，批量检索时避免每个检查号都重新握手
+        self._find_assoc_state: Dict[str, Any] = {'assoc': None, 'last_used': 0.0}
+        self._find_assoc_lock = threading.Lock()
+        try:
+            self._find_assoc_idle_sec = float(os.getenv('FIND_ASSOC_IDLE_SEC', '60'))
+        except Exception:
+            self._find_assoc_idle_sec = 60.0
+        # 客户端被回收或进程退出时释放复用的关联
+        weakref.finalize(self, _release_assoc_state, self._find_assoc_state)
         # P3: 下载文件校验和缓存 {filepath: checksum}
         self._checksum_cache: Dict[str, str] = {}
         self._checksum_lock = threading.Lock()
+        # 目录大小扫描缓存 {directory: (monotonic时间, GB)}
+        self._dir_size_cache: Dict[str, Tuple[float, float]] = {}
 
     # 类级别的C-MOVE锁：防止多个实例同时启动C-STORE SCP导致端口冲突
     # C-MOVE协议要求客户端启动SCP服务器接收图像，固定端口无法支持并发
     _cmove_lock = threading.Lock()
+
+    # 类级别的字段文件缓存：{tags_dir绝对路径: (文件签名, keywords_map)}，多个客户端实例共享
+    _KEYWORDS_CACHE: Dict[str, Tuple[Tuple, Dict[str, List[str]]]] = {}
     
     def _load_keywords(self, tags_dir="dicom_tags"):
         """加载不同模态的DICOM字段列表"""
@@ -296,16 +503,25 @@ class DICOMDownloadClient:
                     print(f"⚠️  {tags_dir} not found, using built-in default keywords")
                 return {'default': default_keywords}
 
+            # 字段文件未变化时直接复用已解析结果（按文件名+修改时间判断）
+            with os.scandir(tags_dir) as it:
+                json_entries = sorted((e for e in it if e.name.endswith('.json') and e.is_file()),
+                                      key=lambda e: e.name)
+            cache_key = os.path.abspath(tags_dir)
+            signature = tuple((e.name, e.stat().st_mtime_ns) for e in json_entries)
+            cached = DICOMDownloadClient._KEYWORDS_CACHE.get(cache_key)
+            if cached is not None and cached[0] == signature:
+                return dict(cached[1])
+
             # 加载所有JSON文件
-            for filename in os.listdir(tags_dir):
-                if filename.endswith('.json'):
-                    modality = filename.replace('.json', '').upper()
-                    try:
-                        with open(os.path.join(tags_dir, filename), 'r', encoding='utf-8') as f:
-                            keywords_map[modality] = json.load(f)
-                        print(f"✅ Loaded {modality} modality keywords ({len(keywords_map[modality])} items)")
-                    except Exception as e:
-                        print(f"❌ Failed to load {filename}: {e}")
+            for entry in json_entries:
+                modality = entry.name.replace('.json', '').upper()
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        keywords_map[modality] = json.load(f)
+                    print(f"✅ Loaded {modality} modality keywords ({len(keywords_map[modality])} items)")
+                except Exception as e:
+                    print(f"❌ Failed to load {entry.name}: {e}")
             
             # 确保有默认值
             if 'MR' in keywords_map:
@@ -314,7 +530,8 @@ class DICOMDownloadClient:
                 keywords_map['default'] = keywords_map['DEFAULT']
             else:
                 keywords_map['default'] = default_keywords
-                
+
+            DICOMDownloadClient._KEYWORDS_CACHE[cache_key] = (signature, dict(keywords_map))
             return keywords_map
             
         except Exception as e:
@@ -322,19 +539,43 @@ class DICOMDownloadClient:
             return {'default': default_keywords}
     
     def get_keywords(self, modality):
-        """根据模态获取字段列表"""
+        """根据模态获取字段列表（按模态缓存）"""
+        cached = self._keywords_cache.get(modality)
+        if cached is not None:
+            return cached
+
         # 归一化模态名称
-        modality = modality.upper()
-        if modality in ['DR', 'DX', 'CR']:
+        normalized = modality.upper()
+        if normalized in ['DR', 'DX', 'CR']:
             key = 'DX'
-        elif "MR" in modality:
+        elif "MR" in normalized:
             key = 'MR'
-        elif modality in self.modality_keywords:
-            key = modality
+        elif normalized in self.modality_keywords:
+            key = normalized
         else:
             key = 'default'
-            
-        return self.modality_keywords.get(key, self.modality_keywords.get('default', []))
+
+        keywords = self.modality_keywords.get(key, self.modality_keywords.get('default', []))
+        self._keywords_cache[modality] = keywords
+        return keywords
+
+    def get_keyword_tags(self, modality):
+        """根据模态获取 (关键字, 标签号, 取值转换函数) 列表（按模态缓存），用于按标签号直接读取元素。"""
+        cached = self._keyword_tags_cache.get(modality)
+        if cached is None:
+            cached = resolve_keyword_tags(self.get_keywords(modality))
+            self._keyword_tags_cache[modality] = cached
+        return cached
+
+    def get_header_tags(self, modality):
+        """根据模态获取 dcmread(specific_tags=...) 所需的标签号列表（按模态缓存），元数据记录只解析这些标签。"""
+        cached = self._header_tags_cache.get(modality)
+        if cached is None:
+            tags = {tag for _, tag, _ in self.get_keyword_tags(modality) if tag is not None}
+            tags.update(tag_for_keyword(k) for k in ('Modality', 'AccessionNumber', 'Rows', 'Columns'))
+            cached = sorted(tags)
+            self._header_tags_cache[modality] = cached
+        return cached
 
     def login(self, username, password):
         """保持接口兼容性的虚拟登录"""
@@ -342,26 +583,46 @@ class DICOMDownloadClient:
         print(f"✅ Login successful: {username} (no actual authentication required)")
         return True
 
-    def _get_dir_size_gb(self, directory):
-        """计算目录大小（GB），用于磁盘水位判断。"""
-        total_size = 0
+    @staticmethod
+    def _iter_file_sizes(directory):
+        """递归遍历目录，产出每个文件的大小（os.scandir 复用目录项缓存，减少 stat 调用）。"""
         try:
-            for dirpath, dirnames, filenames in os.walk(directory):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    if os.path.exists(filepath):
-                        try:
-                            total_size += os.path.getsize(filepath)
-                        except Exception:
-                            continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            yield from DICOMDownloadClient._iter_file_sizes(entry.path)
+                        else:
+                            yield entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        # 文件可能在扫描过程中被转换/清理删除
+                        continue
+        except OSError:
+            return
+
+    def _get_dir_size_gb(self, directory, max_age_sec=1.0):
+        """计算目录大小（GB），用于磁盘水位判断。
+
+        结果按目录缓存 max_age_sec 秒，避免并发下载线程在同一时刻重复扫描。
+        """
+        now = time.monotonic()
+        cached = self._dir_size_cache.get(directory)
+        if cached is not None and now - cached[0] < max_age_sec:
+            return cached[1]
+
+        try:
+            size_gb = sum(self._iter_file_sizes(directory)) / (1024 ** 3)
         except Exception:
             return 0.0
-        return total_size / (1024 ** 3)
+        self._dir_size_cache[directory] = (now, size_gb)
+        return size_gb
 
-    def _wait_for_disk_low(self, directory, sleep_sec=5):
+    def _wait_for_disk_low(self, directory, sleep_sec=5, storage_state=None):
         """当目录大小超过高水位时阻塞，直到降到低水位以下。
 
         该方法在下载循环中被调用以实现简单的回压，避免无限制拉取导致磁盘耗尽。
+        传入 download_study 的 storage_state 时，使用"上次扫描结果 + 此后写入字节数"
+        作为目录大小的上界估计，未接近高水位时无需重新遍历目录。
         """
         try:
             high = float(os.getenv('DOWNLOAD_HIGH_WATERMARK_GB', str(self._download_high_watermark_gb)))
@@ -370,11 +631,21 @@ class DICOMDownloadClient:
             high = self._download_high_watermark_gb
             low = self._download_low_watermark_gb
 
-        # 快速判断：如果目录不存在或大小小于高水位，立即返回
+        # 快速判断：上界估计低于高水位时立即返回（转换删除文件只会让实际大小更小）
+        if storage_state is not None and storage_state.get('disk_baseline_bytes') is not None:
+            written_since = storage_state['bytes_written'] - storage_state['disk_baseline_written']
+            estimate = (storage_state['disk_baseline_bytes'] + written_since) / (1024 ** 3)
+            if estimate < high:
+                return
+
+        # 如果目录不存在或大小小于高水位，立即返回
         try:
             current = self._get_dir_size_gb(directory)
         except Exception:
             return
+        if storage_state is not None:
+            storage_state['disk_baseline_written'] = storage_state['bytes_written']
+            storage_state['disk_baseline_bytes'] = current * (1024 ** 3)
 
         while current >= high:
             try:
@@ -386,6 +657,9 @@ class DICOMDownloadClient:
                 current = self._get_dir_size_gb(directory)
             except Exception:
                 break
+            if storage_state is not None:
+                storage_state['disk_baseline_written'] = storage_state['bytes_written']
+                storage_state['disk_baseline_bytes'] = current * (1024 ** 3)
             if current <= low:
                 try:
                     logger.info(f"Disk usage dropped to {current:.2f}GB <= low watermark {low}GB, resuming")
@@ -397,6 +671,19 @@ class DICOMDownloadClient:
         """保持接口兼容性的虚拟登出"""
         print(f"✅ Logout successful: {self.username}")
         return True
+
+    def reset_task_state(self):
+        """清除单个任务产生的实例状态（回调、统计、失败追踪、缓存），客户端可供下一个任务复用。
+
+        复用的 C-FIND 关联与已加载的字段列表保留。
+        """
+        self.progress_callback = None
+        self.download_progress_callback = None
+        self.download_stats = DownloadStats()
+        self.failed_series_tracker = FailedSeriesTracker()
+        with self._checksum_lock:
+            self._checksum_cache.clear()
+        self._dir_size_cache.clear()
     
     def check_status(self):
         """检查PACS连接状态"""
@@ -418,6 +705,32 @@ class DICOMDownloadClient:
             logger.error(f"PACS connection error: {e}")
             return False
     
+    @contextmanager
+    def _shared_find_assoc(self):
+        """P1: 获取可复用的查询关联；已断开或空闲超过 FIND_ASSOC_IDLE_SEC 时重新建立。"""
+        with self._find_assoc_lock:
+            state = self._find_assoc_state
+            assoc = state['assoc']
+            if assoc is not None and (
+                not assoc.is_established
+                or time.monotonic() - state['last_used'] > self._find_assoc_idle_sec
+            ):
+                _release_assoc_state(state)
+                assoc = None
+            if assoc is None:
+                manager = AssociationManager(self.ae, self.pacs_config)
+                if not manager.connect():
+                    raise ConnectionError("Failed to establish PACS association after retries")
+                assoc = state['assoc'] = manager.assoc
+            try:
+                yield assoc
+            except Exception:
+                # 出错后不再复用该关联，下次重新建立
+                _release_assoc_state(state)
+                raise
+            finally:
+                state['last_used'] = time.monotonic()
+
     def _query_series_metadata(self, accession_number, modality_filter=None, min_series_files=None, exclude_derived=True):
         """查询PACS获取Series元数据
 
@@ -429,10 +742,81 @@ class DICOMDownloadClient:
         """
         series_metadata = []
 
-
-        # P1: 使用上下文管理器确保连接释放，P0: 带重试机制
+        def _query_study_series(query_assoc, study_uid, study_info):
+            """在给定关联上查询单个 Study 的 Series 列表（已应用模态/衍生序列过滤）。"""
+            study_series = []
+            series_ds = Dataset()
+            series_ds.QueryRetrieveLevel = "SERIES"
+            series_ds.StudyInstanceUID = study_uid
+            series_ds.SeriesInstanceUID = ""
+            series_ds.SeriesNumber = ""
+            series_ds.SeriesDescription = ""
+            series_ds.Modality = ""
+            series_ds.ImageType = ""  # 用于区分原始/派生图像
+            series_ds.SliceThickness = ""  # 用于过滤定位像(层厚为NA的)
+
+            responses = query_assoc.send_c_find(series_ds, StudyRootQueryRetrieveInformationModelFind)
+
+            for (status, identifier) in responses:
+                if status and status.Status in [0xFF00, 0xFF01]:
+                    if identifier and hasattr(identifier, 'SeriesInstanceUID'):
+                        series_modality = str(identifier.Modality) if hasattr(identifier, 'Modality') else ''
+
+                        # Modality 过滤
+                        if modality_filter:
+                            # 支持逗号分隔的多个模态，如 "MR,CT"
+                            allowed_modalities = [m.strip().upper() for m in modality_filter.split(',')]
+                            if series_modality.upper() not in allowed_modalities:
+                                continue
+
+                        series_desc = str(identifier.SeriesDescription) if hasattr(identifier, 'SeriesDescription') else ''
+
+                        # 过滤衍生序列：检查ImageType是否为DERIVED
+                        is_derived = False
+                        if exclude_derived:
+                            image_type = getattr(identifier, 'ImageType', None)
+                            if image_type:
+                                # ImageType 第一个值才代表像素来源：DERIVED/ORIGINAL。
+                                # 第二个值 PRIMARY/SECONDARY 是采集上下文，不能用于过滤。
+                                if isinstance(image_type, (list, tuple)):
+                                    first_val = str(image_type[0]).upper().strip() if image_type else ''
+                                    if first_val == 'DERIVED':
+                                        is_derived = True
+                                else:
+                                    if 'DERIVED' in str(image_type).upper():
+                                        is_derived = True
+                                if is_derived:
+                                    logger.debug(f"   Filtered by ImageType (DERIVED): {series_desc}")
+
+                            # 过滤衍生序列：检查SeriesDescription关键词
+                            if not is_derived and series_desc:
+                                desc_upper = series_desc.upper()
+                                # 特殊处理：纯数字3D（如 "3D"）或作为单词的一部分
+                                for keyword in get_derived_keywords():
+                                    # 使用单词边界匹配，避免误判（如 "MP" 匹配 "MPR"）
+                                    if keyword in desc_upper:
+                                        is_derived = True
+                                        logger.debug(f"   Filtered by keyword '{keyword}': {series_desc}")
+                                        break
+
+                            if is_derived:
+                                logger.info(f"   🚫 Filtered derived series: {series_desc}")
+                                continue
+
+                        series_info = dict(study_info)
+                        series_info.update({
+                            'StudyInstanceUID': study_uid,
+                            'SeriesInstanceUID': str(identifier.SeriesInstanceUID),
+                            'SeriesNumber': str(identifier.SeriesNumber) if hasattr(identifier, 'SeriesNumber') else '0',
+                            'SeriesDescription': series_desc if series_desc else 'Unknown',
+                            'Modality': series_modality
+                        })
+                        study_series.append(series_info)
+            return study_series
+
+        # P1: 复用查询关联（空闲超时/出错后自动重建），P0: 带重试机制
         try:
-            with AssociationManager(self.ae, self.pacs_config) as assoc:
+            with self._shared_find_assoc() as assoc:
                 # 查询Study
                 study_ds = Dataset()
                 study_ds.QueryRetrieveLevel = "STUDY"
@@ -461,75 +845,29 @@ class DICOMDownloadClient:
                     logger.warning(f"⚠️  Can't Find AccessionNumber: {accession_number}")
                     return []
 
-                # 查询每个Study的Series
-                for study_uid, study_info in studies.items():
-                    series_ds = Dataset()
-                    series_ds.QueryRetrieveLevel = "SERIES"
-                    series_ds.StudyInstanceUID = study_uid
-                    series_ds.SeriesInstanceUID = ""
-                    series_ds.SeriesNumber = ""
-                    series_ds.SeriesDescription = ""
-                    series_ds.Modality = ""
-                    series_ds.ImageType = ""  # 用于区分原始/派生图像
-                    series_ds.SliceThickness = ""  # 用于过滤定位像(层厚为NA的)
-
-                    responses = assoc.send_c_find(series_ds, StudyRootQueryRetrieveInformationModelFind)
-
-                    for (status, identifier) in responses:
-                        if status and status.Status in [0xFF00, 0xFF01]:
-                            if identifier and hasattr(identifier, 'SeriesInstanceUID'):
-                                series_modality = str(identifier.Modality) if hasattr(identifier, 'Modality') else ''
-
-                                # Modality 过滤
-                                if modality_filter:
-                                    # 支持逗号分隔的多个模态，如 "MR,CT"
-                                    allowed_modalities = [m.strip().upper() for m in modality_filter.split(',')]
-                                    if series_modality.upper() not in allowed_modalities:
-                                        continue
-
-                                series_desc = str(identifier.SeriesDescription) if hasattr(identifier, 'SeriesDescription') else ''
-
-                                # 过滤衍生序列：检查ImageType是否为DERIVED
-                                is_derived = False
-                                if exclude_derived:
-                                    image_type = getattr(identifier, 'ImageType', None)
-                                    if image_type:
-                                        # ImageType 第一个值才代表像素来源：DERIVED/ORIGINAL。
-                                        # 第二个值 PRIMARY/SECONDARY 是采集上下文，不能用于过滤。
-                                        if isinstance(image_type, (list, tuple)):
-                                            first_val = str(image_type[0]).upper().strip() if image_type else ''
-                                            if first_val == 'DERIVED':
-                                                is_derived = True
-                                        else:
-                                            if 'DERIVED' in str(image_type).upper():
-                                                is_derived = True
-                                        if is_derived:
-                                            logger.debug(f"   Filtered by ImageType (DERIVED): {series_desc}")
-
-                                    # 过滤衍生序列：检查SeriesDescription关键词
-                                    if not is_derived and series_desc:
-                                        desc_upper = series_desc.upper()
-                                        # 特殊处理：纯数字3D（如 "3D"）或作为单词的一部分
-                                        for keyword in get_derived_keywords():
-                                            # 使用单词边界匹配，避免误判（如 "MP" 匹配 "MPR"）
-                                            if keyword in desc_upper:
-                                                is_derived = True
-                                                logger.debug(f"   Filtered by keyword '{keyword}': {series_desc}")
-                                                break
-
-                                    if is_derived:
-                                        logger.info(f"   🚫 Filtered derived series: {series_desc}")
-                                        continue
-
-                                series_info = dict(study_info)
-                                series_info.update({
-                                    'StudyInstanceUID': study_uid,
-                                    'SeriesInstanceUID': str(identifier.SeriesInstanceUID),
-                                    'SeriesNumber': str(identifier.SeriesNumber) if hasattr(identifier, 'SeriesNumber') else '0',
-                                    'SeriesDescription': series_desc if series_desc else 'Unknown',
-                                    'Modality': series_modality
-                                })
-                                series_metadata.append(series_info)
+                # 查询每个Study的Series：单个 Study 复用当前关联，多个 Study 时并行使用独立关联
+                if len(studies) == 1:
+                    study_uid, study_info = next(iter(studies.items()))
+                    series_metadata.extend(_query_study_series(assoc, study_uid, study_info))
+                else:
+                    def _query_study_series_own_assoc(study_uid, study_info):
+                        with AssociationManager(self.ae, self.pacs_config) as study_assoc:
+                            return _query_study_series(study_assoc, study_uid, study_info)
+
+                    study_items = list(studies.items())
+                    study_results: List[List[Dict]] = [[] for _ in study_items]
+                    with ThreadPoolExecutor(max_workers=min(4, len(study_items))) as executor:
+                        futures = {
+                            executor.submit(_query_study_series_own_assoc, study_uid, study_info): idx
+                            for idx, (study_uid, study_info) in enumerate(study_items)
+                        }
+                        for future in as_completed(futures):
+                            try:
+                                study_results[futures[future]] = future.result()
+                            except Exception as e:
+                                logger.error(f"❌ Series query failed for study {study_items[futures[future]][0]}: {e}")
+                    for study_series in study_results:
+                        series_metadata.extend(study_series)
 
                 # 如果设置了最小文件数过滤，查询每个Series的Instance数量和层厚
                 # 注意：只对3D模态（CT/MR等）应用此过滤，2D模态（DX/DR等）跳过
@@ -668,10 +1006,32 @@ class DICOMDownloadClient:
             'current_path': '',
             'current_series_uid': '',  # 当前处理的SeriesInstanceUID
             'files_received': 0,
-            'current_series_files': set(),  # 当前序列接收的文件
+            'series_file_counts': {},  # 每个序列目录已接收的文件数
+            'bytes_written': 0,  # 本次下载已写入的字节数，用于磁盘水位估计
+            'disk_baseline_bytes': None,  # 上次实际扫描得到的目录大小
+            'disk_baseline_written': 0,  # 上次扫描时的 bytes_written
             'failed_files': [],  # 失败的文件记录
-            'series_uid_to_dir': {}  # SeriesInstanceUID到目录的映射，避免竞态条件
+            'series_uid_to_dir': {},  # SeriesInstanceUID到目录的映射，避免竞态条件
+            'last_store_time': {},  # 每个序列目录最近一次接收文件的 monotonic 时间
+            'pending_writes': {},  # 每个序列目录已接收但尚未落盘的文件数
+            'write_failures': {},  # 每个序列目录写盘失败的文件数（异步写盘时 C-STORE 已先回复成功）
+            'created_dirs': set()  # 已创建的序列目录，避免每个文件都调用 makedirs
         }
+        # 多个序列并发 C-MOVE 时，C-STORE 回调会在 SCP 的多个关联线程中同时执行
+        store_lock = threading.Lock()
+        # 某序列排队文件全部落盘时由写盘线程通知，_wait_store_idle 据此等待而非轮询
+        store_flushed = threading.Condition(store_lock)
+
+        # 异步写盘：C-STORE 回调只负责入队，由写盘线程保存文件（STORE_WRITER_THREADS=0 时同步写盘）
+        try:
+            num_store_writers = int(os.getenv('STORE_WRITER_THREADS', '4'))
+        except Exception:
+            num_store_writers = 4
+        # 队列中每项是完整的像素数据集，按写盘线程数给出较小上限，避免磁盘变慢时内存堆积
+        store_queue = Queue(maxsize=num_store_writers * 4) if num_store_writers > 0 else None
+        store_writers: List[threading.Thread] = []
+        # 同一检查的多个序列并发 C-MOVE 时，未能映射到序列目录的数据集不能回退到 current_path
+        concurrent_moves = min(self.move_concurrency, len(series_metadata)) > 1
 
         def handle_store(event):
             """P3: 处理C-STORE请求，包含数据完整性校验"""
@@ -691,74 +1051,258 @@ class DICOMDownloadClient:
                 try:
                     series_instance_uid = dataset.SeriesInstanceUID
                 except AttributeError:
-                    # SeriesInstanceUID 属性不存在，尝试从文件元数据获取
                     logger.warning(f"⚠️  Dataset has no SeriesInstanceUID attribute, SOPInstanceUID={sop_instance_uid[:20]}...")
-                    # 使用当前路径作为fallback
-                    series_dir = storage_state['current_path']
                 except Exception as e:
                     logger.error(f"❌ Failed to get SeriesInstanceUID from dataset: {e}, SOPInstanceUID={sop_instance_uid[:20]}...")
                     return 0xA701
 
+                series_dir = None
                 if series_instance_uid:
                     series_dir = storage_state['series_uid_to_dir'].get(series_instance_uid)
-                    if not series_dir:
-                        # 如果找不到映射，使用当前路径作为fallback（兼容旧行为）
-                        series_dir = storage_state['current_path']
-                        available_uids = list(storage_state['series_uid_to_dir'].keys())
-                        logger.warning(f"⚠️  No directory mapping for Series UID {str(series_instance_uid)[:30]}..., "
-                                       f"available mappings: {len(available_uids)}, "
-                                       f"using current_path: {series_dir}")
-                else:
-                    # 没有 SeriesInstanceUID，使用当前路径
+                if not series_dir:
+                    # 并发 C-MOVE 时 current_path 无法确定文件属于哪个序列，拒收以免混入其他序列目录
+                    if concurrent_moves:
+                        logger.warning(f"⚠️  Rejecting SOPInstanceUID={sop_instance_uid[:20]}...: no directory mapping for "
+                                       f"Series UID {str(series_instance_uid)[:30]} with concurrent C-MOVE")
+                        return 0xA700
+                    # 串行下载时使用当前路径作为fallback（兼容旧行为）
                     series_dir = storage_state['current_path']
+                    logger.warning(f"⚠️  No directory mapping for Series UID {str(series_instance_uid)[:30]}..., "
+                                   f"available mappings: {len(storage_state['series_uid_to_dir'])}, "
+                                   f"using current_path: {series_dir}")
 
                 filename = f"{sop_instance_uid}.dcm"
                 filepath = os.path.join(series_dir, filename)
 
-                # 确保目录存在
-                os.makedirs(series_dir, exist_ok=True)
+                if store_queue is None:
+                    status = _save_received_dataset(dataset, filepath, series_dir, sop_instance_uid)
+                    if status != 0x0000:
+                        with store_lock:
+                            storage_state['write_failures'][series_dir] = storage_state['write_failures'].get(series_dir, 0) + 1
+                    return status
+
+                # 交给写盘线程，C-STORE 事件线程立即返回继续接收
+                with store_lock:
+                    storage_state['pending_writes'][series_dir] = storage_state['pending_writes'].get(series_dir, 0) + 1
+                    storage_state['last_store_time'][series_dir] = time.monotonic()
+                store_queue.put((dataset, filepath, series_dir, sop_instance_uid))
+                return 0x0000
+            except Exception as e:
+                logger.error(f"❌ Failed saving DICOM file: {e}", exc_info=True)
+                return 0xA700
 
-                # 保存文件
+        def _save_received_dataset(dataset, filepath, series_dir, sop_instance_uid):
+            """保存接收到的数据集并做完整性校验，返回 C-STORE 状态码。"""
+            filename = os.path.basename(filepath)
+            try:
+                # 确保目录存在（每个序列目录只创建一次）
+                if series_dir not in storage_state['created_dirs']:
+                    os.makedirs(series_dir, exist_ok=True)
+                    with store_lock:
+                        storage_state['created_dirs'].add(series_dir)
+
+                # 保存文件：先序列化到内存，一次写入磁盘；大小与校验和直接取自内存数据，
+                # 无需写后再 stat/重新读取文件
                 try:
-                    dataset.save_as(filepath, write_like_original=False)
+                    buffer = io.BytesIO()
+                    dataset.save_as(buffer, write_like_original=False)
+                    data = buffer.getbuffer()
+                    with open(filepath, 'wb') as f:
+                        f.write(data)
                 except Exception as e:
                     logger.error(f"❌ Failed to save dataset to {filepath}: {e}")
+                    storage_state['failed_files'].append({'uid': sop_instance_uid, 'reason': 'save_failed'})
                     return 0xA700
 
-                # P3: 验证文件完整性（文件可读且大小合理）
-                if os.path.exists(filepath):
-                    file_size = os.path.getsize(filepath)
-                    if file_size < 128:  # DICOM文件最小头大小
-                        logger.warning(f"⚠️  File {filename} is too small ({file_size} bytes), may be corrupted")
-                        storage_state['failed_files'].append({'uid': sop_instance_uid, 'reason': 'too_small'})
-                        return 0xA702
-
-                    # P3: 计算并缓存校验和（可选，仅对关键文件）
-                    if len(storage_state['current_series_files']) < 100:  # 只对前100个文件计算校验和
-                        checksum = compute_file_checksum(filepath)
-                        if checksum:
-                            with self._checksum_lock:
-                                self._checksum_cache[filepath] = checksum
-
-                    storage_state['current_series_files'].add(filepath)
+                # P3: 验证文件完整性（大小合理）
+                file_size = len(data)
+                if file_size < 128:  # DICOM文件最小头大小
+                    logger.warning(f"⚠️  File {filename} is too small ({file_size} bytes), may be corrupted")
+                    storage_state['failed_files'].append({'uid': sop_instance_uid, 'reason': 'too_small'})
+                    return 0xA702
+
+                with store_lock:
+                    series_file_count = storage_state['series_file_counts'].get(series_dir, 0)
+                    storage_state['series_file_counts'][series_dir] = series_file_count + 1
+                    storage_state['last_store_time'][series_dir] = time.monotonic()
                     storage_state['files_received'] += 1
+                    files_received = storage_state['files_received']
+                    storage_state['bytes_written'] += file_size
                     self.download_stats.total_bytes += file_size
 
-                    # 记录前5个文件和每10个文件
-                    if storage_state['files_received'] <= 5 or storage_state['files_received'] % 10 == 0:
-                        logger.info(f"   Received {storage_state['files_received']} files... (last: {filename[:40]}... in {os.path.basename(series_dir)})")
-                else:
-                    logger.error(f"❌ File {filepath} not found after save")
-                    return 0xA700
+                # P3: 计算并缓存校验和（可选，仅对关键文件）
+                if series_file_count < 100:  # 每个序列只对前100个文件计算校验和
+                    with self._checksum_lock:
+                        self._checksum_cache[filepath] = hashlib.md5(data).hexdigest()
+
+                # 记录前5个文件和每10个文件
+                if files_received <= 5 or files_received % 10 == 0:
+                    logger.info(f"   Received {files_received} files... (last: {filename[:40]}... in {os.path.basename(series_dir)})")
 
                 return 0x0000
             except Exception as e:
                 logger.error(f"❌ Failed saving DICOM file: {e}", exc_info=True)
                 return 0xA700
 
+        def _store_writer():
+            """写盘线程：从队列取出数据集保存，直到收到 None 哨兵。"""
+            while True:
+                item = store_queue.get()
+                if item is None:
+                    store_queue.task_done()
+                    break
+                dataset, filepath, series_dir, sop_instance_uid = item
+                status = 0xA700
+                try:
+                    status = _save_received_dataset(dataset, filepath, series_dir, sop_instance_uid)
+                finally:
+                    with store_lock:
+                        if status != 0x0000:
+                            storage_state['write_failures'][series_dir] = storage_state['write_failures'].get(series_dir, 0) + 1
+                        storage_state['pending_writes'][series_dir] -= 1
+                        storage_state['last_store_time'][series_dir] = time.monotonic()
+                        if storage_state['pending_writes'][series_dir] <= 0:
+                            store_flushed.notify_all()
+                    store_queue.task_done()
+
+        def _wait_store_idle(series_dir, quiet_sec=0.05, timeout_sec=2.0, flush_timeout_sec=120.0):
+            """等待该序列的 C-STORE 静默 quiet_sec 秒（最多 timeout_sec 秒），代替固定延迟。
+
+            启用异步写盘时，先等待该序列排队中的文件全部落盘（最多 flush_timeout_sec 秒）。
+            """
+            with store_flushed:
+                store_flushed.wait_for(
+                    lambda: storage_state['pending_writes'].get(series_dir, 0) <= 0,
+                    timeout=flush_timeout_sec
+                )
+            deadline = time.monotonic() + timeout_sec
+            while time.monotonic() < deadline:
+                last_store = storage_state['last_store_time'].get(series_dir, 0.0)
+                if time.monotonic() - last_store >= quiet_sec:
+                    return
+                time.sleep(0.02)
+
+        def _check_store_failures(series_dir):
+            """该序列有文件写盘失败时抛出异常，交由 failed_series_tracker 重试；计数随之清零。"""
+            with store_lock:
+                failures = storage_state['write_failures'].pop(series_dir, 0)
+            if failures:
+                raise RuntimeError(f"{failures} file(s) failed to save in {os.path.basename(series_dir)}")
+
+        # P0: 跟踪失败的序列以便重试
+        failed_series = []
+        total_series = len(series_metadata)
+
+        # 预先计算每个序列的输出目录，下载线程只接收不可变的路径字符串
+        series_dirs = [
+            os.path.join(
+                output_path,
+                f"{series.get('SeriesNumber', f'Series{i+1}'):0>3}_"
+                f"{self._sanitize_folder_name(series.get('SeriesDescription', 'Unknown'))}"
+            )
+            for i, series in enumerate(series_metadata)
+        ]
+
+        def _download_one_series(i, series, series_dir):
+            """下载单个序列：独立建立关联发送 C-MOVE，图像由共享的 C-STORE SCP 接收。"""
+            series_num = series.get('SeriesNumber', f'Series{i+1}')
+            series_desc = series.get('SeriesDescription', 'Unknown')
+            series_uid = series.get('SeriesInstanceUID')
+
+            # P0: 注册SeriesInstanceUID到目录的映射，用于C-STORE回调查找
+            # 这避免了竞态条件：并发下载时 C-STORE 只能通过 SeriesInstanceUID 定位目录
+            with store_lock:
+                if series_uid:
+                    storage_state['series_uid_to_dir'][series_uid] = series_dir
+                    logger.debug(f"   Registered series_uid mapping: {series_uid[:20]}... -> {series_dir}")
+                else:
+                    logger.warning(f"   Series {series_num} has no SeriesInstanceUID, cannot register mapping")
+                storage_state['current_path'] = series_dir
+                storage_state['current_series_uid'] = series_uid
+
+            try:
+                logger.info(f"📥 Downloading series {i+1}/{total_series}: {series_num} - {series_desc}")
+
+                # 当磁盘空间达到高水位时，暂停下载以等待转换/清理
+                try:
+                    self._wait_for_disk_low(output_path, storage_state=storage_state)
+                except Exception:
+                    pass
+
+                # 发送C-MOVE请求
+                move_ds = Dataset()
+                move_ds.QueryRetrieveLevel = 'SERIES'
+                move_ds.StudyInstanceUID = series['StudyInstanceUID']
+                move_ds.SeriesInstanceUID = series_uid
+
+                logger.info(f"   Sending C-MOVE request for Series {series_num}...")
+
+                # 报告下载进度
+                if callable(self.download_progress_callback):
+                    try:
+                        progress_pct = 40 + int((i / total_series) * 40)
+                        self.download_progress_callback(i + 1, total_series, series_desc, progress_pct)
+                    except Exception as cb_e:
+                        logger.warning(f"   Progress callback error: {cb_e}")
+
+                # P1: 每个序列使用独立关联，便于并发且互不影响
+                with AssociationManager(self.ae, self.pacs_config) as assoc:
+                    responses = assoc.send_c_move(
+                        move_ds,
+                        self.pacs_config['CALLING_AET'],
+                        query_model=StudyRootQueryRetrieveInformationModelMove
+                    )
+
+                    # 跟踪C-MOVE响应状态
+                    move_status = None
+                    error_messages = []
+                    for (status, identifier) in responses:
+                        if status:
+                            move_status = status.Status
+                            if status.Status == 0x0000:
+                                logger.info(f"   Series {series_num} C-MOVE completed successfully")
+                            elif status.Status != 0xFF00:  # 0xFF00 是Pending状态
+                                error_msg = f"0x{status.Status:04X}"
+                                error_messages.append(error_msg)
+                                logger.warning(f"   Series {series_num} C-MOVE status: {error_msg}")
+
+                if move_status is None:
+                    logger.warning(f"   ⚠️  Series {series_num}: No C-MOVE response received (timeout or network issue)")
+                    raise TimeoutError(f"No C-MOVE response for series {series_num}")
+
+                # 检查是否有错误状态
+                if error_messages and move_status != 0x0000:
+                    raise RuntimeError(f"C-MOVE failed with status: {error_messages[-1]}")
+
+                _wait_store_idle(series_dir)  # 等待最后的文件写入完成
+                _check_store_failures(series_dir)
+                with store_lock:
+                    self.download_stats.completed_series += 1
+
+                # 通知外部：该Series下载完成
+                if callable(on_series_downloaded):
+                    try:
+                        on_series_downloaded(series_dir, series)
+                    except Exception as e:
+                        logger.warning(f"⚠️  Series callback failed: {e}")
+
+            except Exception as e:
+                # P0: 失败隔离 - 记录错误但不影响其他序列
+                logger.error(f"❌ Series {series_num} download failed: {e}")
+                with store_lock:
+                    self.failed_series_tracker.add(series_uid, series, e)
+                    failed_series.append(series)
+                    self.download_stats.failed_series += 1
+                    self.download_stats.errors.append({
+                        'series': series_num,
+                        'error': str(e),
+                        'timestamp': time.time()
+                    })
+
         # P0: 使用类级别的锁确保C-MOVE操作串行化
         # C-MOVE协议需要启动C-STORE SCP服务器接收图像，固定端口无法支持并发
         # 如果两个任务同时使用同一端口，会导致图像混杂到错误的目录
+        # （同一检查内的多个序列可并发 C-MOVE，它们共享本任务的 SCP）
         logger.info(f"🔒 Acquiring C-MOVE lock for {accession_number}...")
         with DICOMDownloadClient._cmove_lock:
             logger.info(f"🔓 C-MOVE lock acquired for {accession_number}, starting download...")
@@ -774,150 +1318,75 @@ class DICOMDownloadClient:
                 evt_handlers=[(evt.EVT_C_STORE, handle_store)]
             )
 
-            # P0: 跟踪失败的序列以便重试
-            failed_series = []
+            # 启动写盘线程
+            for _ in range(num_store_writers):
+                writer = threading.Thread(target=_store_writer, daemon=True)
+                writer.start()
+                store_writers.append(writer)
 
             try:
-                # P1: 使用上下文管理器管理关联
-                with AssociationManager(self.ae, self.pacs_config) as assoc:
-                    # 下载每个Series（P0: 失败隔离）
-                    for i, series in enumerate(series_metadata):
-                        series_num = series.get('SeriesNumber', f'Series{i+1}')
-                        series_desc = series.get('SeriesDescription', 'Unknown')
-                        series_uid = series.get('SeriesInstanceUID')
-                        series_dir = os.path.join(output_path, f"{series_num:0>3}_{self._sanitize_folder_name(series_desc)}")
-
-                        # P0: 注册SeriesInstanceUID到目录的映射，用于C-STORE回调查找
-                        # 这避免了竞态条件：C-STORE可能在下一个Series的循环开始后才到达
-                        if series_uid:
-                            storage_state['series_uid_to_dir'][series_uid] = series_dir
-                            logger.debug(f"   Registered series_uid mapping: {series_uid[:20]}... -> {series_dir}")
-                        else:
-                            logger.warning(f"   Series {series_num} has no SeriesInstanceUID, cannot register mapping")
-                        storage_state['current_path'] = series_dir
-                        storage_state['current_series_uid'] = series_uid
-                        storage_state['current_series_files'] = set()  # 重置当前序列文件集合
-
-                        try:
-                            logger.info(f"📥 Downloading series {i+1}/{len(series_metadata)}: {series_num} - {series_desc}")
-
-                            # 当磁盘空间达到高水位时，暂停下载以等待转换/清理
-                            try:
-                                self._wait_for_disk_low(output_path)
-                            except Exception:
-                                pass
-
-                            # 发送C-MOVE请求
-                            move_ds = Dataset()
-                            move_ds.QueryRetrieveLevel = 'SERIES'
-                            move_ds.StudyInstanceUID = series['StudyInstanceUID']
-                            move_ds.SeriesInstanceUID = series_uid
-
-                            logger.info(f"   Sending C-MOVE request for Series {series_num}...")
-
-                            # 报告下载进度
-                            if callable(self.download_progress_callback):
-                                try:
-                                    progress_pct = 40 + int((i / len(series_metadata)) * 40)
-                                    self.download_progress_callback(i + 1, len(series_metadata), series_desc, progress_pct)
-                                except Exception as cb_e:
-                                    logger.warning(f"   Progress callback error: {cb_e}")
-
-                            responses = assoc.send_c_move(
-                                move_ds,
-                                self.pacs_config['CALLING_AET'],
-                                query_model=StudyRootQueryRetrieveInformationModelMove
-                            )
-
-                            # 跟踪C-MOVE响应状态
-                            move_status = None
-                            error_messages = []
-                            for (status, identifier) in responses:
-                                if status:
-                                    move_status = status.Status
-                                    if status.Status == 0x0000:
-                                        logger.info(f"   Series {series_num} C-MOVE completed successfully")
-                                        self.download_stats.completed_series += 1
-                                    elif status.Status != 0xFF00:  # 0xFF00 是Pending状态
-                                        error_msg = f"0x{status.Status:04X}"
-                                        error_messages.append(error_msg)
-                                        logger.warning(f"   Series {series_num} C-MOVE status: {error_msg}")
-
-                            if move_status is None:
-                                logger.warning(f"   ⚠️  Series {series_num}: No C-MOVE response received (timeout or network issue)")
-                                raise TimeoutError(f"No C-MOVE response for series {series_num}")
-
-                            # 检查是否有错误状态
-                            if error_messages and move_status != 0x0000:
-                                raise RuntimeError(f"C-MOVE failed with status: {error_messages[-1]}")
-
-                            time.sleep(0.5)  # 短暂延迟，让文件写入完成
-
-                            # 通知外部：该Series下载完成
-                            if callable(on_series_downloaded):
-                                try:
-                                    on_series_downloaded(series_dir, series)
-                                except Exception as e:
-                                    logger.warning(f"⚠️  Series callback failed: {e}")
-
-                        except Exception as e:
-                            # P0: 失败隔离 - 记录错误但继续处理下一个序列
-                            logger.error(f"❌ Series {series_num} download failed: {e}")
-                            self.failed_series_tracker.add(series_uid, series, e)
-                            failed_series.append(series)
-                            self.download_stats.failed_series += 1
-                            self.download_stats.errors.append({
-                                'series': series_num,
-                                'error': str(e),
-                                'timestamp': time.time()
-                            })
-                            # 继续处理下一个序列，不中断整个下载流程
-                            continue
+                # 下载每个Series（P0: 失败隔离），并发数受 DICOM_MOVE_CONCURRENCY 限制
+                max_workers = max(1, min(self.move_concurrency, total_series))
+                logger.info(f"   Downloading {total_series} series with {max_workers} concurrent C-MOVE worker(s)")
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cmove') as executor:
+                    futures = [executor.submit(_download_one_series, i, series, series_dirs[i])
+                               for i, series in enumerate(series_metadata)]
+                    for future in as_completed(futures):
+                        future.result()
 
                 # P0: 尝试重试失败的序列
                 retryable = self.failed_series_tracker.get_retryable_series()
                 if retryable:
                     logger.info(f"🔄 Attempting to retry {len(retryable)} failed series...")
-                    for series_uid, series_info in retryable:
-                        try:
-                            series_num = series_info.get('SeriesNumber', 'Unknown')
-                            series_desc = series_info.get('SeriesDescription', 'Unknown')
-                            series_dir = os.path.join(output_path, f"{series_num:0>3}_{self._sanitize_folder_name(series_desc)}")
-
-                            # P0: 注册SeriesInstanceUID到目录的映射，用于C-STORE回调查找
-                            storage_state['series_uid_to_dir'][series_uid] = series_dir
-                            storage_state['current_path'] = series_dir
-                            storage_state['current_series_uid'] = series_uid
-                            storage_state['current_series_files'] = set()
-
-                            logger.info(f"🔄 Retrying Series {series_num}...")
-
-                            move_ds = Dataset()
-                            move_ds.QueryRetrieveLevel = 'SERIES'
-                            move_ds.StudyInstanceUID = series_info['StudyInstanceUID']
-                            move_ds.SeriesInstanceUID = series_uid
-
-                            responses = assoc.send_c_move(
-                                move_ds,
-                                self.pacs_config['CALLING_AET'],
-                                query_model=StudyRootQueryRetrieveInformationModelMove
-                            )
-
-                            for (status, identifier) in responses:
-                                if status and status.Status == 0x0000:
-                                    logger.info(f"   Series {series_num} retry successful")
-                                    self.download_stats.completed_series += 1
-                                    self.download_stats.failed_series -= 1
-                                    if callable(on_series_downloaded):
-                                        on_series_downloaded(series_dir, series_info)
-                                    break
-                            else:
-                                logger.warning(f"   Series {series_num} retry failed")
-
-                            time.sleep(0.5)
-
-                        except Exception as e:
-                            logger.error(f"❌ Series {series_info.get('SeriesNumber')} retry failed: {e}")
+                    try:
+                        with AssociationManager(self.ae, self.pacs_config) as assoc:
+                            for series_uid, series_info in retryable:
+                                try:
+                                    series_num = series_info.get('SeriesNumber', 'Unknown')
+                                    series_desc = series_info.get('SeriesDescription', 'Unknown')
+                                    # 首轮下载时已注册的目录，直接复用
+                                    series_dir = storage_state['series_uid_to_dir'].get(series_uid) or os.path.join(
+                                        output_path, f"{series_num:0>3}_{self._sanitize_folder_name(series_desc)}"
+                                    )
+
+                                    # P0: 注册SeriesInstanceUID到目录的映射，用于C-STORE回调查找
+                                    with store_lock:
+                                        storage_state['series_uid_to_dir'][series_uid] = series_dir
+                                        storage_state['current_path'] = series_dir
+                                        storage_state['current_series_uid'] = series_uid
+                                        storage_state['series_file_counts'][series_dir] = 0
+
+                                    logger.info(f"🔄 Retrying Series {series_num}...")
+
+                                    move_ds = Dataset()
+                                    move_ds.QueryRetrieveLevel = 'SERIES'
+                                    move_ds.StudyInstanceUID = series_info['StudyInstanceUID']
+                                    move_ds.SeriesInstanceUID = series_uid
+
+                                    responses = assoc.send_c_move(
+                                        move_ds,
+                                        self.pacs_config['CALLING_AET'],
+                                        query_model=StudyRootQueryRetrieveInformationModelMove
+                                    )
+
+                                    for (status, identifier) in responses:
+                                        if status and status.Status == 0x0000:
+                                            _wait_store_idle(series_dir)
+                                            _check_store_failures(series_dir)
+                                            logger.info(f"   Series {series_num} retry successful")
+                                            self.download_stats.completed_series += 1
+                                            self.download_stats.failed_series -= 1
+                                            if callable(on_series_downloaded):
+                                                on_series_downloaded(series_dir, series_info)
+                                            break
+                                    else:
+                                        logger.warning(f"   Series {series_num} retry failed")
+
+                                except Exception as e:
+                                    logger.error(f"❌ Series {series_info.get('SeriesNumber')} retry failed: {e}")
+                    except ConnectionError as e:
+                        # 重试阶段连接失败不影响已成功下载的序列
+                        logger.error(f"❌ Retry skipped, failed to establish PACS connection: {e}")
 
             except ConnectionError as e:
                 logger.error(f"❌ Failed to establish PACS connection: {e}")
@@ -927,6 +1396,13 @@ class DICOMDownloadClient:
                 return None
             finally:
                 server.shutdown()
+                # 等待队列中的文件全部写盘后再停止写盘线程
+                if store_queue is not None:
+                    store_queue.join()
+                    for _ in store_writers:
+                        store_queue.put(None)
+                    for writer in store_writers:
+                        writer.join(timeout=5.0)
 
         # 打印下载统计
         stats_summary = self.download_stats.get_summary()
@@ -948,8 +1424,7 @@ class DICOMDownloadClient:
         if self._checksum_cache:
             checksum_file = os.path.join(output_path, '.checksums.json')
             try:
-                with open(checksum_file, 'w', encoding='utf-8') as f:
-                    json.dump(self._checksum_cache, f, indent=2)
+                write_json_cache(checksum_file, self._checksum_cache)
             except Exception as e:
                 logger.error(f"Failed to write checksum cache: {e}")
 
@@ -974,8 +1449,27 @@ class DICOMDownloadClient:
         os.makedirs(extract_dir, exist_ok=True)
 
         try:
-            with zipfile.ZipFile(zip_filepath, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
+            with _open_zip_mapped(zip_filepath) as zip_ref:
+                infos = zip_ref.infolist()
+                max_workers = min(8, os.cpu_count() or 1, len(infos))
+                if max_workers <= 1:
+                    zip_ref.extractall(extract_dir)
+                    return extract_dir
+
+            # zlib 解压时释放 GIL：将成员分组，每个线程使用独立的 ZipFile 句柄并行解压
+            groups = [infos[i::max_workers] for i in range(max_workers)]
+
+            def _extract_group(group):
+                with _open_zip_mapped(zip_filepath) as local_zip:
+                    for info in group:
+                        try:
+                            local_zip.extract(info, extract_dir)
+                        except FileExistsError:
+                            # 其他线程恰好同时创建了同一父目录，重试一次即可
+                            local_zip.extract(info, extract_dir)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_extract_group, groups))
         except Exception:
             return None
 
@@ -1001,12 +1495,42 @@ class DICOMDownloadClient:
             'ImagePositionPatient'
         ]
 
+    def _get_required_tags(self):
+        """转换/预览所需标签的标签号元组（关键字只解析一次，dcmread 无需逐次按关键字查字典）。"""
+        if self._required_tags is None:
+            self._required_tags = tuple(
+                tag for tag in map(tag_for_keyword, self._get_required_tag_names()) if tag is not None
+            )
+        return self._required_tags
+
+    def _read_sample_header(self, filepath):
+        """读取样本 DICOM 中转换/预览所需的标签（同一文件未修改时复用解析结果）。"""
+        return _read_sample_header_cached(
+            filepath, os.stat(filepath).st_mtime_ns, self._get_required_tags()
+        )
+
+    def _get_sample_header_tags(self):
+        """样本 DICOM 需要解析的标签号：转换/预览所需标签 + 所有模态的元数据关键字。"""
+        if self._sample_header_tags is None:
+            tags = set(self._get_required_tags())
+            for keywords in self.modality_keywords.values():
+                tags.update(tag for tag in map(tag_for_keyword, keywords) if tag is not None)
+            self._sample_header_tags = sorted(tags)
+        return self._sample_header_tags
+
     def _normalize_tag_value(self, value):
         if value is None:
             return None
         if hasattr(value, 'value'):
             value = value.value
         if hasattr(value, '__len__') and not isinstance(value, str):
+            # 数值型多值元素（如 ImageOrientationPatient、PixelSpacing）一次性转换
+            try:
+                arr = np.asarray(value, dtype=np.float64)
+                if arr.ndim >= 1:
+                    return arr.tolist()
+            except (TypeError, ValueError):
+                pass
             return [self._normalize_tag_value(v) for v in value]
         try:
             return float(value)
@@ -1028,24 +1552,24 @@ class DICOMDownloadClient:
         if not os.path.exists(cache_path):
             return None
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache = json.load(f)
+            cache = read_json_cache(cache_path)
             return cache.get('sample_tags')
         except Exception:
             return None
 
-    def _ensure_metadata_cache(self, series_dir, series_name, dicom_files, modality):
+    def _ensure_metadata_cache(self, series_dir, series_name, dicom_files, modality, preparsed=None):
+        """缓存缺失时补建序列元数据缓存；preparsed 为转换过程中已解析的 {文件路径: 头信息数据集}，可免去重复读取。"""
         cache_path = os.path.join(series_dir, "dicom_metadata_cache.json")
         if os.path.exists(cache_path):
             return
-        self._cache_metadata_for_series(series_dir, series_name, dicom_files, modality)
+        self._cache_metadata_for_series(series_dir, series_name, dicom_files, modality, preparsed=preparsed)
         if os.path.exists(cache_path):
             return
 
         sample_tags = None
         try:
             if dicom_files:
-                sample_dcm = pydicom.dcmread(dicom_files[0], force=True, stop_before_pixels=True)
+                sample_dcm = self._read_sample_header(dicom_files[0])
                 sample_tags = self._build_sample_tags(sample_dcm)
                 if not sample_tags.get('Modality'):
                     sample_tags['Modality'] = modality
@@ -1066,8 +1590,7 @@ class DICOMDownloadClient:
             'sample_tags': sample_tags
         }
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            write_json_cache(cache_path, payload)
         except Exception:
             return
 
@@ -1098,39 +1621,26 @@ class DICOMDownloadClient:
             'sample_tags': sample_tags
         }
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            write_json_cache(cache_path, payload)
         except Exception:
             return
     
-    def _is_dicom_file(self, filepath):
-        """判断是否为DICOM文件"""
-        lower_path = filepath.lower()
-        if (
-            lower_path.endswith(".json")
-            or lower_path.endswith(".csv")
-            or lower_path.endswith(".txt")
-            or lower_path.endswith(".nii")
-            or lower_path.endswith(".nii.gz")
-            or lower_path.endswith(".npz")
-            or lower_path.endswith(".png")
-            or lower_path.endswith(".jpg")
-            or lower_path.endswith(".jpeg")
-            or lower_path.endswith(".bmp")
-            or lower_path.endswith(".gif")
-            or lower_path.endswith(".webp")
-        ):
+    def _is_dicom_file(self, filepath, deep_scan=False):
+        """判断是否为DICOM文件
+
+        .dcm/.ima/.dicom 扩展名直接认定（整理后的序列目录均为此类文件）；其余文件
+        检查 128 字节前导后的 'DICM' 标记，没有前导的裸数据集通过首个标签的
+        组号（0x0002/0x0008）快速判断。仅在 deep_scan=True 时才回退到 pydicom 解析。
+        """
+        verdict = _probe_dicom_file(filepath)
+        if verdict is not None:
+            return verdict
+        if not deep_scan:
             return False
         try:
-            with open(filepath, 'rb') as f:
-                f.seek(128)
-                dicm = f.read(4)
-                if dicm == b'DICM':
-                    return True
-            
             pydicom.dcmread(filepath, force=True, stop_before_pixels=True)
             return True
-        except:
+        except Exception:
             return False
     
     def _wait_for_files_stable(self, directory, timeout=30, interval=0.5):
@@ -1186,21 +1696,14 @@ class DICOMDownloadClient:
         if not name:
             return "Unknown"
 
-        name = str(name)
-
         # 1. 替换Windows非法字符 (包括冒号:和方括号[])
-        name = re.sub(r'[<>"/\\|?*:]', '_', name)
-        name = re.sub(r'[\[\]]', '_', name)
-
-        # 2. 替换可能导致dcm2niix问题的字符组合
-        # 点+空格（如 "303. X Elbow" -> "303_X Elbow"）
-        name = re.sub(r'\.\s+', '_', name)
-        # 多个连续空格转为单个下划线
-        name = re.sub(r'\s+', '_', name)
-        # 多个连续点转为单个
-        name = re.sub(r'\.+', '.', name)
+        name = str(name).translate(_FOLDER_NAME_ILLEGAL_TABLE)
+
+        # 2. 替换可能导致dcm2niix问题的字符组合（单次扫描）
+        # 点+空格（如 "303. X Elbow" -> "303_X Elbow"）、连续空格 -> 下划线；连续点 -> 单个点
+        name = _FOLDER_NAME_COLLAPSE_RE.sub(_collapse_folder_name_run, name)
         # 多个连续下划线转为单个
-        name = re.sub(r'_+', '_', name)
+        name = _FOLDER_NAME_UNDERSCORE_RE.sub('_', name)
 
         # 3. 移除首尾的特殊字符
         name = name.strip('. _')
@@ -1230,11 +1733,11 @@ class DICOMDownloadClient:
         """将DICOM序列转换为NPZ格式，并按照要求规范化方向"""
         return convert_to_npz_impl(self, series_dir, series_name)
 
-    def _normalize_and_save_npz(self, nii_path, npz_path):
+    def _normalize_and_save_npz(self, nii_path, npz_path, modality=None):
         """加载NIfTI，利用DICOM方向信息规范化并保存为NPZ"""
-        return normalize_and_save_npz_impl(nii_path, npz_path)
+        return normalize_and_save_npz_impl(nii_path, npz_path, modality=modality)
 
-    def _cache_metadata_for_series(self, series_dir, series_name, dicom_files, modality):
+    def _cache_metadata_for_series(self, series_dir, series_name, dicom_files, modality, preparsed=None):
         """缓存DICOM元数据，避免删除后无法提取标签"""
         try:
             if not dicom_files:
@@ -1245,7 +1748,8 @@ class DICOMDownloadClient:
                 dicom_files=dicom_files,
                 series_folder=series_name,
                 modality=modality,
-                read_all=read_all
+                read_all=read_all,
+                preparsed=preparsed
             )
             if not records:
                 records = [
@@ -1259,7 +1763,8 @@ class DICOMDownloadClient:
 
             sample_tags = None
             try:
-                sample_dcm = pydicom.dcmread(dicom_files[0], force=True)
+                # 样本文件只用于提取 sample_tags，无需解析像素数据及其他元素（结果按文件缓存）
+                sample_dcm = self._read_sample_header(dicom_files[0])
                 sample_tags = self._build_sample_tags(sample_dcm)
                 if not sample_tags.get('Modality'):
                     sample_tags['Modality'] = modality
@@ -1272,81 +1777,75 @@ class DICOMDownloadClient:
                 "records": records,
                 "sample_tags": sample_tags
             }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            write_json_cache(cache_path, payload)
         except Exception:
             return
 
-    def _collect_metadata_from_dicoms(self, dicom_files, series_folder, modality, read_all):
-        """从DICOM文件提取元数据（不含质控字段）"""
+    def _read_header_record(self, dicom_file, idx, series_folder, total, keyword_tags, header_tags=None, dcm=None):
+        """读取单个 DICOM 文件头并生成元数据记录（读取失败返回 None）；传入已解析的 dcm 时不再读文件。"""
+        try:
+            if dcm is None:
+                dcm = read_dicom_header(dicom_file, specific_tags=header_tags)
+            metadata = {
+                'SeriesFolder': series_folder,
+                'FileName': os.path.basename(dicom_file),
+                'FileIndex': idx + 1,
+                'TotalFilesInSeries': total
+            }
+            metadata.update(read_keyword_values(dcm, keyword_tags))
+            # 确保记录每张 2D 图像的 Rows/Columns 信息，供后续预览方向校正使用
+            try:
+                metadata['Rows'] = str(getattr(dcm, 'Rows', '') or '')
+                metadata['Columns'] = str(getattr(dcm, 'Columns', '') or '')
+            except Exception:
+                metadata['Rows'] = metadata.get('Rows', '')
+                metadata['Columns'] = metadata.get('Columns', '')
+            return metadata
+        except Exception:
+            return None
+
+    def _collect_metadata_from_dicoms(self, dicom_files, series_folder, modality, read_all, preparsed=None):
+        """从DICOM文件提取元数据（不含质控字段）；preparsed 中已有头信息的文件直接复用，不再读取。"""
         records = []
         try:
             if not dicom_files:
                 return records
 
-            current_keywords = self.get_keywords(modality)
+            keyword_tags = self.get_keyword_tags(modality)
+            header_tags = self.get_header_tags(modality)
 
             if read_all:
+                # 逐文件头读取是 I/O 密集型操作，使用线程池并发读取，按索引回填保持原有顺序
+                total = len(dicom_files)
+                preparsed = preparsed or {}
+                results: List[Optional[Dict]] = [None] * total
+                pending = []
                 for idx, dicom_file in enumerate(dicom_files):
-                    try:
-                        dcm = pydicom.dcmread(dicom_file, force=True, stop_before_pixels=True)
-                        metadata = {
-                            'SeriesFolder': series_folder,
-                            'FileName': os.path.basename(dicom_file),
-                            'FileIndex': idx + 1,
-                            'TotalFilesInSeries': len(dicom_files)
+                    dcm = preparsed.get(dicom_file)
+                    if dcm is not None:
+                        results[idx] = self._read_header_record(dicom_file, idx, series_folder, total,
+                                                                keyword_tags, dcm=dcm)
+                    else:
+                        pending.append((idx, dicom_file))
+                if pending:
+                    with ThreadPoolExecutor(max_workers=min(16, len(pending))) as executor:
+                        futures = {
+                            executor.submit(self._read_header_record, dicom_file, idx, series_folder, total, keyword_tags, header_tags): idx
+                            for idx, dicom_file in pending
                         }
-                        for keyword in current_keywords:
-                            try:
-                                value = getattr(dcm, keyword, None)
-                                if value is not None:
-                                    if hasattr(value, '__len__') and not isinstance(value, str):
-                                        if len(value) == 1:
-                                            value = value[0]
-                                        else:
-                                            value = str(value)
-                                    elif hasattr(value, 'value'):
-                                        value = value.value
-                                    metadata[keyword] = str(value)
-                                else:
-                                    metadata[keyword] = ""
-                            except Exception:
-                                metadata[keyword] = ""
-                        # 确保记录每张 2D 图像的 Rows/Columns 信息，供后续预览方向校正使用
-                        try:
-                            metadata['Rows'] = str(getattr(dcm, 'Rows', '') or '')
-                            metadata['Columns'] = str(getattr(dcm, 'Columns', '') or '')
-                        except Exception:
-                            metadata['Rows'] = metadata.get('Rows', '')
-                            metadata['Columns'] = metadata.get('Columns', '')
-                        records.append(metadata)
-                    except Exception:
-                        continue
+                        for future in as_completed(futures):
+                            results[futures[future]] = future.result()
+                records.extend(record for record in results if record is not None)
             else:
                 sample_file = dicom_files[0]
-                dcm = pydicom.dcmread(sample_file, force=True)
+                dcm = pydicom.dcmread(sample_file, force=True, stop_before_pixels=True, specific_tags=header_tags)
                 metadata = {
                     'SeriesFolder': series_folder,
                     'SampleFileName': os.path.basename(sample_file),
                     'TotalFilesInSeries': len(dicom_files),
                     'FilesReadForMetadata': 1
                 }
-                for keyword in current_keywords:
-                    try:
-                        value = getattr(dcm, keyword, None)
-                        if value is not None:
-                            if hasattr(value, '__len__') and not isinstance(value, str):
-                                if len(value) == 1:
-                                    value = value[0]
-                                else:
-                                    value = str(value)
-                            elif hasattr(value, 'value'):
-                                value = value.value
-                            metadata[keyword] = str(value)
-                        else:
-                            metadata[keyword] = ""
-                    except Exception:
-                        metadata[keyword] = ""
+                metadata.update(read_keyword_values(dcm, keyword_tags))
                 try:
                     metadata['Rows'] = str(getattr(dcm, 'Rows', '') or '')
                     metadata['Columns'] = str(getattr(dcm, 'Columns', '') or '')
@@ -1367,23 +1866,8 @@ class DICOMDownloadClient:
             'FilesReadForMetadata': 1,
             'Modality': modality
         }
-        current_keywords = self.get_keywords(modality)
-        for keyword in current_keywords:
-            try:
-                value = getattr(sample_dcm, keyword, None)
-                if value is not None:
-                    if hasattr(value, '__len__') and not isinstance(value, str):
-                        if len(value) == 1:
-                            value = value[0]
-                        else:
-                            value = str(value)
-                    elif hasattr(value, 'value'):
-                        value = value.value
-                    metadata[keyword] = str(value)
-                else:
-                    metadata[keyword] = ""
-            except Exception:
-                metadata[keyword] = ""
+        keyword_tags = self.get_keyword_tags(modality)
+        metadata.update(read_keyword_values(sample_dcm, keyword_tags))
         return metadata
 
     def _get_series_sample_dicom(self, series_dir):
@@ -1395,15 +1879,24 @@ class DICOMDownloadClient:
                 sample_dcm = SimpleNamespace(**sample_tags)
                 return sample_dcm, modality
 
-            dicom_files = []
-            for file in os.listdir(series_dir):
-                filepath = os.path.join(series_dir, file)
-                if os.path.isfile(filepath) and self._is_dicom_file(filepath):
-                    dicom_files.append(filepath)
-            if not dicom_files:
+            # DirEntry 自带文件类型，无需逐个 stat；建堆 O(N) 后按路径从小到大弹出，
+            # 只探测到第一个 DICOM 为止，不必整表排序
+            with os.scandir(series_dir) as it:
+                candidates = [entry.path for entry in it if entry.is_file(follow_symlinks=False)]
+            heapq.heapify(candidates)
+            sample_file = None
+            while candidates:
+                path = heapq.heappop(candidates)
+                if self._is_dicom_file(path):
+                    sample_file = path
+                    break
+            if sample_file is None:
                 return None, ''
-            dicom_files.sort()
-            dcm = pydicom.dcmread(dicom_files[0], force=True)
+            # 样本仅用于标签信息：只解析所需标签，不读取像素数据
+            dcm = pydicom.dcmread(
+                sample_file, force=True, stop_before_pixels=True,
+                specific_tags=self._get_sample_header_tags()
+            )
             modality = getattr(dcm, 'Modality', '')
             return dcm, modality
         except Exception:
@@ -1482,13 +1975,21 @@ class DICOMDownloadClient:
     def _get_converted_files(self, series_path):
         """获取转换后的NPZ/NIfTI文件列表，优先NPZ"""
         try:
-            npz_files = sorted([f for f in os.listdir(series_path) if f.endswith('.npz')])
+            # 一次 scandir 同时收集两种格式，避免重复列目录
+            npz_files = []
+            nifti_files = []
+            with os.scandir(series_path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith('.npz'):
+                        npz_files.append(entry.path)
+                    elif name.endswith(('.nii.gz', '.nii')):
+                        nifti_files.append(entry.path)
             if npz_files:
-                return [os.path.join(series_path, f) for f in npz_files], 'npz'
+                return sorted(npz_files), 'npz'
 
-            nifti_files = sorted([f for f in os.listdir(series_path) if f.endswith(('.nii.gz', '.nii'))])
             if nifti_files:
-                return [os.path.join(series_path, f) for f in nifti_files], 'nifti'
+                return sorted(nifti_files), 'nifti'
 
             return [], None
         except Exception:
@@ -1503,26 +2004,30 @@ class DICOMDownloadClient:
         """使用Python库转换DICOM到NIfTI"""
         return convert_with_python_libs_impl(self, series_dir, series_name)
     
-    def extract_dicom_metadata(self, organized_dir, output_excel=None):
+    def extract_dicom_metadata(self, organized_dir, output_excel=None, records_ready=None):
         return extract_dicom_metadata_impl(
             organized_dir=organized_dir,
             output_excel=output_excel,
+            records_ready=records_ready,
             get_keywords=self.get_keywords,
             get_converted_files=self._get_converted_files,
             assess_converted_file_quality=self._assess_converted_file_quality,
             assess_series_quality_converted=self._assess_series_quality_converted,
-            append_mr_cleaned_sheet=self._append_mr_cleaned_sheet
+            build_mr_cleaned_df=self._build_mr_cleaned_df
         )
 
-    def _append_mr_cleaned_sheet(self, df: pd.DataFrame, output_excel: str) -> None:
-        """对 MR 记录做治理/规范化，并写回到同一个 Excel 的 MR_Cleaned sheet。"""
+    def _build_mr_cleaned_df(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """对 MR 记录做治理/规范化，返回用于 MR_Cleaned sheet 的 DataFrame（无 MR 或失败时返回 None）。"""
         try:
             if df is None or df.empty or 'Modality' not in df.columns:
-                return
+                return None
 
-            mr_df = df[df['Modality'].astype(str).str.upper() == 'MR'].copy()
+            # 直接在原列上做字符串比较（非字符串值视为非 MR），不再整列 astype(str)；
+            # process_mri_dataframe 内部会自行 copy，这里无需再复制一份
+            mask = df['Modality'].str.upper().eq('MR')
+            mr_df = df.loc[mask]
             if mr_df.empty:
-                return
+                return None
 
             print(f"\n🔬 MR_clean: processing {len(mr_df)} MR records...")
 
@@ -1535,17 +2040,10 @@ class DICOMDownloadClient:
                 # fallback for older MR_clean signature
                 cleaned_df = process_mri_dataframe(mr_df)
 
-            with pd.ExcelWriter(
-                output_excel,
-                engine='openpyxl',
-                mode='a',
-                if_sheet_exists='replace',
-            ) as writer:
-                cleaned_df.to_excel(writer, sheet_name='MR_Cleaned', index=False)
-
-            print("✅ MR_clean: MR_Cleaned sheet written.")
+            return cleaned_df
         except Exception as e:
             print(f"⚠️  MR_clean skipped/failed: {e}")
+            return None
 
     def process_upload_workflow(self, zip_path, base_output_dir, options=None):
         """上传ZIP流程：extract -> organize -> convert -> metadata。"""
@@ -1634,7 +2132,6 @@ class DICOMDownloadClient:
         # 步骤1: 下载DICOM文件
         logger.info(f"\n📥 Step 1: Download DICOM files")
 
-        download_dir_holder = {'path': None}
         # allow configuring pending-series limit to apply backpressure when conversion is slow
         try:
             max_pending = int(os.getenv('MAX_PENDING_SERIES', '4'))
@@ -1642,32 +2139,6 @@ class DICOMDownloadClient:
                 max_pending = 4
         except Exception:
             max_pending = 4
-        series_queue = Queue(maxsize=max_pending)
-        series_info = {}
-        series_lock = threading.Lock()
-        download_done = threading.Event()
-
-        # P2: 队列看门狗，防止死锁
-        watchdog = QueueWatchdog(series_queue, timeout=300.0)
-
-        def _on_series_downloaded(series_dir, series_meta):
-            series_folder = os.path.basename(series_dir)
-            series_queue.put((series_dir, series_folder))
-            watchdog.update_activity()  # P2: 更新看门狗活动
-
-        def _download_worker():
-            try:
-                download_path = self.download_study(
-                    accession_number,
-                    base_output_dir,
-                    on_series_downloaded=_on_series_downloaded,
-                    modality_filter=modality_filter,
-                    min_series_files=min_series_files,
-                    exclude_derived=exclude_derived
-                )
-                download_dir_holder['path'] = download_path
-            finally:
-                download_done.set()
 
         # organize worker: multiple workers supported to convert concurrently
         try:
@@ -1677,62 +2148,61 @@ class DICOMDownloadClient:
         except Exception:
             num_converters = 2
 
-        def _organize_worker(fmt):
-            watchdog.update_activity()  # P2: 更新看门狗活动
-            while True:
-                try:
-                    # P2: 使用超时获取，避免永久阻塞
-                    item = series_queue.get(timeout=60.0)
-                except Empty:
-                    logger.warning("⏱️  Organize worker: queue empty timeout, checking status...")
-                    if download_done.is_set():
-                        logger.info("   Download done, worker exiting")
-                        break
-                    continue
+        series_info = {}
+        # 排队 max_pending 个 + 正在转换 num_converters 个；名额用尽时阻塞下载回调形成背压
+        pending_slots = threading.BoundedSemaphore(max_pending + num_converters)
+        series_futures = []
 
-                if item is None:
-                    series_queue.task_done()
-                    break
-                series_dir, series_folder = item
-                try:
-                    info = self._process_single_series(series_dir, series_folder, fmt, min_series_files=min_series_files)
-                    if info:
-                        with series_lock:
-                            series_info[series_folder] = info
-                    watchdog.update_activity()  # P2: 更新看门狗活动
-                except Exception as e:
-                    logger.warning(f"⚠️  Series organize failed: {series_folder}: {e}")
-                finally:
-                    series_queue.task_done()
+        # P2: 看门狗，长时间无下载/转换进展时告警
+        watchdog = QueueWatchdog(timeout=300.0)
+
+        def _convert_series(series_dir, series_folder, fmt):
+            try:
+                info = self._process_single_series(series_dir, series_folder, fmt, min_series_files=min_series_files)
+                watchdog.update_activity()  # P2: 更新看门狗活动
+                return info
+            except Exception as e:
+                logger.warning(f"⚠️  Series organize failed: {series_folder}: {e}")
+                return None
+            finally:
+                pending_slots.release()
 
         if parallel_pipeline and auto_organize:
             # P0: 原地处理 - 不再创建 organized 子目录
             # P2: 启动看门狗
             watchdog.start()
+            download_dir = None
+            try:
+                # 转换任务直接提交到线程池；with 退出时 shutdown(wait=True) 等待全部转换完成，无需哨兵
+                with ThreadPoolExecutor(max_workers=num_converters, thread_name_prefix='organize') as converter_pool:
+                    def _on_series_downloaded(series_dir, series_meta):
+                        series_folder = os.path.basename(series_dir)
+                        pending_slots.acquire()
+                        watchdog.update_activity()  # P2: 更新看门狗活动
+                        future = converter_pool.submit(_convert_series, series_dir, series_folder, output_format)
+                        series_futures.append((series_folder, future))
+
+                    try:
+                        download_dir = self.download_study(
+                            accession_number,
+                            base_output_dir,
+                            on_series_downloaded=_on_series_downloaded,
+                            modality_filter=modality_filter,
+                            min_series_files=min_series_files,
+                            exclude_derived=exclude_derived
+                        )
+                    except Exception as e:
+                        logger.error(f"❌ Download error: {e}")
+            finally:
+                # P2: 停止看门狗
+                watchdog.stop()
+
+            # 结果只在当前线程汇总，无需加锁
+            for series_folder, future in series_futures:
+                info = future.result()
+                if info:
+                    series_info[series_folder] = info
 
-            download_thread = threading.Thread(target=_download_worker, daemon=True)
-            # spawn multiple organizers
-            organizer_threads = []
-            for _ in range(num_converters):
-                t = threading.Thread(target=_organize_worker, args=(output_format,), daemon=True)
-                t.start()
-                organizer_threads.append(t)
-
-            download_thread.start()
-
-            # 等待下载完成
-            download_thread.join()
-            # 通知整理线程退出（放入与 worker 数相同的哨兵）
-            for _ in range(len(organizer_threads)):
-                series_queue.put(None)
-            series_queue.join()
-            for t in organizer_threads:
-                t.join()
-
-            # P2: 停止看门狗
-            watchdog.stop()
-
-            download_dir = download_dir_holder['path']
             if not download_dir:
                 logger.error("❌ Download failed, workflow terminated")
                 return None
@@ -1785,27 +2255,19 @@ class DICOMDownloadClient:
                 results['series_info'] = series_info
 
             if auto_metadata:
-                # 步骤3: 提取元数据 (独立线程)
+                # 步骤3: 提取元数据
                 logger.info(f"\n📊 Step 3: Extract DICOM metadata")
                 excel_name = f"dicom_metadata_{accession_number}.xlsx"
                 excel_path = os.path.join(organized_dir, excel_name)
 
-                excel_holder = {'path': None}
-
-                def _metadata_worker():
-                    try:
-                        excel_holder['path'] = self.extract_dicom_metadata(organized_dir, output_excel=excel_path)
-                    except Exception as e:
-                        logger.error(f"❌ Metadata extraction error: {e}")
-                        import traceback
-                        logger.error(f"Traceback: {traceback.format_exc()}")
-                        excel_holder['path'] = None
-
-                metadata_thread = threading.Thread(target=_metadata_worker, daemon=True)
-                metadata_thread.start()
-                metadata_thread.join()
-
-                excel_file = excel_holder['path']
+                # 直接在当前线程执行：原先起线程后立即 join，并无并发收益；并发在函数内部按序列展开
+                try:
+                    excel_file = self.extract_dicom_metadata(organized_dir, output_excel=excel_path)
+                except Exception as e:
+                    logger.error(f"❌ Metadata extraction error: {e}")
+                    import traceback
+                    logger.error(f"Traceback: {traceback.format_exc()}")
+                    excel_file = None
                 if excel_file:
                     results['excel_file'] = excel_file
                     results['success'] = True
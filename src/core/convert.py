@@ -19,20 +19,30 @@ DICOM 转换模块。
 
 from __future__ import annotations
 
+import csv
+import gc
 import logging
 import os
-import json
 import shutil
 import subprocess
 import sys
+import tempfile
 import threading
 import time
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import nibabel as nib
 import numpy as np
 import pydicom
-from pydicom.dataset import FileDataset
+from pydicom.dataset import Dataset, FileDataset
+from pydicom.datadict import tag_for_keyword
+
+from src.utils.json_cache import read_json_cache, write_json_cache
 
 if TYPE_CHECKING:
     from src.client.unified import DICOMDownloadClient as DicomClient
@@ -44,6 +54,201 @@ logger = logging.getLogger('DICOMApp')
 dcm2niix_global_lock = threading.Lock()
 
 
+def _dcm2niix_guard():
+    """dcm2niix 调用的并发保护：仅 Windows 需要串行，其他平台多个 dcm2niix 进程可安全并发。"""
+    if sys.platform.startswith('win'):
+        return dcm2niix_global_lock
+    return nullcontext()
+
+
+@lru_cache(maxsize=1)
+def _resolve_dcm2niix() -> Optional[str]:
+    """
+    解析 dcm2niix 可执行文件并探测是否可用（每个进程只执行一次）。
+
+    优先使用项目根目录下捆绑的版本；返回可执行命令，不可用时返回 None。
+    """
+    # Choose dcm2niix command based on platform. Prefer bundled binaries
+    # located at the project root when available.
+    dcm2niix_cmd = 'dcm2niix'
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if sys.platform.startswith('linux'):
+        bundled = os.path.join(base_dir, 'dcm2niix')
+        if os.path.exists(bundled):
+            if not os.access(bundled, os.X_OK):
+                try:
+                    os.chmod(bundled, 0o755)
+                except Exception:
+                    pass
+            if os.access(bundled, os.X_OK):
+                dcm2niix_cmd = bundled
+    elif sys.platform.startswith('win'):
+        bundled = os.path.join(base_dir, 'dcm2niix.exe')
+        if os.path.exists(bundled):
+            dcm2niix_cmd = bundled
+
+    try:
+        subprocess.run([dcm2niix_cmd, '-h'], capture_output=True, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError, OSError):
+        logger.warning("dcm2niix not found or not executable: %s", dcm2niix_cmd)
+        return None
+    return dcm2niix_cmd
+
+
+def _run_dcm2niix(cmd: List[str], timeout: int, capture: bool = False) -> subprocess.CompletedProcess:
+    """
+    运行 dcm2niix。
+
+    正常情况下输出无用，直接丢弃到 DEVNULL，省去管道缓冲与解码；
+    capture=True（重试的最后一次）时才捕获 stdout/stderr 用于诊断日志。
+    """
+    if capture:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+
+
+def _dcm2niix_jobs(file_count: int) -> int:
+    """DR/MG/DX 逐文件转换时同时运行的 dcm2niix 进程数（环境变量 DCM2NIIX_JOBS，默认 CPU 核数）。"""
+    if sys.platform.startswith('win'):
+        return 1
+    try:
+        jobs = int(os.getenv('DCM2NIIX_JOBS', '0'))
+    except (TypeError, ValueError):
+        jobs = 0
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, file_count))
+
+# pigz（多线程 gzip）可用时用于压缩 .nii.gz 输出，缺失时回退到 nibabel 单线程 zlib
+_PIGZ_CMD = shutil.which('pigz')
+
+
+def _save_nifti(nifti_img: Any, output_path: str) -> None:
+    """
+    保存 NIfTI 图像。
+
+    输出为 .nii.gz 且系统安装了 pigz 时，先写出未压缩的 .nii，再用 pigz
+    多线程压缩（-1 与 nibabel 默认压缩级别一致）；否则直接使用 nib.save。
+    """
+    if _PIGZ_CMD and output_path.endswith('.nii.gz'):
+        raw_path = output_path[:-3]
+        try:
+            nib.save(nifti_img, raw_path)
+        except Exception as e:
+            logger.warning("Writing raw NIfTI failed for %s, falling back to nibabel: %s", output_path, e)
+        else:
+            if _pigz_compress(raw_path):
+                return
+        if os.path.exists(raw_path):
+            try:
+                os.remove(raw_path)
+            except Exception:
+                pass
+    nib.save(nifti_img, output_path)
+
+
+def _nifti_compress_enabled() -> bool:
+    """
+    NIfTI 输出是否 gzip 压缩（环境变量 NIFTI_COMPRESS，默认开启）。
+
+    关闭后 dcm2niix 与 Python 路径均输出未压缩 .nii：文件更大，但省去整卷压缩，
+    适合本地高速存储或仅作后续处理缓存的场景。
+    """
+    try:
+        return os.getenv('NIFTI_COMPRESS', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+    except Exception:
+        return True
+
+
+def _pigz_compress(raw_path: str) -> bool:
+    """
+    用 pigz 多线程将 .nii 压缩为 .nii.gz（-1 与 nibabel 默认压缩级别一致），成功后原文件被替换。
+
+    返回:
+        是否压缩成功；pigz 不可用或失败时返回 False，原 .nii 保持不变
+    """
+    if not _PIGZ_CMD:
+        return False
+    try:
+        subprocess.run(
+            [_PIGZ_CMD, '-1', '-f', '-p', str(os.cpu_count() or 1), raw_path],
+            capture_output=True,
+            check=True
+        )
+        return True
+    except Exception as e:
+        logger.warning("pigz compression failed for %s: %s", raw_path, e)
+        return False
+
+
+def _save_converted_image(
+    nifti_img: Any,
+    series_dir: str,
+    base_name: str,
+    output_format: str = 'nifti',
+    modality: Optional[str] = None,
+    compressed: bool = True
+) -> str:
+    """
+    按输出格式保存 Python 转换路径得到的图像，返回输出文件名。
+
+    output_format 为 'npz' 时直接在内存中归一化并写出 NPZ，不落地中间 NIfTI；
+    否则写出 .nii.gz（compressed=False 或 NIFTI_COMPRESS=false 时为 .nii）。
+    """
+    if output_format == 'npz':
+        filename = f"{base_name}.npz"
+        normalize_and_save_npz_from_image(nifti_img, os.path.join(series_dir, filename), modality=modality)
+        return filename
+    filename = f"{base_name}.nii.gz" if compressed and _nifti_compress_enabled() else f"{base_name}.nii"
+    _save_nifti(nifti_img, os.path.join(series_dir, filename))
+    return filename
+
+
+def _safe_unlink(path: str) -> None:
+    """删除文件，忽略不存在或无权限等错误。"""
+    try:
+        os.remove(path)
+    except Exception:
+        pass
+
+
+def _remove_files(paths: List[str]) -> None:
+    """
+    批量删除转换后的源 DICOM 文件。
+
+    unlink 在网络/FUSE 文件系统上受往返延迟限制且释放 GIL，文件较多时用线程池并发删除。
+    """
+    if len(paths) <= 8:
+        for path in paths:
+            _safe_unlink(path)
+        return
+    with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+        list(executor.map(_safe_unlink, paths))
+
+
+# 读取含像素的数据集时，超过该大小的元素（像素数据、私有大块、Overlay 等）延迟到访问时再读
+_DEFER_SIZE = '16 KB'
+
+# conversion_map 条目记录的 DICOM 标签；逐文件转换时只解析这些标签
+_CONVERSION_ENTRY_TAGS = [
+    'Rows', 'Columns', 'SOPInstanceUID', 'InstanceNumber',
+    'PhotometricInterpretation', 'ImageLaterality',
+    'WindowCenter', 'WindowWidth', 'RescaleSlope', 'RescaleIntercept'
+]
+# 传给 dcmread(specific_tags=...) 的标签号在模块加载时解析一次，逐文件读取时不再按关键字查字典
+_CONVERSION_ENTRY_TAG_NUMBERS = [tag_for_keyword(k) for k in _CONVERSION_ENTRY_TAGS]
+_MODALITY_TAG_NUMBERS = [tag_for_keyword('Modality')]
+_SLICE_POSITION_TAG_NUMBERS = [tag_for_keyword('ImagePositionPatient'), tag_for_keyword('SliceLocation')]
+# 投影序列合并时探测尺寸、构建仿射与写 per_file_index.csv 所需的标签
+_PROJECTION_MERGE_TAG_NUMBERS = [
+    tag_for_keyword(k) for k in (
+        'Modality', 'Rows', 'Columns', 'SamplesPerPixel', 'NumberOfFrames',
+        'PixelSpacing', 'ImagerPixelSpacing', 'ImageOrientationPatient', 'ImagePositionPatient',
+        'SOPInstanceUID', 'InstanceNumber'
+    )
+]
+
+
 def _build_conversion_entry(output_file: str, dcm: FileDataset, file_index: Optional[int] = None, source_file: Optional[str] = None) -> Dict[str, str]:
     entry: Dict[str, str] = {
         'output_file': output_file
@@ -53,11 +258,7 @@ def _build_conversion_entry(output_file: str, dcm: FileDataset, file_index: Opti
     if source_file:
         entry['SourceFile'] = str(source_file)
 
-    for attr in [
-        'Rows', 'Columns', 'SOPInstanceUID', 'InstanceNumber',
-        'PhotometricInterpretation', 'ImageLaterality',
-        'WindowCenter', 'WindowWidth', 'RescaleSlope', 'RescaleIntercept'
-    ]:
+    for attr in _CONVERSION_ENTRY_TAGS:
         try:
             value = getattr(dcm, attr, None)
             if value is not None:
@@ -67,6 +268,25 @@ def _build_conversion_entry(output_file: str, dcm: FileDataset, file_index: Opti
     return entry
 
 
+def _missing_cache_header_tags(client: "DicomClient", series_dir: str, modality: str) -> Optional[List[Any]]:
+    """序列目录尚无元数据缓存时返回元数据记录所需的标签（供逐文件转换顺带解析），已有缓存时返回 None。"""
+    if os.path.exists(os.path.join(series_dir, "dicom_metadata_cache.json")):
+        return None
+    try:
+        return list(client.get_header_tags(modality))
+    except Exception:
+        return None
+
+
+def _header_subset(dcm: Dataset, header_tags: List[Any]) -> Dataset:
+    """从已读取的数据集中复制指定标签的元素，得到只含头信息的轻量数据集（不持有像素数据）。"""
+    header = Dataset()
+    for tag in header_tags:
+        if tag in dcm:
+            header.add(dcm[tag])
+    return header
+
+
 def _write_conversion_map(series_dir: str, entries: List[Dict[str, str]]) -> None:
     if not entries:
         return
@@ -74,8 +294,7 @@ def _write_conversion_map(series_dir: str, entries: List[Dict[str, str]]) -> Non
     cache: Dict[str, object] = {}
     if os.path.exists(cache_path):
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache = json.load(f) or {}
+            cache = read_json_cache(cache_path) or {}
         except Exception:
             cache = {}
 
@@ -90,8 +309,7 @@ def _write_conversion_map(series_dir: str, entries: List[Dict[str, str]]) -> Non
 
     cache['conversion_map'] = conversion_map
     try:
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
+        write_json_cache(cache_path, cache)
     except Exception:
         return
 
@@ -113,7 +331,13 @@ def apply_rescale(pixel_data: np.ndarray, dcm: FileDataset) -> np.ndarray:
     try:
         slope = float(getattr(dcm, 'RescaleSlope', 1.0))
         intercept = float(getattr(dcm, 'RescaleIntercept', 0.0))
-        return pixel_data.astype(np.float32) * slope + intercept
+        # 仅转换一次 float32（必要的拷贝，不改动调用方数组），乘加原地完成，不再分配临时整幅数组
+        out = pixel_data.astype(np.float32)
+        if slope != 1.0:
+            np.multiply(out, slope, out=out)
+        if intercept != 0.0:
+            np.add(out, intercept, out=out)
+        return out
     except Exception:
         return pixel_data.astype(np.float32)
 
@@ -143,6 +367,229 @@ def apply_photometric(pixel_data: np.ndarray, dcm: FileDataset) -> np.ndarray:
     return pixel_data
 
 
+def rescale_and_photometric(
+    pixel_data: np.ndarray,
+    dcm: FileDataset,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    一次完成 apply_rescale + apply_photometric，结果与依次调用两者相同。
+
+    只做一次 float32 转换（或直接写入调用方提供的 out 缓冲区，如体数据的某个切片），
+    其后的乘、加、反转均通过 out= 原地完成，不再为每一步分配新的整幅数组。
+
+    参数:
+        pixel_data: 原始像素数据数组
+        dcm: pydicom Dataset 对象
+        out: 可选的 float32 输出数组（形状与 pixel_data 相同）
+
+    返回:
+        重缩放并处理光度解释后的 float32 像素数据（提供 out 时即为 out）
+    """
+    if out is None:
+        out = pixel_data.astype(np.float32)
+    else:
+        np.copyto(out, pixel_data, casting='unsafe')
+    try:
+        slope = float(getattr(dcm, 'RescaleSlope', 1.0))
+        intercept = float(getattr(dcm, 'RescaleIntercept', 0.0))
+        if slope != 1.0:
+            np.multiply(out, slope, out=out)
+        if intercept != 0.0:
+            np.add(out, intercept, out=out)
+    except Exception:
+        pass
+    try:
+        photometric = str(getattr(dcm, 'PhotometricInterpretation', '')).upper()
+        if photometric == 'MONOCHROME1':
+            max_val = np.nanmax(out)
+            np.subtract(max_val, out, out=out)
+    except Exception:
+        pass
+    return out
+
+
+_PREFETCH_DONE = object()
+
+
+def _prefetch_ordered(func: Callable[[Any], Any], items: Iterable[Any], depth: int = 4) -> Iterator[Any]:
+    """
+    按输入顺序逐个产出 func(item)，后台线程最多提前处理 depth 项。
+
+    用于把 DICOM 读取/解码与主线程的整卷写入重叠；提前量有上限，内存只多占 depth 张切片。
+    """
+    items_iter = iter(items)
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        pending: Deque[Future] = deque()
+        for item in items_iter:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= depth:
+                break
+        while pending:
+            future = pending.popleft()
+            next_item = next(items_iter, _PREFETCH_DONE)
+            if next_item is not _PREFETCH_DONE:
+                pending.append(executor.submit(func, next_item))
+            yield future.result()
+
+
+def _slice_decode_workers() -> int:
+    """序列切片并发解码线程数（同时也是预读深度）：CPU 核数，上限 8，避免预读过多切片占用内存。"""
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _read_series_slice(filepath: str) -> Optional[Tuple[np.ndarray, Tuple[float, float, bool]]]:
+    """读取并解码单张切片，返回 (pixel_array, 重缩放参数)；文件不可读或无像素数据时返回 None。"""
+    try:
+        dcm = pydicom.dcmread(filepath, force=True, defer_size=_DEFER_SIZE)
+    except Exception:
+        return None
+    if not _has_pixel_data(dcm):
+        return None
+    return dcm.pixel_array, _rescale_params(dcm)
+
+
+def _volume_memmap_threshold() -> int:
+    """体数据超过该字节数时改用磁盘 memmap 承载（环境变量 PYTHON_VOLUME_MEMMAP_MB，默认 1024，0 表示关闭）。"""
+    try:
+        mb = int(os.getenv('PYTHON_VOLUME_MEMMAP_MB', '1024'))
+    except (TypeError, ValueError):
+        mb = 1024
+    return max(0, mb) * 1024 * 1024
+
+
+def _allocate_volume(shape: Tuple[int, ...], spill_dir: str) -> Tuple[np.ndarray, Optional[str]]:
+    """
+    分配 float32 体数据缓冲区。
+
+    超过 PYTHON_VOLUME_MEMMAP_MB 的大体积改为序列目录下临时文件支撑的 np.memmap，
+    由操作系统页缓存按需换出，避免超大序列在内存中整卷驻留导致 OOM。
+
+    返回:
+        (体数据数组, 临时文件路径)；使用内存数组时路径为 None
+    """
+    threshold = _volume_memmap_threshold()
+    nbytes = int(np.prod(shape, dtype=np.int64)) * np.dtype(np.float32).itemsize
+    if threshold and nbytes > threshold:
+        try:
+            fd, spill_path = tempfile.mkstemp(prefix='.volume_', suffix='.tmp', dir=spill_dir)
+            os.close(fd)
+            logger.info("Volume %s (%.0f MB) exceeds memmap threshold, spilling to %s",
+                        shape, nbytes / 1024 / 1024, spill_path)
+            return np.memmap(spill_path, dtype=np.float32, mode='w+', shape=shape), spill_path
+        except Exception as e:
+            logger.warning("Creating volume memmap failed, using in-memory array: %s", e)
+    return np.empty(shape, dtype=np.float32), None
+
+
+def _discard_volume_spill(spill_path: str) -> None:
+    """删除 memmap 临时文件（调用前应已释放对 memmap 的引用，Windows 下才能删除）。"""
+    gc.collect()
+    _safe_unlink(spill_path)
+
+
+def _has_pixel_data(dcm: FileDataset) -> bool:
+    """
+    按元素是否存在判断数据集有无像素数据。
+
+    hasattr(dcm, 'pixel_array') 会触发整幅解码（JPEG2000 等压缩语法代价很高），
+    仅为判断存在性时只需检查像素数据元素。
+    """
+    return 'PixelData' in dcm or 'FloatPixelData' in dcm or 'DoubleFloatPixelData' in dcm
+
+
+def _rescale_params(dcm: FileDataset) -> Tuple[float, float, bool]:
+    """读取单张切片的 (RescaleSlope, RescaleIntercept, 是否 MONOCHROME1)，解析失败时按不缩放处理。"""
+    try:
+        slope = float(getattr(dcm, 'RescaleSlope', 1.0))
+        intercept = float(getattr(dcm, 'RescaleIntercept', 0.0))
+    except Exception:
+        slope, intercept = 1.0, 0.0
+    try:
+        inverted = str(getattr(dcm, 'PhotometricInterpretation', '')).upper() == 'MONOCHROME1'
+    except Exception:
+        inverted = False
+    return slope, intercept, inverted
+
+
+def _rescale_volume_inplace(volume: np.ndarray, params: List[Tuple[float, float, bool]]) -> None:
+    """
+    对 (Rows, Columns, Slices[, ...]) 的 float32 体数据整卷完成重缩放与光度反转，结果与逐张调用
+    rescale_and_photometric 相同。
+
+    各切片参数一致时（绝大多数序列）每步只是一次整卷原地运算；参数不一致时按切片维广播。
+    MONOCHROME1 反转仍按每张切片各自的最大值计算。
+    """
+    if not params:
+        return
+    slopes = np.array([p[0] for p in params], dtype=np.float64)
+    intercepts = np.array([p[1] for p in params], dtype=np.float64)
+    inverted = np.array([p[2] for p in params], dtype=bool)
+    # 按切片维（第 2 轴）广播的形状
+    per_slice_shape = (1, 1, -1) + (1,) * (volume.ndim - 3)
+
+    if np.any(slopes != 1.0):
+        if np.all(slopes == slopes[0]):
+            np.multiply(volume, float(slopes[0]), out=volume)
+        else:
+            np.multiply(volume, slopes.astype(np.float32).reshape(per_slice_shape), out=volume)
+    if np.any(intercepts != 0.0):
+        if np.all(intercepts == intercepts[0]):
+            np.add(volume, float(intercepts[0]), out=volume)
+        else:
+            np.add(volume, intercepts.astype(np.float32).reshape(per_slice_shape), out=volume)
+
+    if inverted.all():
+        reduce_axes = tuple(axis for axis in range(volume.ndim) if axis != 2)
+        np.subtract(np.nanmax(volume, axis=reduce_axes, keepdims=True), volume, out=volume)
+    elif inverted.any():
+        for idx in np.flatnonzero(inverted):
+            slice_view = volume[:, :, idx]
+            np.subtract(np.nanmax(slice_view), slice_view, out=slice_view)
+
+
+def _first_dicom_number(value: Any) -> Optional[float]:
+    """取 DICOM 数值（可能为多值）的第一个值，无法解析时返回 None。"""
+    if value is None:
+        return None
+    try:
+        if not isinstance(value, (str, bytes)) and hasattr(value, '__getitem__'):
+            value = value[0]
+        return float(value)
+    except Exception:
+        return None
+
+
+def window_to_uint8(pixel_data: np.ndarray, dcm: FileDataset) -> np.ndarray:
+    """
+    重缩放后按 WindowCenter/WindowWidth 线性映射为 uint8（缺少窗口信息时按数据最小/最大值）。
+
+    MONOCHROME1 在 uint8 上以 255 - x 反转，与先反转再取窗等价；
+    数据量为 float32 的 1/4，写盘与压缩相应减少。乘减裁剪均原地完成。
+    """
+    out = apply_rescale(pixel_data, dcm)
+    center = _first_dicom_number(getattr(dcm, 'WindowCenter', None))
+    width = _first_dicom_number(getattr(dcm, 'WindowWidth', None))
+    if center is not None and width is not None and width > 0:
+        low, span = center - width / 2.0, width
+    else:
+        low = float(np.nanmin(out)) if out.size else 0.0
+        span = (float(np.nanmax(out)) - low) if out.size else 0.0
+    if not np.isfinite(low) or not np.isfinite(span) or span <= 0:
+        return np.zeros(out.shape, dtype=np.uint8)
+    np.subtract(out, low, out=out)
+    np.multiply(out, 255.0 / span, out=out)
+    np.clip(out, 0.0, 255.0, out=out)
+    np.rint(out, out=out)
+    result = out.astype(np.uint8)
+    try:
+        if str(getattr(dcm, 'PhotometricInterpretation', '')).upper() == 'MONOCHROME1':
+            np.subtract(255, result, out=result)
+    except Exception:
+        pass
+    return result
+
+
 def build_affine_from_dicom(
     dcm: FileDataset,
     slice_spacing: float = 1.0,
@@ -180,27 +627,27 @@ def build_affine_from_dicom(
                 # 对于 3D 图像，仍使用单位矩阵作为最后的回退
                 return np.eye(4, dtype=np.float64)
 
-        row_cosine = np.array([float(i) for i in iop[:3]], dtype=np.float64)
-        col_cosine = np.array([float(i) for i in iop[3:6]], dtype=np.float64)
+        row_cosine = np.asarray(iop[:3], dtype=np.float64)
+        col_cosine = np.asarray(iop[3:6], dtype=np.float64)
         if slice_cosines is None:
             slice_cosines = np.cross(row_cosine, col_cosine)
 
         row_spacing = float(pixel_spacing[0])
         col_spacing = float(pixel_spacing[1])
 
-        affine_lps = np.eye(4, dtype=np.float64)
+        affine = np.eye(4, dtype=np.float64)
         # DICOM pixel_array is (Rows, Columns) stacked as (Rows, Columns, Slices)
         # dim 0 = Rows (vertical, top to bottom) = -Y in patient coordinates (since row 0 is top)
         # dim 1 = Columns (horizontal, left to right) = X in patient coordinates
         # So: X axis = column direction, Y axis = -row direction
-        affine_lps[:3, 0] = col_cosine * col_spacing  # x-axis = column direction
-        affine_lps[:3, 1] = -row_cosine * row_spacing  # y-axis = negative row direction (flip vertical)
-        affine_lps[:3, 2] = slice_cosines * float(slice_spacing)
-        affine_lps[:3, 3] = np.array([float(i) for i in ipp], dtype=np.float64)
-
-        lps_to_ras = np.diag([-1.0, -1.0, 1.0, 1.0])
-        affine_ras = lps_to_ras @ affine_lps
-        return affine_ras
+        affine[:3, 0] = col_cosine * col_spacing  # x-axis = column direction
+        affine[:3, 1] = -row_cosine * row_spacing  # y-axis = negative row direction (flip vertical)
+        affine[:3, 2] = slice_cosines * float(slice_spacing)
+        affine[:3, 3] = np.asarray(ipp, dtype=np.float64)
+
+        # LPS -> RAS：等价于左乘 diag(-1, -1, 1, 1)，即前两行取反，无需矩阵乘法
+        affine[:2] *= -1.0
+        return affine
     except Exception as e:
         logger.warning("Failed to build affine from DICOM: %s, using fallback", e)
         # 尝试使用 2D 回退方案
@@ -279,25 +726,36 @@ def _safe_as_closest_canonical(img: Any) -> Any:
         return repaired_img
 
 
-def normalize_and_save_npz(nii_path: str, npz_path: str) -> None:
+def normalize_and_save_npz(nii_path: str, npz_path: str, modality: Optional[str] = None) -> None:
     """
     归一化并保存 NIfTI 数据为 NPZ 压缩格式。
 
     加载 NIfTI 文件，将其转换为标准方向（canonical），
     对数据在各轴上进行翻转，并重新排列维度顺序为 (Z, Y, X)，
-    最后以 float32 类型压缩保存为 NPZ 格式。
+    最后以 float32 类型压缩保存为 NPZ 格式。CT 数据（HU 均为整数且在 int16
+    范围内）改以 int16 无损保存，数据量减半、压缩更快（NPZ_CT_INT16=false 可关闭）。
 
     参数:
         nii_path: 输入 NIfTI 文件路径
         npz_path: 输出 NPZ 文件路径
+        modality: 可选，影像模态（为 CT 时尝试 int16 存储）
     """
     # 加载 NIfTI 文件，返回一个 Nifti1Image 对象（包含数据和头信息）
-    img = nib.load(nii_path)
+    normalize_and_save_npz_from_image(nib.load(nii_path), npz_path, modality=modality)
+
+
+def normalize_and_save_npz_from_image(img: Any, npz_path: str, modality: Optional[str] = None) -> None:
+    """
+    将内存中的 Nifti1Image 归一化为 (Z, Y, X) 并保存为 NPZ。
+
+    与 normalize_and_save_npz 的处理完全一致，供 Python 转换路径直接使用，
+    省去先写 .nii.gz 再读回的 gzip 压缩/解压与临时文件。
+    """
     # 将图像转换为最接近的标准方向（canonical），以统一轴向（通常为 RAS）
     # 对于 affine 不可分解的文件，先重建可分解 affine 再重试。
     img_canonical = _safe_as_closest_canonical(img)
-    # 从 Nifti 对象中获取数据数组（通常为 float64），形状如 (X, Y, Z[, T])
-    data = img_canonical.get_fdata()
+    # 从 Nifti 对象中获取数据数组，形状如 (X, Y, Z[, T])
+    data = _load_npz_source_array(img_canonical)
 
     if data.ndim < 3:
         raise ValueError(f"NIfTI data must be at least 3D, got shape={data.shape}")
@@ -313,8 +771,94 @@ def normalize_and_save_npz(nii_path: str, npz_path: str) -> None:
     transpose_axes = [2, 1, 0] + list(range(3, data.ndim))
     data = np.transpose(data, transpose_axes)
 
-    # 将数据转换为 float32（节省空间）并以压缩的 npz 格式写入磁盘
-    np.savez_compressed(npz_path, data=data.astype(np.float32))
+    # 翻转与转置都只是视图；写盘时按块迭代视图，不会生成重排后的整卷副本
+    # 以压缩的 npz 格式写入磁盘（CT 整数 HU 用 int16 无损保存）
+    _save_npz_compressed(npz_path, data=_npz_storage_array(_sequential_layout(data), modality))
+
+
+def _sequential_layout(data: np.ndarray) -> np.ndarray:
+    """
+    保证 (Z, Y, X[, ...]) 视图按 C 顺序遍历时最内层轴是连续内存。
+
+    nibabel 读出的数组通常为 Fortran 顺序，翻转+转置后最内层轴本就连续（步长 ±itemsize），
+    写盘时的顺序遍历即为顺序读，直接返回视图。否则（如重定向后得到 C 顺序数组）
+    按最外层逐片复制到连续缓冲区，每片内部一次完成转置，避免整卷跨步访问。
+    """
+    if data.ndim == 0 or abs(data.strides[-1]) == data.itemsize:
+        return data
+    out = np.empty(data.shape, dtype=data.dtype)
+    for idx in range(data.shape[0]):
+        out[idx] = data[idx]
+    return out
+
+
+def _load_npz_source_array(img: Any) -> np.ndarray:
+    """
+    读取 NIfTI 体数据用于 NPZ 输出，尽量避免整卷浮点化。
+
+    未缩放（slope=1, inter=0）的磁盘数据按存储类型读取（如 CT 的 int16），
+    比 get_fdata 少一份 float 整卷；带缩放的数据仍以 float32 读取。
+    """
+    dataobj = img.dataobj
+    if isinstance(dataobj, np.ndarray):
+        return dataobj
+    slope = getattr(dataobj, 'slope', None)
+    inter = getattr(dataobj, 'inter', None)
+    if slope is not None and inter is not None:
+        try:
+            if float(slope) == 1.0 and float(inter) == 0.0:
+                return np.asanyarray(dataobj)
+        except (TypeError, ValueError):
+            pass
+    return img.get_fdata(dtype=np.float32)
+
+
+def _npz_compress_level() -> int:
+    """NPZ 的 DEFLATE 压缩级别（环境变量 NPZ_COMPRESS_LEVEL，0-9，默认 1）。"""
+    try:
+        level = int(os.getenv('NPZ_COMPRESS_LEVEL', '1'))
+    except (TypeError, ValueError):
+        level = 1
+    return min(9, max(0, level))
+
+
+def _save_npz_compressed(npz_path: str, **arrays: np.ndarray) -> None:
+    """
+    以可调压缩级别写出标准 .npz（np.load 可直接读取）。
+
+    np.savez_compressed 固定使用 zlib 默认级别 6，大体积 CT 的压缩耗时远超其余步骤；
+    医学影像在级别 1 下压缩率相差很小而速度快数倍（与 pigz -1 / nibabel 默认一致）。
+    """
+    level = _npz_compress_level()
+    compression = zipfile.ZIP_DEFLATED if level > 0 else zipfile.ZIP_STORED
+    with zipfile.ZipFile(npz_path, mode='w', compression=compression, compresslevel=level or None,
+                         allowZip64=True) as zf:
+        for name, array in arrays.items():
+            with zf.open(f"{name}.npy", mode='w', force_zip64=True) as fp:
+                np.lib.format.write_array(fp, np.asanyarray(array), allow_pickle=False)
+
+
+def _npz_storage_array(data: np.ndarray, modality: Optional[str]) -> np.ndarray:
+    """选择 NPZ 存储数组：uint8 原样保留；CT 且可无损表示为 int16 时返回 int16，否则返回 float32。"""
+    if data.dtype == np.uint8:
+        # 窗口化后的投影图像（PROJECTION_UINT8）原样保存
+        return data
+    if str(modality or '').upper() == 'CT':
+        try:
+            enabled = os.getenv('NPZ_CT_INT16', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+        except Exception:
+            enabled = True
+        if enabled and data.size and np.issubdtype(data.dtype, np.integer):
+            # 整数数据只需检查取值范围
+            if -32768 <= int(data.min()) and int(data.max()) <= 32767:
+                return data.astype(np.int16, copy=False)
+        elif enabled and data.size and np.isfinite(data).all():
+            data_min, data_max = float(data.min()), float(data.max())
+            if -32768 <= data_min and data_max <= 32767:
+                as_int16 = data.astype(np.int16)
+                if np.array_equal(as_int16, data):
+                    return as_int16
+    return data.astype(np.float32, copy=False)
 
 
 def convert_dicom_to_nifti(
@@ -348,15 +892,17 @@ def convert_dicom_to_nifti(
         sample_dcm, modality = client._get_series_sample_dicom(series_dir)
         dicom_files: List[str] = []
         try:
-            for file in os.listdir(series_dir):
-                filepath = os.path.join(series_dir, file)
-                if os.path.isfile(filepath) and client._is_dicom_file(filepath):
-                    dicom_files.append(filepath)
+            # DirEntry 自带文件类型，无需逐个 stat；.dcm 文件由 _is_dicom_file 按扩展名直接认定
+            with os.scandir(series_dir) as it:
+                dicom_files = [entry.path for entry in it
+                               if entry.is_file() and client._is_dicom_file(entry.path)]
         except Exception:
             dicom_files = []
 
         if dicom_files:
-            client._cache_metadata_for_series(series_dir, series_name, dicom_files, modality)
+            # 整理阶段通常已逐文件读取头信息并写入缓存，这里仅在缓存缺失时补建，
+            # 避免对每个 DICOM 再做一次头信息解析
+            client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
             client._write_minimal_cache(
                 series_dir,
                 series_name,
@@ -365,7 +911,7 @@ def convert_dicom_to_nifti(
                 file_count=len(dicom_files)
             )
 
-        nifti_result = convert_with_dcm2niix(client, series_dir, series_name)
+        nifti_result = convert_with_dcm2niix(client, series_dir, series_name, compress=_nifti_compress_enabled())
         if nifti_result and nifti_result.get('success'):
             logger.info(
                 "dcm2niix转换成功: series=%s, output=%s",
@@ -388,9 +934,7 @@ def convert_dicom_to_nifti(
                     'sample_tags': client._build_sample_tags(sample_dcm)
                 }
                 try:
-                    import json
-                    with open(cache_path, 'w', encoding='utf-8') as f:
-                        json.dump(payload, f, ensure_ascii=False, indent=2)
+                    write_json_cache(cache_path, payload)
                 except Exception:
                     pass
             return nifti_result
@@ -418,9 +962,7 @@ def convert_dicom_to_nifti(
                     'sample_tags': client._build_sample_tags(sample_dcm)
                 }
                 try:
-                    import json
-                    with open(cache_path, 'w', encoding='utf-8') as f:
-                        json.dump(payload, f, ensure_ascii=False, indent=2)
+                    write_json_cache(cache_path, payload)
                 except Exception:
                     pass
         return nifti_result
@@ -430,6 +972,27 @@ def convert_dicom_to_nifti(
         return {'success': False, 'error': str(e)}
 
 
+def _nii_to_npz_name(name: str) -> str:
+    """NIfTI 文件名换成同名 .npz（只替换末尾扩展名，不误改文件名中间的 '.nii'）。"""
+    if name.endswith('.nii.gz'):
+        return name[:-7] + '.npz'
+    if name.endswith('.nii'):
+        return name[:-4] + '.npz'
+    return name + '.npz'
+
+
+def _nifti_file_to_npz(series_dir: str, nii_file: str, modality: Optional[str]) -> str:
+    """将序列目录下的单个 NIfTI 归一化为同名 NPZ 并删除原文件，返回 NPZ 文件名（已是 NPZ 时原样返回）。"""
+    if nii_file.endswith('.npz'):
+        return nii_file
+    nii_path = os.path.join(series_dir, nii_file)
+    npz_file = _nii_to_npz_name(nii_file)
+    normalize_and_save_npz(nii_path, os.path.join(series_dir, npz_file), modality=modality)
+    if os.path.exists(nii_path):
+        os.remove(nii_path)
+    return npz_file
+
+
 def convert_to_npz(
     client: "DicomClient",
     series_dir: str,
@@ -438,7 +1001,8 @@ def convert_to_npz(
     """
     将 DICOM 序列转换为归一化的 NPZ 格式。
 
-    首先将 DICOM 转换为 NIfTI，然后将 NIfTI 数据归一化并保存为 NPZ 格式。
+    首先将 DICOM 转换为 NIfTI，然后将 NIfTI 数据归一化并保存为 NPZ 格式
+    （dcm2niix 写未压缩的中间 .nii；Python 回退路径在内存中直接生成 NPZ）。
     支持批量转换多文件序列。转换完成后进行质量控制评估。
 
     参数:
@@ -462,34 +1026,27 @@ def convert_to_npz(
 
         sample_dcm, modality = client._get_series_sample_dicom(series_dir)
 
-        nifti_res = convert_with_dcm2niix(client, series_dir, series_name)
+        # dcm2niix 仅产出中间文件，写未压缩 .nii（-z n）省去 gzip 压缩与回读解压；
+        # Python 回退路径直接在内存中生成 NPZ，不落地中间 NIfTI
+        nifti_res = convert_with_dcm2niix(client, series_dir, series_name, compress=False)
         if not (nifti_res and nifti_res.get('success')):
-            nifti_res = convert_with_python_libs(client, series_dir, series_name)
+            nifti_res = convert_with_python_libs(client, series_dir, series_name, output_format='npz')
 
         if not (nifti_res and nifti_res.get('success')):
             return {'success': False, 'error': 'Failed to generate base volume for NPZ'}
 
         output_files: List[str] = []
         if nifti_res.get('conversion_mode') == 'individual':
-            for nii_file in nifti_res.get('output_files', []):
-                nii_path = os.path.join(series_dir, nii_file)
-                npz_file = nii_file.replace('.nii.gz', '.npz').replace('.nii', '.npz')
-                npz_path = os.path.join(series_dir, npz_file)
-
-                normalize_and_save_npz(nii_path, npz_path)
-                output_files.append(npz_file)
-                if os.path.exists(nii_path):
-                    os.remove(nii_path)
+            nii_files = nifti_res.get('output_files', [])
+            # 逐文件 NIfTI 之间互不依赖，读取/翻转/压缩大多释放 GIL，线程池并发归一化；
+            # map 按输入顺序返回，输出文件列表顺序不变
+            with ThreadPoolExecutor(max_workers=_dcm2niix_jobs(max(1, len(nii_files)))) as executor:
+                output_files.extend(executor.map(
+                    lambda nii_file: _nifti_file_to_npz(series_dir, nii_file, modality),
+                    nii_files
+                ))
         else:
-            nii_file = nifti_res.get('output_file')
-            nii_path = os.path.join(series_dir, nii_file)
-            npz_file = nii_file.replace('.nii.gz', '.npz').replace('.nii', '.npz')
-            npz_path = os.path.join(series_dir, npz_file)
-
-            normalize_and_save_npz(nii_path, npz_path)
-            output_files.append(npz_file)
-            if os.path.exists(nii_path):
-                os.remove(nii_path)
+            output_files.append(_nifti_file_to_npz(series_dir, nifti_res.get('output_file'), modality))
 
         qc_summary = client._assess_series_quality_converted(
             [os.path.join(series_dir, f) for f in output_files],
@@ -521,15 +1078,15 @@ def convert_to_npz(
         try:
             cache_path = os.path.join(series_dir, 'dicom_metadata_cache.json')
             if os.path.exists(cache_path):
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cache = json.load(f) or {}
+                cache = read_json_cache(cache_path) or {}
                 conversion_map = cache.get('conversion_map', {})
                 if isinstance(conversion_map, dict):
                     updated = False
                     for npz_file in output_files:
-                        nifti_candidate = npz_file.replace('.npz', '.nii.gz')
+                        stem = npz_file[:-4] if npz_file.endswith('.npz') else npz_file
+                        nifti_candidate = stem + '.nii.gz'
                         if nifti_candidate not in conversion_map:
-                            nifti_candidate = npz_file.replace('.npz', '.nii')
+                            nifti_candidate = stem + '.nii'
                         entry = conversion_map.get(nifti_candidate)
                         if entry and npz_file not in conversion_map:
                             cloned = dict(entry)
@@ -538,8 +1095,7 @@ def convert_to_npz(
                             updated = True
                     if updated:
                         cache['conversion_map'] = conversion_map
-                        with open(cache_path, 'w', encoding='utf-8') as f:
-                            json.dump(cache, f, ensure_ascii=False, indent=2)
+                        write_json_cache(cache_path, cache)
         except Exception:
             pass
 
@@ -566,10 +1122,90 @@ def convert_to_npz(
         return {'success': False, 'error': str(e)}
 
 
+def _convert_single_file_dcm2niix(
+    dcm2niix_cmd: str,
+    series_dir: str,
+    dcm_file: str,
+    idx: int,
+    output_name: str,
+    compress: bool = True,
+    header_tags: Optional[List[Any]] = None
+) -> Tuple[Optional[str], Optional[Dict[str, str]], Optional[FileDataset]]:
+    """
+    用 dcm2niix 单文件模式转换单个 DR/MG/DX 文件（在线程池中并发调用）。
+
+    参数:
+        header_tags: 序列缺少元数据缓存时传入元数据记录所需标签，随 conversion_map 条目一并解析
+
+    返回:
+        (输出的 NIfTI 文件名, conversion_map 条目, 头信息数据集)，失败或未请求时对应项为 None
+    """
+    try:
+        file_output_name = f"{output_name}_{idx+1:04d}"
+
+        # -s y：单文件模式，直接转换指定的 DICOM，无需复制到临时目录再按目录搜索
+        cmd = [
+            dcm2niix_cmd,
+            '-s', 'y',
+            '-m', 'y',
+            '-f', file_output_name,
+            '-o', series_dir,
+            '-z', 'y' if compress else 'n',
+            '-b', 'n',
+            dcm_file
+        ]
+
+        # Windows 下使用全局锁串行调用 dcm2niix，避免并发问题
+        # 添加重试机制应对 Windows 文件句柄未释放问题
+        result = None
+        for attempt in range(3):
+            with _dcm2niix_guard():
+                result = _run_dcm2niix(cmd, timeout=60, capture=attempt == 2)
+            if result.returncode == 0:
+                break
+            if attempt < 2:
+                logger.warning("dcm2niix failed for %s (attempt %d/3), retrying in 0.5s...", file_output_name, attempt + 1)
+                time.sleep(0.5)
+
+        if result and result.returncode == 0:
+            nifti_file = f"{file_output_name}.nii.gz" if compress else f"{file_output_name}.nii"
+            if os.path.exists(os.path.join(series_dir, nifti_file)):
+                entry: Optional[Dict[str, str]] = None
+                header: Optional[FileDataset] = None
+                try:
+                    tags = _CONVERSION_ENTRY_TAG_NUMBERS + list(header_tags) if header_tags else _CONVERSION_ENTRY_TAG_NUMBERS
+                    dcm = pydicom.dcmread(dcm_file, force=True, stop_before_pixels=True, specific_tags=tags)
+                    if header_tags:
+                        header = dcm
+                    entry = _build_conversion_entry(
+                        nifti_file,
+                        dcm,
+                        file_index=idx + 1,
+                        source_file=os.path.basename(dcm_file)
+                    )
+                except Exception:
+                    pass
+                return nifti_file, entry, header
+            # dcm2niix returncode 为 0 但没有生成文件，记录详细诊断信息
+            logger.warning("dcm2niix returned 0 but no output file for %s, stdout=%s, stderr=%s",
+                          file_output_name,
+                          result.stdout[:300] if result.stdout else 'empty',
+                          result.stderr[:300] if result.stderr else 'empty')
+        elif result:
+            logger.warning("dcm2niix failed for %s after 3 attempts: stdout=%s, stderr=%s",
+                          file_output_name,
+                          result.stdout[:300] if result.stdout else 'empty',
+                          result.stderr[:300] if result.stderr else 'empty')
+    except Exception as e:
+        logger.warning("Failed converting file %d: %s", idx + 1, e)
+    return None, None, None
+
+
 def convert_with_dcm2niix(
     client: "DicomClient",
     series_dir: str,
-    series_name: str
+    series_name: str,
+    compress: bool = True
 ) -> Dict[str, Union[bool, str, int, List[str]]]:
     """
     使用 dcm2niix 工具将 DICOM 转换为 NIfTI。
@@ -582,6 +1218,7 @@ def convert_with_dcm2niix(
         client: DICOM 客户端实例
         series_dir: DICOM 序列目录路径
         series_name: 序列名称
+        compress: 是否输出 .nii.gz；仅作为中间文件时传 False（-z n），省去 gzip 压缩与回读解压
 
     返回:
         包含转换结果的字典：
@@ -594,39 +1231,15 @@ def convert_with_dcm2niix(
         - error: 错误信息（失败时）
     """
     try:
-        # Choose dcm2niix command based on platform. Prefer bundled binaries
-        # located at the project root when available.
-        dcm2niix_cmd = 'dcm2niix'
-        base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-        if sys.platform.startswith('linux'):
-            bundled = os.path.join(base_dir, 'dcm2niix')
-            if os.path.exists(bundled):
-                if not os.access(bundled, os.X_OK):
-                    try:
-                        os.chmod(bundled, 0o755)
-                    except Exception:
-                        pass
-                if os.access(bundled, os.X_OK):
-                    dcm2niix_cmd = bundled
-        elif sys.platform.startswith('win'):
-            bundled = os.path.join(base_dir, 'dcm2niix.exe')
-            if os.path.exists(bundled):
-                dcm2niix_cmd = bundled
-
-        try:
-            subprocess.run([dcm2niix_cmd, '-h'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            logger.warning("dcm2niix not found or not executable: %s", dcm2niix_cmd)
+        dcm2niix_cmd = _resolve_dcm2niix()
+        if not dcm2niix_cmd:
             return {'success': False, 'error': 'dcm2niix not available'}
 
         # 等待文件系统稳定，并收集 DICOM 文件（最多重试3次）
         dicom_files: List[str] = []
         for attempt in range(3):
-            dicom_files = []
-            for file in os.listdir(series_dir):
-                filepath = os.path.join(series_dir, file)
-                if file.endswith('.dcm') and os.path.isfile(filepath):
-                    dicom_files.append(filepath)
+            with os.scandir(series_dir) as it:
+                dicom_files = [entry.path for entry in it if entry.name.endswith('.dcm') and entry.is_file()]
             
             if dicom_files:
                 break
@@ -644,7 +1257,8 @@ def convert_with_dcm2niix(
         if isinstance(sample_tags, dict):
             modality = str(sample_tags.get('Modality') or '')
         if not modality:
-            first_dcm = pydicom.dcmread(dicom_files[0], force=True)
+            # 只需 Modality 一个标签，不解析像素数据
+            first_dcm = pydicom.dcmread(dicom_files[0], force=True, stop_before_pixels=True, specific_tags=_MODALITY_TAG_NUMBERS)
             modality = getattr(first_dcm, 'Modality', '')
 
         output_name = client._sanitize_folder_name(series_name)
@@ -656,88 +1270,40 @@ def convert_with_dcm2niix(
             output_files: List[str] = []
             conversion_entries: List[Dict[str, str]] = []
 
-            for idx, dcm_file in enumerate(dicom_files):
-                temp_dir: Optional[str] = None
-                try:
-                    temp_dir = os.path.join(series_dir, f'temp_{idx}')
-                    os.makedirs(temp_dir, exist_ok=True)
-
-                    temp_dcm = os.path.join(temp_dir, os.path.basename(dcm_file))
-                    shutil.copy2(dcm_file, temp_dcm)
-
-                    file_output_name = f"{output_name}_{idx+1:04d}"
-
-                    cmd = [
-                        dcm2niix_cmd,
-                        '-m', 'y',
-                        '-f', file_output_name,
-                        '-o', series_dir,
-                        '-z', 'y',
-                        '-b', 'n',
-                        temp_dir
-                    ]
-
-                    # 使用全局锁保护 dcm2niix 调用，避免 Windows 下并发问题
-                    # 添加重试机制应对 Windows 文件句柄未释放问题
-                    result = None
-                    for attempt in range(3):
-                        with dcm2niix_global_lock:
-                            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-                        if result.returncode == 0:
-                            break
-                        if attempt < 2:
-                            logger.warning("dcm2niix failed for %s (attempt %d/3), retrying in 0.5s...", file_output_name, attempt + 1)
-                            time.sleep(0.5)
-
-                    if result and result.returncode == 0:
-                        nifti_file = f"{file_output_name}.nii.gz"
-                        if os.path.exists(os.path.join(series_dir, nifti_file)):
-                            output_files.append(nifti_file)
-                            success_count += 1
-                            try:
-                                dcm = pydicom.dcmread(dcm_file, force=True, stop_before_pixels=True)
-                                entry = _build_conversion_entry(
-                                    nifti_file,
-                                    dcm,
-                                    file_index=idx + 1,
-                                    source_file=os.path.basename(dcm_file)
-                                )
-                                conversion_entries.append(entry)
-                            except Exception:
-                                pass
-                        else:
-                            # dcm2niix returncode 为 0 但没有生成文件，记录详细诊断信息
-                            logger.warning("dcm2niix returned 0 but no output file for %s, stdout=%s, stderr=%s", 
-                                          file_output_name, 
-                                          result.stdout[:300] if result.stdout else 'empty',
-                                          result.stderr[:300] if result.stderr else 'empty')
-                    else:
-                        if result:
-                            logger.warning("dcm2niix failed for %s after 3 attempts: stdout=%s, stderr=%s", 
-                                          file_output_name, 
-                                          result.stdout[:300] if result.stdout else 'empty',
-                                          result.stderr[:300] if result.stderr else 'empty')
-
-                    if (idx + 1) % 10 == 0:
-                        logger.info("Converted %d/%d files...", idx + 1, len(dicom_files))
-
-                except Exception as e:
-                    logger.warning("Failed converting file %d: %s", idx + 1, e)
-                finally:
-                    if temp_dir and os.path.exists(temp_dir):
-                        shutil.rmtree(temp_dir, ignore_errors=True)
+            # 每个文件独立运行一个 dcm2niix 进程（-s y 单文件模式，按带序号的文件名直接输出到 series_dir），按 DCM2NIIX_JOBS 限流并发
+            results: List[Tuple[Optional[str], Optional[Dict[str, str]], Optional[FileDataset]]] = \
+                [(None, None, None)] * len(dicom_files)
+            header_tags = _missing_cache_header_tags(client, series_dir, modality)
+            jobs = _dcm2niix_jobs(len(dicom_files))
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(_convert_single_file_dcm2niix, dcm2niix_cmd, series_dir, dcm_file, idx,
+                                    output_name, compress, header_tags): idx
+                    for idx, dcm_file in enumerate(dicom_files)
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    if done % 10 == 0:
+                        logger.info("Converted %d/%d files...", done, len(dicom_files))
+
+            # 按原文件顺序汇总，保证输出文件列表与 conversion_map 顺序稳定
+            preparsed: Dict[str, FileDataset] = {}
+            for dcm_file, (nifti_file, entry, header) in zip(dicom_files, results):
+                if nifti_file:
+                    output_files.append(nifti_file)
+                    success_count += 1
+                if entry:
+                    conversion_entries.append(entry)
+                if header is not None:
+                    preparsed[dcm_file] = header
 
             if success_count > 0:
                 logger.info("dcm2niix conversion succeeded: %d/%d files", success_count, len(dicom_files))
 
-                client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
+                client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality, preparsed=preparsed)
                 _write_conversion_map(series_dir, conversion_entries)
 
-                for dcm_file in dicom_files:
-                    try:
-                        os.remove(dcm_file)
-                    except Exception:
-                        pass
+                _remove_files(dicom_files)
 
                 return {
                     'success': True,
@@ -751,22 +1317,28 @@ def convert_with_dcm2niix(
 
         logger.info("%s modality: converting entire series to a single NIfTI file", modality)
 
+        # -a y：序列目录只含同一序列的文件（整理阶段保证），dcm2niix 无需跨目录比对相邻文件
+        # 不使用 -i y：它会同时丢弃 2D 单幅图像和衍生序列，而是否保留衍生序列由用户选项决定
+        # 系统有 pigz 时先输出未压缩 .nii，转换完成后在锁外用多线程 pigz 压缩，
+        # 避免大体积序列卡在 dcm2niix 的单线程 gzip 上
+        pigz_after = compress and bool(_PIGZ_CMD)
         cmd = [
             dcm2niix_cmd,
+            '-a', 'y',
             '-m', 'y',
             '-f', output_name,
             '-o', series_dir,
-            '-z', 'y',
+            '-z', 'y' if compress and not pigz_after else 'n',
             '-b', 'n',
             series_dir
         ]
 
-        # 使用全局锁保护 dcm2niix 调用，避免 Windows 下并发问题
+        # Windows 下使用全局锁串行调用 dcm2niix，避免并发问题
         # 添加重试机制应对 Windows 文件句柄未释放问题
         result = None
         for attempt in range(3):
-            with dcm2niix_global_lock:
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            with _dcm2niix_guard():
+                result = _run_dcm2niix(cmd, timeout=300, capture=attempt == 2)
             if result.returncode == 0:
                 break
             if attempt < 2:
@@ -774,18 +1346,21 @@ def convert_with_dcm2niix(
                 time.sleep(0.5)
 
         if result and result.returncode == 0:
+            if pigz_after:
+                with os.scandir(series_dir) as it:
+                    raw_niftis = [entry.path for entry in it if entry.name.endswith('.nii')]
+                for raw_path in raw_niftis:
+                    # 压缩失败时保留 .nii，下游按两种扩展名均可读取
+                    _pigz_compress(raw_path)
             nifti_files = [f for f in os.listdir(series_dir) if f.endswith(('.nii.gz', '.nii'))]
             if nifti_files:
                 logger.info("   ✅ dcm2niix conversion succeeded: %s", nifti_files[0])
 
                 client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
 
-                for file in os.listdir(series_dir):
-                    if file.endswith('.dcm'):
-                        try:
-                            os.remove(os.path.join(series_dir, file))
-                        except Exception:
-                            pass
+                with os.scandir(series_dir) as it:
+                    leftover_dicoms = [entry.path for entry in it if entry.name.endswith('.dcm')]
+                _remove_files(leftover_dicoms)
 
                 return {
                     'success': True,
@@ -803,7 +1378,7 @@ def convert_with_dcm2niix(
 
         if result and result.stderr:
             logger.warning("dcm2niix failed for series %s: stderr=%s", output_name, result.stderr[:300])
-        return {'success': False, 'error': result.stderr if result else 'dcm2niix failed'}
+        return {'success': False, 'error': (result.stderr if result else None) or 'dcm2niix failed'}
 
     except Exception as e:
         logger.error("dcm2niix conversion failed: %s", e)
@@ -849,29 +1424,28 @@ def _build_2d_xray_affine(dcm: FileDataset) -> np.ndarray:
     if iop is not None:
         # 有 IOP 的情况：使用 IOP 构建仿射矩阵
         try:
-            row_cosine = np.array([float(i) for i in iop[:3]], dtype=np.float64)
-            col_cosine = np.array([float(i) for i in iop[3:6]], dtype=np.float64)
+            row_cosine = np.asarray(iop[:3], dtype=np.float64)
+            col_cosine = np.asarray(iop[3:6], dtype=np.float64)
             slice_cosine = np.cross(row_cosine, col_cosine)
             
             # 获取图像位置
             ipp = getattr(dcm, 'ImagePositionPatient', None)
             if ipp is not None:
-                origin = np.array([float(i) for i in ipp], dtype=np.float64)
+                origin = np.asarray(ipp, dtype=np.float64)
             else:
                 origin = np.zeros(3, dtype=np.float64)
             
             # 构建 LPS 仿射矩阵
-            affine_lps = np.eye(4, dtype=np.float64)
-            affine_lps[:3, 0] = row_cosine * row_spacing
-            affine_lps[:3, 1] = col_cosine * col_spacing
-            affine_lps[:3, 2] = slice_cosine
-            affine_lps[:3, 3] = origin
+            affine = np.eye(4, dtype=np.float64)
+            affine[:3, 0] = row_cosine * row_spacing
+            affine[:3, 1] = col_cosine * col_spacing
+            affine[:3, 2] = slice_cosine
+            affine[:3, 3] = origin
             
-            # 转换为 RAS: LPS_to_RAS = diag(-1, -1, 1, 1)
-            lps_to_ras = np.diag([-1.0, -1.0, 1.0, 1.0])
-            affine_ras = lps_to_ras @ affine_lps
+            # 转换为 RAS: LPS_to_RAS = diag(-1, -1, 1, 1)，直接对前两行取反
+            affine[:2] *= -1.0
             
-            return affine_ras
+            return affine
         except Exception:
             pass  # 回退到默认方向
     
@@ -904,10 +1478,174 @@ def _build_2d_xray_affine(dcm: FileDataset) -> np.ndarray:
     return affine
 
 
+def _convert_uniform_projections(
+    client: "DicomClient",
+    series_dir: str,
+    series_name: str,
+    output_name: str,
+    dicom_files: List[str],
+    modality: str,
+    output_format: str = 'nifti'
+) -> Optional[Dict[str, Union[bool, str, int, List[str]]]]:
+    """
+    将尺寸一致的 DR/MG/DX/CR 投影序列合并为单个未压缩的 3D NIfTI。
+
+    仅在所有文件均为单帧灰度且 Rows/Columns 相同时合并，否则返回 None，
+    由调用方回退到逐文件转换。同时写出 per_file_index.csv，记录源 DICOM
+    文件与切片索引的对应关系。头信息只解析一次（含缺失缓存时元数据记录所需标签），
+    随后复用于写元数据缓存。
+    """
+    header_tags = _missing_cache_header_tags(client, series_dir, modality)
+    tags = _PROJECTION_MERGE_TAG_NUMBERS + header_tags if header_tags else _PROJECTION_MERGE_TAG_NUMBERS
+    headers: List[FileDataset] = []
+    for dcm_file in dicom_files:
+        try:
+            headers.append(pydicom.dcmread(dcm_file, force=True, stop_before_pixels=True, specific_tags=tags))
+        except Exception:
+            return None
+
+    shapes = {
+        (
+            int(getattr(h, 'Rows', 0) or 0),
+            int(getattr(h, 'Columns', 0) or 0),
+            int(getattr(h, 'SamplesPerPixel', 1) or 1),
+            int(getattr(h, 'NumberOfFrames', 1) or 1)
+        )
+        for h in headers
+    }
+    if len(shapes) != 1:
+        return None
+    rows, cols, samples, frames = shapes.pop()
+    if rows <= 0 or cols <= 0 or samples != 1 or frames != 1:
+        return None
+
+    # PROJECTION_UINT8 与逐文件转换一致：每张按各自窗宽窗位映射为 uint8，否则保持 float32 原始值
+    window_uint8 = bool(getattr(client, 'projection_uint8', False))
+    volume = np.empty((rows, cols, len(dicom_files)), dtype=np.uint8 if window_uint8 else np.float32)
+    for idx, dcm_file in enumerate(dicom_files):
+        dcm = pydicom.dcmread(dcm_file, force=True, defer_size=_DEFER_SIZE)
+        if window_uint8:
+            volume[:, :, idx] = window_to_uint8(dcm.pixel_array, dcm)
+        else:
+            rescale_and_photometric(dcm.pixel_array, dcm, out=volume[:, :, idx])
+
+    nifti_img = nib.Nifti1Image(volume, _build_2d_xray_affine(headers[0]))
+    # 与逐文件转换一致：有 IOP 时转为最接近的标准方向，缺少 IOP 时保持 _build_2d_xray_affine 构建的 RAS 矩阵
+    if getattr(headers[0], 'ImageOrientationPatient', None) is not None:
+        nifti_img = nib.as_closest_canonical(nifti_img)
+    output_filename = _save_converted_image(nifti_img, series_dir, output_name, output_format,
+                                            modality=modality, compressed=False)
+    del nifti_img, volume
+
+    index_path = os.path.join(series_dir, 'per_file_index.csv')
+    with open(index_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['SourceFile', 'SliceIndex', 'SOPInstanceUID', 'InstanceNumber'])
+        for idx, (dcm_file, header) in enumerate(zip(dicom_files, headers)):
+            writer.writerow([
+                os.path.basename(dcm_file),
+                idx,
+                str(getattr(header, 'SOPInstanceUID', '') or ''),
+                str(getattr(header, 'InstanceNumber', '') or '')
+            ])
+
+    client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality,
+                                  preparsed=dict(zip(dicom_files, headers)))
+    _remove_files(dicom_files)
+
+    logger.info("   ✅ Merged %d uniform %s projections into %s", len(dicom_files), modality, output_filename)
+    return {
+        'success': True,
+        'method': 'python_libs',
+        'modality': modality,
+        'conversion_mode': 'series',
+        'output_file': output_filename,
+        'slice_count': len(dicom_files)
+    }
+
+
+def _convert_single_file_python(
+    series_dir: str,
+    dcm_file: str,
+    idx: int,
+    output_name: str,
+    output_format: str = 'nifti',
+    modality: Optional[str] = None,
+    window_uint8: bool = False,
+    header_tags: Optional[List[Any]] = None
+) -> Tuple[Optional[str], Optional[Dict[str, str]], Optional[Dataset]]:
+    """
+    用 pydicom + nibabel 转换单个 DR/MG/DX/CR 文件（在线程池中并发调用）。
+
+    window_uint8 为 True 时按窗宽窗位输出 uint8（见 window_to_uint8），否则输出 float32 原始值。
+    header_tags 非空时（序列缺少元数据缓存）顺带从已打开的数据集中摘出这些标签，供写缓存时复用。
+
+    返回:
+        (输出文件名, conversion_map 条目, 头信息数据集)，失败或未请求时对应项为 None
+    """
+    try:
+        dcm = pydicom.dcmread(dcm_file, force=True, defer_size=_DEFER_SIZE)
+
+        if not _has_pixel_data(dcm):
+            logger.warning("File %d has no pixel data: %s", idx + 1, os.path.basename(dcm_file))
+            return None, None, None
+
+        # 获取像素数据并应用重缩放和光度解释
+        if window_uint8:
+            pixel_data = window_to_uint8(dcm.pixel_array, dcm)
+        else:
+            pixel_data = rescale_and_photometric(dcm.pixel_array, dcm)
+
+        # 确保数据为 3D (添加单切片维度)
+        if len(pixel_data.shape) == 2:
+            pixel_data = pixel_data[:, :, np.newaxis]
+
+        # 为 2D X-ray 构建正确的仿射矩阵
+        # 关键：不使用 as_closest_canonical 以避免方向问题
+        affine = _build_2d_xray_affine(dcm)
+
+        # 创建 NIfTI 图像（uint8 窗口化结果保持 uint8）
+        if pixel_data.dtype != np.uint8:
+            pixel_data = pixel_data.astype(np.float32, copy=False)
+        nifti_img = nib.Nifti1Image(pixel_data, affine)
+
+        # 注意：对于缺少 IOP 的 2D X-ray，不使用 as_closest_canonical
+        # 因为这会导致 Y 轴翻转，与 dcm2niix 的问题相同
+        iop = getattr(dcm, 'ImageOrientationPatient', None)
+        if iop is not None:
+            # 有 IOP 时，可以使用 canonical 转换
+            nifti_img = nib.as_closest_canonical(nifti_img)
+        # 否则：保持原方向，_build_2d_xray_affine 已经构建了正确的 RAS 矩阵
+
+        output_filename = _save_converted_image(nifti_img, series_dir, f"{output_name}_{idx+1:04d}",
+                                                output_format, modality=modality)
+        # 及时释放本张图像的像素数组，降低并发转换时的峰值内存
+        del pixel_data, nifti_img
+
+        # 记录转换信息
+        entry: Optional[Dict[str, str]] = None
+        try:
+            entry = _build_conversion_entry(
+                output_filename,
+                dcm,
+                file_index=idx + 1,
+                source_file=os.path.basename(dcm_file)
+            )
+        except Exception as e:
+            logger.debug("Failed to build conversion entry for file %d: %s", idx + 1, e)
+        header = _header_subset(dcm, header_tags) if header_tags else None
+        return output_filename, entry, header
+
+    except Exception as e:
+        logger.warning("Failed converting file %d (%s): %s", idx + 1, os.path.basename(dcm_file), e)
+    return None, None, None
+
+
 def convert_with_python_libs(
     client: "DicomClient",
     series_dir: str,
-    series_name: str
+    series_name: str,
+    output_format: str = 'nifti'
 ) -> Dict[str, Union[bool, str, int, List[str]]]:
     """
     使用 Python 库（pydicom + nibabel）将 DICOM 转换为 NIfTI。
@@ -923,6 +1661,7 @@ def convert_with_python_libs(
         client: DICOM 客户端实例
         series_dir: DICOM 序列目录路径
         series_name: 序列名称
+        output_format: 'nifti'（默认）或 'npz'；为 'npz' 时体数据在内存中直接归一化写出 NPZ
 
     返回:
         包含转换结果的字典：
@@ -934,94 +1673,72 @@ def convert_with_python_libs(
         - file_count/slice_count: 文件数或切片数
         - error: 错误信息（失败时）
     """
+    # 大体积序列的 memmap 临时文件路径（见 _allocate_volume），异常退出时也需清理
+    volume_spill_path: Optional[str] = None
     try:
-        dicom_files: List[str] = []
-        for file in os.listdir(series_dir):
-            filepath = os.path.join(series_dir, file)
-            if client._is_dicom_file(filepath):
-                dicom_files.append(filepath)
+        with os.scandir(series_dir) as it:
+            dicom_files: List[str] = [entry.path for entry in it
+                                      if entry.is_file() and client._is_dicom_file(entry.path)]
 
         if not dicom_files:
             return {'success': False, 'error': 'No DICOM files found'}
 
-        first_dcm = pydicom.dcmread(dicom_files[0], force=True)
+        # 多文件序列只用首个文件的头信息，大元素（含像素数据）延迟到真正访问时才读取
+        first_dcm = pydicom.dcmread(dicom_files[0], force=True, defer_size=_DEFER_SIZE)
         modality = getattr(first_dcm, 'Modality', '')
+        output_name = client._sanitize_folder_name(series_name)
 
         if modality in ['DR', 'MG', 'DX', 'CR']:
+            if getattr(client, 'dr_merge_when_uniform', False) and len(dicom_files) > 1:
+                try:
+                    merged = _convert_uniform_projections(client, series_dir, series_name, output_name,
+                                                          dicom_files, modality, output_format)
+                except Exception as e:
+                    logger.warning("Merging %s projections failed, converting per file: %s", modality, e)
+                    merged = None
+                if merged:
+                    return merged
+
             logger.info("Detected %s modality; converting each DICOM file to NIfTI (Python libs)", modality)
 
             success_count = 0
             output_files: List[str] = []
             conversion_entries: List[Dict[str, str]] = []
 
-            for idx, dcm_file in enumerate(dicom_files):
-                try:
-                    dcm = pydicom.dcmread(dcm_file, force=True)
-
-                    if not hasattr(dcm, 'pixel_array'):
-                        logger.warning("File %d has no pixel data: %s", idx + 1, os.path.basename(dcm_file))
-                        continue
-
-                    # 获取像素数据并应用重缩放和光度解释
-                    pixel_data = dcm.pixel_array
-                    pixel_data = apply_rescale(pixel_data, dcm)
-                    pixel_data = apply_photometric(pixel_data, dcm)
-
-                    # 确保数据为 3D (添加单切片维度)
-                    if len(pixel_data.shape) == 2:
-                        pixel_data = pixel_data[:, :, np.newaxis]
-
-                    # 为 2D X-ray 构建正确的仿射矩阵
-                    # 关键：不使用 as_closest_canonical 以避免方向问题
-                    affine = _build_2d_xray_affine(dcm)
-
-                    # 创建 NIfTI 图像
-                    nifti_img = nib.Nifti1Image(pixel_data.astype(np.float32), affine)
-                    
-                    # 注意：对于缺少 IOP 的 2D X-ray，不使用 as_closest_canonical
-                    # 因为这会导致 Y 轴翻转，与 dcm2niix 的问题相同
-                    iop = getattr(dcm, 'ImageOrientationPatient', None)
-                    if iop is not None:
-                        # 有 IOP 时，可以使用 canonical 转换
-                        nifti_img = nib.as_closest_canonical(nifti_img)
-                    # 否则：保持原方向，_build_2d_xray_affine 已经构建了正确的 RAS 矩阵
-
-                    output_filename = f"{client._sanitize_folder_name(series_name)}_{idx+1:04d}.nii.gz"
-                    output_path = os.path.join(series_dir, output_filename)
-                    nib.save(nifti_img, output_path)
-
+            window_uint8 = bool(getattr(client, 'projection_uint8', False))
+            # 各文件独立解码与写盘，zlib 压缩与文件 I/O 释放 GIL，线程池并发（并发数同 DCM2NIIX_JOBS）
+            results: List[Tuple[Optional[str], Optional[Dict[str, str]], Optional[Dataset]]] = \
+                [(None, None, None)] * len(dicom_files)
+            header_tags = _missing_cache_header_tags(client, series_dir, modality)
+            jobs = _dcm2niix_jobs(len(dicom_files))
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(_convert_single_file_python, series_dir, dcm_file, idx, output_name,
+                                    output_format, modality, window_uint8, header_tags): idx
+                    for idx, dcm_file in enumerate(dicom_files)
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    if done % 10 == 0:
+                        logger.info("Converted %d/%d files...", done, len(dicom_files))
+
+            # 按原文件顺序汇总，保证输出文件列表与 conversion_map 顺序稳定
+            preparsed: Dict[str, Dataset] = {}
+            for dcm_file, (output_filename, entry, header) in zip(dicom_files, results):
+                if output_filename:
                     output_files.append(output_filename)
                     success_count += 1
-
-                    # 记录转换信息
-                    try:
-                        entry = _build_conversion_entry(
-                            output_filename,
-                            dcm,
-                            file_index=idx + 1,
-                            source_file=os.path.basename(dcm_file)
-                        )
-                        conversion_entries.append(entry)
-                    except Exception as e:
-                        logger.debug("Failed to build conversion entry for file %d: %s", idx + 1, e)
-
-                    if (idx + 1) % 10 == 0:
-                        logger.info("Converted %d/%d files...", idx + 1, len(dicom_files))
-
-                except Exception as e:
-                    logger.warning("Failed converting file %d (%s): %s", idx + 1, os.path.basename(dcm_file), e)
-                    continue
+                if entry:
+                    conversion_entries.append(entry)
+                if header is not None:
+                    preparsed[dcm_file] = header
 
             if success_count > 0:
-                client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
+                client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality, preparsed=preparsed)
                 _write_conversion_map(series_dir, conversion_entries)
                 
                 # 清理原始 DICOM 文件
-                for dcm_file in dicom_files:
-                    try:
-                        os.remove(dcm_file)
-                    except Exception:
-                        pass
+                _remove_files(dicom_files)
 
                 logger.info("   ✅ Python libs conversion succeeded: %d/%d files", success_count, len(dicom_files))
                 return {
@@ -1039,12 +1756,10 @@ def convert_with_python_libs(
 
         if len(dicom_files) == 1:
             dcm = first_dcm
-            if not hasattr(dcm, 'pixel_array'):
+            if not _has_pixel_data(dcm):
                 return {'success': False, 'error': 'No pixel data'}
 
-            pixel_data = dcm.pixel_array
-            pixel_data = apply_rescale(pixel_data, dcm)
-            pixel_data = apply_photometric(pixel_data, dcm)
+            pixel_data = rescale_and_photometric(dcm.pixel_array, dcm)
             
             # 确保数据为 3D（添加单切片维度如果需要）
             if len(pixel_data.shape) == 2:
@@ -1053,7 +1768,7 @@ def convert_with_python_libs(
             slice_thickness = float(getattr(dcm, 'SliceThickness', 1.0))
             affine = build_affine_from_dicom(dcm, slice_spacing=slice_thickness)
 
-            nifti_img = nib.Nifti1Image(pixel_data.astype(np.float32), affine)
+            nifti_img = nib.Nifti1Image(pixel_data.astype(np.float32, copy=False), affine)
             
             # 对于缺少 IOP 的 2D 图像，不使用 as_closest_canonical 以避免方向问题
             iop = getattr(dcm, 'ImageOrientationPatient', None)
@@ -1061,16 +1776,11 @@ def convert_with_python_libs(
                 nifti_img = nib.as_closest_canonical(nifti_img)
             # 否则：保持原方向，build_affine_from_dicom 已经构建了正确的矩阵
             
-            output_filename = f"{client._sanitize_folder_name(series_name)}.nii.gz"
-            output_path = os.path.join(series_dir, output_filename)
-            nib.save(nifti_img, output_path)
+            output_filename = _save_converted_image(nifti_img, series_dir, output_name, output_format,
+                                                    modality=modality)
 
             client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
-            for file in dicom_files:
-                try:
-                    os.remove(file)
-                except Exception:
-                    pass
+            _remove_files(dicom_files)
 
             print(f"   ✅ Python libs conversion succeeded: {output_filename}")
             return {
@@ -1081,90 +1791,143 @@ def convert_with_python_libs(
                 'output_file': output_filename
             }
 
-        slice_info: List[Tuple[float, str, FileDataset, Optional[List[float]]]] = []
+        # 排序只需位置信息：仅解析 IPP/SliceLocation 两个标签，不读像素数据
+        slice_info: List[Tuple[float, str, Optional[np.ndarray]]] = []
         for filepath in dicom_files:
             try:
-                dcm = pydicom.dcmread(filepath, force=True)
+                dcm = pydicom.dcmread(filepath, force=True, stop_before_pixels=True,
+                                      specific_tags=_SLICE_POSITION_TAG_NUMBERS)
                 if hasattr(dcm, 'ImagePositionPatient'):
-                    ipp = [float(v) for v in dcm.ImagePositionPatient]
-                    z_pos = ipp[2]
+                    ipp = np.asarray(dcm.ImagePositionPatient, dtype=np.float64)
+                    z_pos = float(ipp[2])
                 elif hasattr(dcm, 'SliceLocation'):
                     z_pos = float(dcm.SliceLocation)
                     ipp = None
                 else:
                     z_pos = 0.0
                     ipp = None
-                slice_info.append((z_pos, filepath, dcm, ipp))
+                slice_info.append((z_pos, filepath, ipp))
             except Exception:
                 continue
 
         if not slice_info:
             return {'success': False, 'error': 'Could not sort slices'}
 
+        # 有 IOP 时按 IPP 在切片法向上的投影排序（斜切/矢状/冠状位序列按 Z 排序是错误的），
+        # 所有投影一次矩阵乘法求出；缺 IPP 的切片仍使用 SliceLocation
+        first_iop = getattr(first_dcm, 'ImageOrientationPatient', None)
+        if first_iop is not None and any(ipp is not None for _, _, ipp in slice_info):
+            try:
+                normal = np.cross(np.asarray(first_iop[:3], dtype=np.float64),
+                                  np.asarray(first_iop[3:6], dtype=np.float64))
+                has_ipp = [i for i, (_, _, ipp) in enumerate(slice_info) if ipp is not None]
+                projections = np.vstack([slice_info[i][2] for i in has_ipp]) @ normal
+                for i, projection in zip(has_ipp, projections.tolist()):
+                    slice_info[i] = (projection, slice_info[i][1], slice_info[i][2])
+            except Exception as e:
+                logger.debug("Slice normal projection failed, sorting by Z: %s", e)
+
         slice_info.sort(key=lambda x: x[0])
 
-        slices: List[np.ndarray] = []
+        # 按排序后的顺序逐个完整读取，同一时刻只持有一张切片的数据集；
+        # 原始像素直接写入预分配的 volume，不再保留切片列表再 np.stack 整卷复制，
+        # 重缩放与光度反转在全部切片写入后对整卷一次完成
+        # DICOM pixel_array is (Rows, Columns)
+        # dim 0 = Rows (vertical), dim 1 = Columns (horizontal), dim 2 = Slices
+        volume: Optional[np.ndarray] = None
+        slice_count = 0
         positions: List[np.ndarray] = []
-        for _, _, dcm, ipp in slice_info:
-            if hasattr(dcm, 'pixel_array'):
-                pixel_data = dcm.pixel_array
-                pixel_data = apply_rescale(pixel_data, dcm)
-                pixel_data = apply_photometric(pixel_data, dcm)
-                slices.append(pixel_data)
+        rescale_params: List[Tuple[float, float, bool]] = []
+        # 后台线程按顺序预读并解码后续切片，主线程写入 volume 的同时后续切片已在并发读取/解码；
+        # JPEG2000/JPEG-LS 等压缩语法的解码（pylibjpeg/GDCM 原生代码）释放 GIL，可随核数扩展
+        decoded_slices = _prefetch_ordered(_read_series_slice, [filepath for _, filepath, _ in slice_info],
+                                           depth=_slice_decode_workers())
+        for (_, filepath, ipp), decoded in zip(slice_info, decoded_slices):
+            if decoded is not None:
+                pixel_data, params = decoded
+                if volume is None:
+                    volume, volume_spill_path = _allocate_volume(
+                        pixel_data.shape[:2] + (len(slice_info),) + pixel_data.shape[2:],
+                        series_dir
+                    )
+                elif pixel_data.shape != volume.shape[:2] + volume.shape[3:]:
+                    raise ValueError(f"Inconsistent slice shape {pixel_data.shape} in {os.path.basename(filepath)}")
+                np.copyto(volume[:, :, slice_count], pixel_data, casting='unsafe')
+                rescale_params.append(params)
+                slice_count += 1
                 if ipp is not None:
-                    positions.append(np.array(ipp, dtype=np.float64))
+                    positions.append(ipp)
 
-        if not slices:
+        if volume is None:
             return {'success': False, 'error': 'No pixel data found'}
-
-        # DICOM pixel_array is (Rows, Columns)
-        # Stack directly: dim 0 = Rows (vertical), dim 1 = Columns (horizontal), dim 2 = Slices
-        volume = np.stack(slices, axis=2)
-
+        if slice_count < volume.shape[2]:
+            # 个别文件读取失败或无像素时截掉未填充的尾部
+            volume = volume[:, :, :slice_count]
+        _rescale_volume_inplace(volume, rescale_params)
+        del rescale_params
+
+        # 相邻 IPP 间距一次向量化求出，取非零间距的中位数，避免重复 IPP 或个别缺层导致层距失真
+        steps = np.empty(0, dtype=np.float64)
         if len(positions) > 1:
-            slice_spacing = float(np.linalg.norm(positions[1] - positions[0]))
+            steps = np.linalg.norm(np.diff(np.vstack(positions), axis=0), axis=1)
+            steps = steps[steps > 0]
+        if steps.size:
+            slice_spacing = float(np.median(steps))
         elif len(slice_info) > 1:
             slice_spacing = abs(slice_info[1][0] - slice_info[0][0])
         else:
             slice_spacing = float(getattr(first_dcm, 'SliceThickness', 1.0))
 
+        # 排序后第一张切片的位置作为体数据原点（first_dcm 只是目录中的第一个文件）
+        origin_ipp = positions[0] if positions else None
+
+        # volume 组装完成后立即释放排序信息与最后一张切片的引用
+        del slice_info, positions, pixel_data
+        gc.collect()
+
         iop = getattr(first_dcm, 'ImageOrientationPatient', None)
         if iop is not None:
-            row_cosine = np.array([float(i) for i in iop[:3]], dtype=np.float64)
-            col_cosine = np.array([float(i) for i in iop[3:6]], dtype=np.float64)
+            row_cosine = np.asarray(iop[:3], dtype=np.float64)
+            col_cosine = np.asarray(iop[3:6], dtype=np.float64)
             slice_cosines = np.cross(row_cosine, col_cosine)
         else:
             slice_cosines = None
 
         affine = build_affine_from_dicom(first_dcm, slice_spacing=slice_spacing, slice_cosines=slice_cosines)
+        if iop is not None and origin_ipp is not None:
+            # LPS -> RAS：x、y 取反
+            affine[:3, 3] = origin_ipp * np.array([-1.0, -1.0, 1.0])
 
-        nifti_img = nib.Nifti1Image(volume.astype(np.float32), affine)
+        nifti_img = nib.Nifti1Image(volume, affine)
+        del volume
         
         # 对于缺少 IOP 的序列，不使用 as_closest_canonical 以避免方向问题
         if iop is not None:
             nifti_img = nib.as_closest_canonical(nifti_img)
         # 否则：保持原方向，build_affine_from_dicom 已经处理了回退方案
         
-        output_filename = f"{client._sanitize_folder_name(series_name)}.nii.gz"
-        output_path = os.path.join(series_dir, output_filename)
-        nib.save(nifti_img, output_path)
+        try:
+            output_filename = _save_converted_image(nifti_img, series_dir, output_name, output_format,
+                                                    modality=modality)
+        finally:
+            del nifti_img
+            if volume_spill_path:
+                _discard_volume_spill(volume_spill_path)
 
         client._ensure_metadata_cache(series_dir, series_name, dicom_files, modality)
-        for file in dicom_files:
-            try:
-                os.remove(file)
-            except Exception:
-                pass
+        _remove_files(dicom_files)
 
-        print(f"   ✅ Python libs conversion succeeded: {output_filename} ({len(slices)} slices)")
+        print(f"   ✅ Python libs conversion succeeded: {output_filename} ({slice_count} slices)")
         return {
             'success': True,
             'method': 'python_libs',
             'modality': modality,
             'conversion_mode': 'series',
             'output_file': output_filename,
-            'slice_count': len(slices)
+            'slice_count': slice_count
         }
 
     except Exception as e:
+        if volume_spill_path and os.path.exists(volume_spill_path):
+            _discard_volume_spill(volume_spill_path)
         return {'success': False, 'error': str(e)}
@@ -23,16 +23,34 @@ DICOM 元数据提取模块。
 
 from __future__ import annotations
 
-import json
 import logging
+import mmap
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 import pydicom
+from pydicom.datadict import dictionary_VM, dictionary_VR, tag_for_keyword
+from pydicom.multival import MultiValue
+
+try:
+    import xlsxwriter
+except ImportError:  # 可选依赖：缺失时回退到 openpyxl
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖：缺失时不输出 Parquet 副本
+    pa = None
+    pq = None
 
 from src.core.qc import ImageQualityResult, assess_converted_file_quality as _default_assess_file_qc, assess_series_quality_converted as _default_assess_series_qc
+from src.utils.json_cache import read_json_cache
 
 # Create logger for metadata module - use DICOMApp to match Flask app logging
 logger = logging.getLogger('DICOMApp')
@@ -80,6 +98,535 @@ def _build_converted_filename(accession_number: str, converted_file_path: str) -
     return f"{accession_number}/{filename}"
 
 
+KeywordTag = Tuple[str, Optional[int], Callable[[object], str]]
+
+# 这些 VR 的值是字节串或序列，交给通用的 format_tag_value 处理
+_RAW_VALUE_VRS = frozenset({'OB', 'OD', 'OF', 'OL', 'OV', 'OW', 'UN', 'SQ'})
+
+
+def resolve_keyword_tags(keywords: List[str]) -> List[KeywordTag]:
+    """
+    预先将关键字解析为 (关键字, 标签号, 取值转换函数)。
+
+    转换函数按字典中的 VR/VM 选定，读取每个文件时无需再对值做 hasattr/len 探测；
+    非标准关键字（标签号为 None）使用 format_tag_value。
+    """
+    resolved: List[KeywordTag] = []
+    for keyword in keywords:
+        tag = tag_for_keyword(keyword)
+        coerce = format_tag_value
+        if tag is not None:
+            try:
+                vr = dictionary_VR(tag)
+                vm = dictionary_VM(tag)
+            except KeyError:
+                vr, vm = 'UN', ''
+            if vr not in _RAW_VALUE_VRS:
+                coerce = _coerce_single if vm == '1' else _coerce_multi
+        resolved.append((keyword, tag, coerce))
+    return resolved
+
+
+def _coerce_single(value) -> str:
+    """单值元素（VM=1）：直接转字符串；文件实际存了多值时按通用规则处理。"""
+    if isinstance(value, MultiValue):
+        return format_tag_value(value)
+    return str(value)
+
+
+def _coerce_multi(value) -> str:
+    """可能多值的元素：只有一个值时取该值，否则保留列表形式。"""
+    if isinstance(value, MultiValue):
+        return str(value[0]) if len(value) == 1 else str(value)
+    return str(value)
+
+
+def format_tag_value(value) -> str:
+    """将 DICOM 元素值转换为写入元数据记录的字符串（单值多值元素取第一个值）。"""
+    if value is None:
+        return ""
+    if hasattr(value, '__len__') and not isinstance(value, str):
+        if len(value) == 1:
+            value = value[0]
+        else:
+            value = str(value)
+    elif hasattr(value, 'value'):
+        value = value.value
+    return str(value)
+
+
+def read_keyword_values(dcm, keyword_tags: List[KeywordTag]) -> Dict[str, str]:
+    """
+    按预解析的 (关键字, 标签号, 取值转换函数) 列表读取元素值。
+
+    pydicom 数据集直接按标签号取元素；非 DICOM 关键字或非 Dataset 对象
+    （如由缓存 sample_tags 构建的 SimpleNamespace）回退到 getattr。
+    """
+    is_dataset = isinstance(dcm, pydicom.Dataset)
+    values: Dict[str, str] = {}
+    for keyword, tag, coerce in keyword_tags:
+        try:
+            if is_dataset and tag is not None:
+                elem = dcm.get(tag)
+                value = None if elem is None else elem.value
+                values[keyword] = "" if value is None else coerce(value)
+            else:
+                values[keyword] = format_tag_value(getattr(dcm, keyword, None))
+        except Exception:
+            values[keyword] = ""
+    return values
+
+
+def _load_series_cache(cache_path: str) -> Optional[Dict]:
+    """读取序列目录下的 dicom_metadata_cache.json，不存在或损坏时返回 None。"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        cache = read_json_cache(cache_path)
+        return cache if isinstance(cache, dict) else None
+    except Exception as e:
+        print(f"     ⚠️  Failed to load cache {cache_path}: {e}")
+        return None
+
+
+def _cache_covers_dicoms(cache: Optional[Dict], dicom_count: int) -> bool:
+    """判断缓存记录是否由当前这批 DICOM 完整生成（而非最小占位缓存）。"""
+    if not cache:
+        return False
+    records = cache.get('records') or []
+    if not records:
+        return False
+    modality = str(cache.get('modality', '')).upper()
+    if modality in ['DR', 'MG', 'DX', 'CR']:
+        return len(records) == dicom_count and all('FileName' in r for r in records)
+    return records[0].get('FilesReadForMetadata') == 1 and records[0].get('TotalFilesInSeries') == dicom_count
+
+
+def read_dicom_header(path: str, specific_tags: Optional[List] = None):
+    """
+    读取 DICOM 头信息（不含像素数据），用于逐文件的元数据提取。
+
+    文件以只读 mmap 交给 pydicom 解析：内核只按需调入头部所在页面，逐个元素的小读取
+    直接从映射内存拷贝，不再经过缓冲文件对象。无法映射（空文件、不支持 mmap 的文件系统）
+    时回退为按路径读取。
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return pydicom.dcmread(path, force=True, stop_before_pixels=True, specific_tags=specific_tags)
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return pydicom.dcmread(f, force=True, stop_before_pixels=True, specific_tags=specific_tags)
+        with mm:
+            dcm = pydicom.dcmread(mm, force=True, stop_before_pixels=True, specific_tags=specific_tags)
+    dcm.filename = path
+    return dcm
+
+
+def _header_tags(keywords: List[str]) -> List[str]:
+    """将关键字列表转换为 dcmread 的 specific_tags（过滤掉 pydicom 无法识别的关键字）。"""
+    return list(_header_tags_cached(tuple(keywords)))
+
+
+@lru_cache(maxsize=32)
+def _header_tags_cached(keywords: Tuple[str, ...]) -> Tuple[str, ...]:
+    """按关键字元组缓存 _header_tags 的结果，各模态只计算一次。"""
+    tags = {'Modality', 'AccessionNumber', 'Rows', 'Columns'}
+    tags.update(k for k in keywords if tag_for_keyword(k) is not None)
+    return tuple(sorted(tags))
+
+
+def _excel_cell_value(value):
+    """将 DataFrame 单元格值转换为 xlsxwriter 可直接写入的类型。"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bool, int, float)):
+        if isinstance(value, float) and value != value:
+            return None
+        return value
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, 'item'):
+        try:
+            return value.item()
+        except Exception:
+            pass
+    return str(value)
+
+
+def _column_widths(df: pd.DataFrame) -> List[int]:
+    """按列计算 Excel 列宽（内容最长字符数 + 2，上限 50）。"""
+    widths: List[int] = []
+    for col in df.columns:
+        max_length = len(str(col))
+        if len(df):
+            lengths = df[col].map(lambda v: 0 if _excel_cell_value(v) is None else len(str(v)))
+            max_length = max(max_length, int(lengths.max()))
+        widths.append(min(max_length + 2, 50))
+    return widths
+
+
+def _write_excel_sheets(output_excel: str, sheets: List[Tuple[str, pd.DataFrame]]) -> None:
+    """
+    将多个 DataFrame 依次写入同一个 Excel 文件。
+
+    安装了 xlsxwriter 时使用 constant_memory 模式逐行流式写出（pandas 的
+    to_excel 按列生成单元格，与 constant_memory 不兼容，因此这里手动按行写入）；
+    否则回退到 openpyxl。
+    """
+    if xlsxwriter is not None:
+        # strings_to_urls=False：元数据字符串不做 URL 正则匹配，也不会受工作表 URL 数量上限影响
+        workbook = xlsxwriter.Workbook(output_excel, {'constant_memory': True, 'strings_to_urls': False})
+        try:
+            for sheet_name, sheet_df in sheets:
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, [str(col) for col in sheet_df.columns])
+                for row_idx, row in enumerate(sheet_df.itertuples(index=False, name=None), start=1):
+                    worksheet.write_row(row_idx, 0, [_excel_cell_value(v) for v in row])
+                for col_idx, width in enumerate(_column_widths(sheet_df)):
+                    worksheet.set_column(col_idx, col_idx, width)
+        finally:
+            workbook.close()
+        return
+
+    from openpyxl.utils import get_column_letter
+
+    with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
+        for sheet_name, sheet_df in sheets:
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            for col_idx, width in enumerate(_column_widths(sheet_df), start=1):
+                worksheet.column_dimensions[get_column_letter(col_idx)].width = width
+
+
+# Excel 主表中优先排在前面的列（其余列按首次出现顺序追加）
+_PRIORITY_COLUMNS = [
+    'SeriesFolder', 'FileName', 'SampleFileName', 'FileIndex',
+    'TotalFilesInSeries', 'FilesReadForMetadata', 'Low_quality', 'Low_quality_reason',
+    'PatientID', 'AccessionNumber', 'StudyDate', 'Modality',
+    'SeriesNumber', 'SeriesDescription', 'InstanceNumber', 'Rows', 'Columns',
+]
+
+
+def _records_to_columns(records: List[Dict], priority: List[str]) -> Dict[str, list]:
+    """将记录列表转为按列存放的字典，列序为 priority 中出现的列 + 其余列（首次出现顺序），缺失值为 NaN。"""
+    seen: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen[key] = None
+    ordered = [col for col in priority if col in seen]
+    priority_set = set(ordered)
+    ordered.extend(col for col in seen if col not in priority_set)
+    missing = float('nan')
+    return {col: [record.get(col, missing) for record in records] for col in ordered}
+
+
+def _parquet_enabled() -> bool:
+    """是否额外输出 Parquet 格式的元数据（需安装 pyarrow，环境变量 METADATA_PARQUET 控制）。"""
+    if pa is None:
+        return False
+    try:
+        return os.getenv('METADATA_PARQUET', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+    except Exception:
+        return False
+
+
+def _write_parquet_columns(parquet_path: str, columns: Dict[str, list]) -> None:
+    """
+    将列式元数据直接写为 Parquet（不经过 DataFrame），供程序化读取。
+
+    每列先按原值推断类型（NaN 视为空值）；类型混杂的列统一转为字符串。
+    """
+    arrays = []
+    for values in columns.values():
+        try:
+            arrays.append(pa.array(values, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            arrays.append(pa.array(
+                [None if v is None or (isinstance(v, float) and v != v) else str(v) for v in values],
+                type=pa.string()
+            ))
+    table = pa.Table.from_arrays(arrays, names=list(columns.keys()))
+    pq.write_table(table, parquet_path)
+
+
+def _metadata_workers(series_count: int) -> int:
+    """元数据提取的并发序列数，可通过环境变量 METADATA_WORKERS 调整。"""
+    try:
+        workers = int(os.getenv('METADATA_WORKERS', '0'))
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        workers = min(4, os.cpu_count() or 1)
+    return max(1, min(workers, series_count))
+
+
+def _extract_one_series(
+    organized_dir: str,
+    series_folder: str,
+    get_keywords: Callable[[str], List[str]],
+    get_converted_files: Callable[[str], Tuple[List[str], Optional[str]]],
+    assess_converted_file_quality: Callable[[str, Optional[str]], Union[ImageQualityResult, int]],
+    assess_series_quality_converted: Callable[[List[str], Optional[str], Optional[str]], Dict],
+) -> List[Dict]:
+    """提取单个序列文件夹的元数据记录（含质量评估），失败时返回已收集的部分。"""
+    series_records: List[Dict] = []
+    series_path = os.path.join(organized_dir, series_folder)
+
+    logger.info(f"📂 Processing series: {series_folder}")
+
+    converted_files, _ = get_converted_files(series_path)
+
+    # 一次 scandir 同时收集 DICOM、NIfTI 回退文件和缓存文件是否存在，后续不再列目录或 stat
+    dicom_files: List[str] = []
+    nifti_files: List[str] = []
+    has_cache = False
+    try:
+        with os.scandir(series_path) as it:
+            for entry in it:
+                name = entry.name
+                if name.endswith('.dcm'):
+                    if entry.is_file():
+                        dicom_files.append(entry.path)
+                elif name.endswith(('.nii.gz', '.nii')):
+                    nifti_files.append(name)
+                elif name == "dicom_metadata_cache.json":
+                    has_cache = True
+    except OSError as e:
+        logger.warning(f"   ⚠️  Cannot scan series folder {series_folder}: {e}")
+        return series_records
+
+    # 整理阶段已逐文件写入元数据缓存时，即使 DICOM 仍在也直接复用，避免再解析一遍
+    cache_path = os.path.join(series_path, "dicom_metadata_cache.json")
+    cache = _load_series_cache(cache_path) if has_cache else None
+    if not dicom_files or _cache_covers_dicoms(cache, len(dicom_files)):
+        cache_loaded = False
+        if cache is not None:
+            cached_records = []
+            try:
+                cached_records = cache.get('records', [])
+                cached_modality = str(cache.get('modality', '')).upper()
+                sample_tags = cache.get('sample_tags') or {}
+                current_keywords = get_keywords(cached_modality) if cached_modality else []
+                read_all = cached_modality in ['DR', 'MG', 'DX', 'CR']
+
+                if cached_records:
+                    for record in cached_records:
+                        for keyword in current_keywords:
+                            if keyword not in record:
+                                record[keyword] = str(sample_tags.get(keyword, "")) if sample_tags else ""
+                elif sample_tags:
+                    cached_records = [{
+                        'SeriesFolder': series_folder,
+                        'TotalFilesInSeries': 0,
+                        'FilesReadForMetadata': 0,
+                        'Modality': cached_modality
+                    }]
+                    for keyword in current_keywords:
+                        cached_records[0][keyword] = str(sample_tags.get(keyword, ""))
+
+                # Get AccessionNumber from cache or records
+                accession_number = ""
+                if cached_records and 'AccessionNumber' in cached_records[0]:
+                    accession_number = cached_records[0]['AccessionNumber']
+                elif sample_tags and 'AccessionNumber' in sample_tags:
+                    accession_number = sample_tags['AccessionNumber']
+                
+                # Add QC and fix information - wrap in try/except to not lose tags on QC failure
+                try:
+                    if read_all:
+                        converted_quality_results = [assess_converted_file_quality(p, cached_modality) for p in converted_files]
+                        for idx, record in enumerate(cached_records):
+                            quality_val, quality_reason = _extract_quality_value(
+                                converted_quality_results[idx] if idx < len(converted_quality_results) else 1
+                            )
+                            record['Low_quality'] = quality_val
+                            record['Low_quality_reason'] = quality_reason
+                            # Add fix information from detailed results
+                            if idx < len(converted_quality_results):
+                                detail = converted_quality_results[idx]
+                                # Handle both ImageQualityResult and dict
+                                if hasattr(detail, 'metrics'):
+                                    # ImageQualityResult object
+                                    metrics = detail.metrics
+                                    if metrics.get('fixed'):
+                                        record['Fixed'] = 'Yes'
+                                        fixes = metrics.get('fixes_applied', [])
+                                        if isinstance(fixes, list):
+                                            record['Fixes_applied'] = ', '.join(fixes)
+                                        else:
+                                            record['Fixes_applied'] = str(fixes)
+                                elif isinstance(detail, dict):
+                                    # Dict result
+                                    if detail.get('fixed'):
+                                        record['Fixed'] = 'Yes'
+                                        fixes = detail.get('fixes_applied', [])
+                                        if isinstance(fixes, list):
+                                            record['Fixes_applied'] = ', '.join(fixes)
+                                        else:
+                                            record['Fixes_applied'] = str(fixes)
+                            # Update FileName to converted filename format
+                            if idx < len(converted_files):
+                                record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
+                    else:
+                        series_quality_result = assess_series_quality_converted(converted_files, cached_modality, series_path)
+                        series_quality = series_quality_result.get('low_quality', 1)
+                        series_quality_reason = series_quality_result.get('low_quality_reason', '')
+                        if cached_records:
+                            cached_records[0]['Low_quality'] = series_quality
+                            cached_records[0]['Low_quality_reason'] = series_quality_reason
+                            # Add fix information
+                            fixed_count = series_quality_result.get('fixed_count', 0)
+                            if fixed_count > 0:
+                                cached_records[0]['Fixed_count'] = fixed_count
+                                cached_records[0]['Fixed_orientation'] = series_quality_result.get('fixed_orientation_count', 0)
+                                cached_records[0]['Fixed_grayscale'] = series_quality_result.get('fixed_grayscale_count', 0)
+                            # Update SampleFileName to first converted filename for 3D series
+                            if converted_files:
+                                cached_records[0]['SampleFileName'] = _build_converted_filename(accession_number, converted_files[0])
+                except Exception as e:
+                    print(f"     ⚠️  QC failed for {series_folder}, but preserving cached tags: {e}")
+                    # Still add the records without QC info
+                    for idx, record in enumerate(cached_records):
+                        if idx < len(converted_files):
+                            record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
+                
+                # Add all cached records to metadata
+                for record in cached_records:
+                    series_records.append(record)
+                cache_loaded = True
+                return series_records
+                
+            except Exception as e:
+                print(f"     ⚠️  Failed to load cache for {series_folder}: {e}")
+                # If we have cached_records, still use them even if QC failed
+                if cached_records:
+                    for record in cached_records:
+                        series_records.append(record)
+                    cache_loaded = True
+                    return series_records
+
+        # Fallback: only if no cache or cache failed to load
+        if not cache_loaded and not dicom_files:
+            logger.warning(f"     ⚠️  No DICOM files found in {series_folder}, trying NIfTI fallback")
+            if nifti_files:
+                metadata = {
+                    'SeriesFolder': series_folder,
+                    'ConvertedToNIfTI': 'Yes',
+                    'NIfTIFile': nifti_files[0],
+                    'TotalFilesInSeries': 1
+                }
+                series_records.append(metadata)
+                print(f"     ✅ Added NIfTI fallback for {series_folder}")
+            else:
+                print(f"     ❌ No NIfTI files either in {series_folder}")
+            return series_records
+
+    try:
+        # scandir 顺序不固定，取路径最小者作样本，保证多次运行选中同一文件（O(N)，无需排序）
+        sample_file = min(dicom_files)
+        # 元数据只需头信息，跳过像素数据
+        dcm = pydicom.dcmread(sample_file, force=True, stop_before_pixels=True)
+        modality = getattr(dcm, 'Modality', '')
+        need_read_all = modality in ['DR', 'MG', 'DX', 'CR']
+
+        current_keywords = get_keywords(modality)
+        keyword_tags = resolve_keyword_tags(current_keywords)
+
+        # Get AccessionNumber from the sample DICOM
+        accession_number = getattr(dcm, 'AccessionNumber', '')
+        
+        if need_read_all:
+            print(f"   ℹ️  Detected {modality} modality; will read all {len(dicom_files)} DICOM files")
+            records: List[Dict] = []
+            header_tags = _header_tags(current_keywords)
+            for idx, dicom_file in enumerate(dicom_files):
+                try:
+                    dcm = read_dicom_header(dicom_file, specific_tags=header_tags)
+                    metadata = {
+                        'SeriesFolder': series_folder,
+                        'FileName': os.path.basename(dicom_file),
+                        'FileIndex': idx + 1,
+                        'TotalFilesInSeries': len(dicom_files)
+                    }
+                    metadata.update(read_keyword_values(dcm, keyword_tags))
+                    records.append(metadata)
+                except Exception:
+                    continue
+
+            converted_quality_results = [assess_converted_file_quality(p, modality) for p in converted_files]
+            for idx, record in enumerate(records):
+                quality_val, quality_reason = _extract_quality_value(
+                    converted_quality_results[idx] if idx < len(converted_quality_results) else 1
+                )
+                record['Low_quality'] = quality_val
+                record['Low_quality_reason'] = quality_reason
+                # Add fix information
+                if idx < len(converted_quality_results):
+                    detail = converted_quality_results[idx]
+                    # Handle both ImageQualityResult and dict
+                    if hasattr(detail, 'metrics'):
+                        # ImageQualityResult object
+                        metrics = detail.metrics
+                        if metrics.get('fixed'):
+                            record['Fixed'] = 'Yes'
+                            fixes = metrics.get('fixes_applied', [])
+                            if isinstance(fixes, list):
+                                record['Fixes_applied'] = ', '.join(fixes)
+                            else:
+                                record['Fixes_applied'] = str(fixes)
+                    elif isinstance(detail, dict):
+                        # Dict result
+                        if detail.get('fixed'):
+                            record['Fixed'] = 'Yes'
+                            fixes = detail.get('fixes_applied', [])
+                            if isinstance(fixes, list):
+                                record['Fixes_applied'] = ', '.join(fixes)
+                            else:
+                                record['Fixes_applied'] = str(fixes)
+                # Update FileName to converted filename format: AccessionNumber/filename
+                if idx < len(converted_files):
+                    record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
+                series_records.append(record)
+
+                if (idx + 1) % 10 == 0:
+                    print(f"      Processed {idx + 1}/{len(records)} files...")
+        else:
+            print(f"   ℹ️  {modality} modality; reading representative file only")
+            metadata = {
+                'SeriesFolder': series_folder,
+                'SampleFileName': os.path.basename(sample_file),
+                'TotalFilesInSeries': len(dicom_files),
+                'FilesReadForMetadata': 1
+            }
+            metadata.update(read_keyword_values(dcm, keyword_tags))
+            del dcm
+            series_quality_result = assess_series_quality_converted(converted_files, modality, series_path)
+            metadata['Low_quality'] = series_quality_result.get('low_quality', 1)
+            metadata['Low_quality_reason'] = series_quality_result.get('low_quality_reason', '')
+            # Add fix information
+            fixed_count = series_quality_result.get('fixed_count', 0)
+            if fixed_count > 0:
+                metadata['Fixed_count'] = fixed_count
+                metadata['Fixed_orientation'] = series_quality_result.get('fixed_orientation_count', 0)
+                metadata['Fixed_grayscale'] = series_quality_result.get('fixed_grayscale_count', 0)
+            # Update SampleFileName to first converted filename for 3D series
+            if converted_files:
+                metadata['SampleFileName'] = _build_converted_filename(accession_number, converted_files[0])
+            series_records.append(metadata)
+
+    except Exception as e:
+        logger.error(f"     ❌ Failed processing series: {e}")
+        return series_records
+    return series_records
+
+
 def extract_dicom_metadata(
     organized_dir: str,
     output_excel: Optional[str],
@@ -87,14 +634,15 @@ def extract_dicom_metadata(
     get_converted_files: Callable[[str], Tuple[List[str], Optional[str]]],
     assess_converted_file_quality: Callable[[str, Optional[str]], Union[ImageQualityResult, int]],
     assess_series_quality_converted: Callable[[List[str], Optional[str], Optional[str]], Dict],
-    append_mr_cleaned_sheet: Callable[[pd.DataFrame, str], None],
+    build_mr_cleaned_df: Callable[[pd.DataFrame], Optional[pd.DataFrame]],
+    records_ready: Optional[Callable[[], None]] = None,
 ) -> Optional[str]:
     """
     从已整理的 DICOM 目录中提取元数据并生成 Excel 报告。
 
     遍历 organized_dir 下的所有序列文件夹，读取 DICOM 文件的元数据标签，
     根据不同模态提取相应关键字，评估转换后文件的质量，并将结果导出为
-    Excel 文件（包含 DICOM_Metadata 和 Series_Summary 两个工作表）。
+    Excel 文件（包含 DICOM_Metadata、Series_Summary 及可选的 MR_Cleaned 工作表）。
 
     参数:
         organized_dir: 已整理的 DICOM 目录路径，每个子文件夹代表一个序列
@@ -103,7 +651,9 @@ def extract_dicom_metadata(
         get_converted_files: 回调函数，接收序列路径，返回 (转换文件列表, 附加信息) 元组
         assess_converted_file_quality: 回调函数，接收(文件路径, 模态)，返回质量评分（0=正常，1=低质量）或 ImageQualityResult
         assess_series_quality_converted: 回调函数，接收(文件路径列表, 模态, 序列目录)，返回质量汇总字典（包含 low_quality_reason）
-        append_mr_cleaned_sheet: 回调函数，接收 DataFrame 和 Excel 路径，用于添加 MR 清洗结果
+        build_mr_cleaned_df: 回调函数，接收 DataFrame，返回 MR 清洗结果（写入 MR_Cleaned 工作表，None 表示跳过）
+        records_ready: 可选回调，所有序列的记录与质量评估（含 NIfTI 自动修复）完成后、写 Excel 前调用；
+            此后不再修改 organized_dir 中的文件，调用方可据此开始打包
 
     返回:
         生成的 Excel 文件路径，提取失败则返回 None
@@ -115,276 +665,32 @@ def extract_dicom_metadata(
     logger.info("📊 Extracting DICOM metadata...")
     logger.info(f"   Organized dir: {organized_dir}")
 
-    all_metadata: List[Dict] = []
-
     # List all series folders (skip 'organized' subdirectory if exists - legacy compatibility)
-    series_folders = [f for f in os.listdir(organized_dir)
-                      if os.path.isdir(os.path.join(organized_dir, f)) and f != 'organized']
+    # os.scandir 的 DirEntry 自带类型信息，避免对每个条目再 stat 一次
+    with os.scandir(organized_dir) as it:
+        series_folders = [entry.name for entry in it
+                          if entry.is_dir() and entry.name != 'organized']
     logger.info(f"   Found {len(series_folders)} series folders: {series_folders}")
 
-    for series_folder in series_folders:
-        series_path = os.path.join(organized_dir, series_folder)
-        if not os.path.isdir(series_path):
-            continue
-
-        logger.info(f"📂 Processing series: {series_folder}")
-
-        converted_files, _ = get_converted_files(series_path)
-
-        dicom_files: List[str] = []
-        for file in os.listdir(series_path):
-            filepath = os.path.join(series_path, file)
-            if file.endswith('.dcm') and os.path.isfile(filepath):
-                dicom_files.append(filepath)
-
-        if not dicom_files:
-            cache_path = os.path.join(series_path, "dicom_metadata_cache.json")
-            if os.path.exists(cache_path):
-                cache_loaded = False
-                cached_records = []
-                try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache = json.load(f)
-                    cached_records = cache.get('records', [])
-                    cached_modality = str(cache.get('modality', '')).upper()
-                    sample_tags = cache.get('sample_tags') or {}
-                    current_keywords = get_keywords(cached_modality) if cached_modality else []
-                    read_all = cached_modality in ['DR', 'MG', 'DX', 'CR']
-
-                    if cached_records:
-                        for record in cached_records:
-                            for keyword in current_keywords:
-                                if keyword not in record:
-                                    record[keyword] = str(sample_tags.get(keyword, "")) if sample_tags else ""
-                    elif sample_tags:
-                        cached_records = [{
-                            'SeriesFolder': series_folder,
-                            'TotalFilesInSeries': 0,
-                            'FilesReadForMetadata': 0,
-                            'Modality': cached_modality
-                        }]
-                        for keyword in current_keywords:
-                            cached_records[0][keyword] = str(sample_tags.get(keyword, ""))
-
-                    # Get AccessionNumber from cache or records
-                    accession_number = ""
-                    if cached_records and 'AccessionNumber' in cached_records[0]:
-                        accession_number = cached_records[0]['AccessionNumber']
-                    elif sample_tags and 'AccessionNumber' in sample_tags:
-                        accession_number = sample_tags['AccessionNumber']
-                    
-                    # Add QC and fix information - wrap in try/except to not lose tags on QC failure
-                    try:
-                        if read_all:
-                            converted_quality_results = [assess_converted_file_quality(p, cached_modality) for p in converted_files]
-                            for idx, record in enumerate(cached_records):
-                                quality_val, quality_reason = _extract_quality_value(
-                                    converted_quality_results[idx] if idx < len(converted_quality_results) else 1
-                                )
-                                record['Low_quality'] = quality_val
-                                record['Low_quality_reason'] = quality_reason
-                                # Add fix information from detailed results
-                                if idx < len(converted_quality_results):
-                                    detail = converted_quality_results[idx]
-                                    # Handle both ImageQualityResult and dict
-                                    if hasattr(detail, 'metrics'):
-                                        # ImageQualityResult object
-                                        metrics = detail.metrics
-                                        if metrics.get('fixed'):
-                                            record['Fixed'] = 'Yes'
-                                            fixes = metrics.get('fixes_applied', [])
-                                            if isinstance(fixes, list):
-                                                record['Fixes_applied'] = ', '.join(fixes)
-                                            else:
-                                                record['Fixes_applied'] = str(fixes)
-                                    elif isinstance(detail, dict):
-                                        # Dict result
-                                        if detail.get('fixed'):
-                                            record['Fixed'] = 'Yes'
-                                            fixes = detail.get('fixes_applied', [])
-                                            if isinstance(fixes, list):
-                                                record['Fixes_applied'] = ', '.join(fixes)
-                                            else:
-                                                record['Fixes_applied'] = str(fixes)
-                                # Update FileName to converted filename format
-                                if idx < len(converted_files):
-                                    record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
-                        else:
-                            series_quality_result = assess_series_quality_converted(converted_files, cached_modality, series_path)
-                            series_quality = series_quality_result.get('low_quality', 1)
-                            series_quality_reason = series_quality_result.get('low_quality_reason', '')
-                            if cached_records:
-                                cached_records[0]['Low_quality'] = series_quality
-                                cached_records[0]['Low_quality_reason'] = series_quality_reason
-                                # Add fix information
-                                fixed_count = series_quality_result.get('fixed_count', 0)
-                                if fixed_count > 0:
-                                    cached_records[0]['Fixed_count'] = fixed_count
-                                    cached_records[0]['Fixed_orientation'] = series_quality_result.get('fixed_orientation_count', 0)
-                                    cached_records[0]['Fixed_grayscale'] = series_quality_result.get('fixed_grayscale_count', 0)
-                                # Update SampleFileName to first converted filename for 3D series
-                                if converted_files:
-                                    cached_records[0]['SampleFileName'] = _build_converted_filename(accession_number, converted_files[0])
-                    except Exception as e:
-                        print(f"     ⚠️  QC failed for {series_folder}, but preserving cached tags: {e}")
-                        # Still add the records without QC info
-                        for idx, record in enumerate(cached_records):
-                            if idx < len(converted_files):
-                                record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
-                    
-                    # Add all cached records to metadata
-                    for record in cached_records:
-                        all_metadata.append(record)
-                    cache_loaded = True
-                    continue
-                    
-                except Exception as e:
-                    print(f"     ⚠️  Failed to load cache for {series_folder}: {e}")
-                    # If we have cached_records, still use them even if QC failed
-                    if cached_records:
-                        for record in cached_records:
-                            all_metadata.append(record)
-                        cache_loaded = True
-                        continue
-
-            # Fallback: only if no cache or cache failed to load
-            if not cache_loaded:
-                logger.warning(f"     ⚠️  No DICOM files found in {series_folder}, trying NIfTI fallback")
-                nifti_files = [f for f in os.listdir(series_path) if f.endswith(('.nii.gz', '.nii'))]
-                if nifti_files:
-                    metadata = {
-                        'SeriesFolder': series_folder,
-                        'ConvertedToNIfTI': 'Yes',
-                        'NIfTIFile': nifti_files[0],
-                        'TotalFilesInSeries': 1
-                    }
-                    all_metadata.append(metadata)
-                    print(f"     ✅ Added NIfTI fallback for {series_folder}")
-                else:
-                    print(f"     ❌ No NIfTI files either in {series_folder}")
-                continue
+    workers = _metadata_workers(len(series_folders))
+    # 回调是客户端的绑定方法（持有套接字/锁），无法跨进程序列化，故使用线程池；
+    # 文件 I/O 与质量评估中的 numpy/zlib 运算会释放 GIL，多序列可重叠执行
+    def _one(series_folder: str) -> List[Dict]:
+        return _extract_one_series(
+            organized_dir, series_folder, get_keywords, get_converted_files,
+            assess_converted_file_quality, assess_series_quality_converted,
+        )
+
+    # 各序列的记录列表按文件夹顺序直接串接为一个列表，不再保留中间的序列结果列表
+    all_metadata: List[Dict]
+    if workers <= 1:
+        all_metadata = list(chain.from_iterable(map(_one, series_folders)))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            all_metadata = list(chain.from_iterable(executor.map(_one, series_folders)))
 
-        try:
-            sample_file = dicom_files[0]
-            dcm = pydicom.dcmread(sample_file, force=True)
-            modality = getattr(dcm, 'Modality', '')
-            need_read_all = modality in ['DR', 'MG', 'DX', 'CR']
-
-            current_keywords = get_keywords(modality)
-
-            # Get AccessionNumber from the sample DICOM
-            accession_number = getattr(dcm, 'AccessionNumber', '')
-            
-            if need_read_all:
-                print(f"   ℹ️  Detected {modality} modality; will read all {len(dicom_files)} DICOM files")
-                records: List[Dict] = []
-                for idx, dicom_file in enumerate(dicom_files):
-                    try:
-                        dcm = pydicom.dcmread(dicom_file, force=True)
-                        metadata = {
-                            'SeriesFolder': series_folder,
-                            'FileName': os.path.basename(dicom_file),
-                            'FileIndex': idx + 1,
-                            'TotalFilesInSeries': len(dicom_files)
-                        }
-                        for keyword in current_keywords:
-                            try:
-                                value = getattr(dcm, keyword, None)
-                                if value is not None:
-                                    if hasattr(value, '__len__') and not isinstance(value, str):
-                                        if len(value) == 1:
-                                            value = value[0]
-                                        else:
-                                            value = str(value)
-                                    elif hasattr(value, 'value'):
-                                        value = value.value
-                                    metadata[keyword] = str(value)
-                                else:
-                                    metadata[keyword] = ""
-                            except Exception:
-                                metadata[keyword] = ""
-                        records.append(metadata)
-                    except Exception:
-                        continue
-
-                converted_quality_results = [assess_converted_file_quality(p, modality) for p in converted_files]
-                for idx, record in enumerate(records):
-                    quality_val, quality_reason = _extract_quality_value(
-                        converted_quality_results[idx] if idx < len(converted_quality_results) else 1
-                    )
-                    record['Low_quality'] = quality_val
-                    record['Low_quality_reason'] = quality_reason
-                    # Add fix information
-                    if idx < len(converted_quality_results):
-                        detail = converted_quality_results[idx]
-                        # Handle both ImageQualityResult and dict
-                        if hasattr(detail, 'metrics'):
-                            # ImageQualityResult object
-                            metrics = detail.metrics
-                            if metrics.get('fixed'):
-                                record['Fixed'] = 'Yes'
-                                fixes = metrics.get('fixes_applied', [])
-                                if isinstance(fixes, list):
-                                    record['Fixes_applied'] = ', '.join(fixes)
-                                else:
-                                    record['Fixes_applied'] = str(fixes)
-                        elif isinstance(detail, dict):
-                            # Dict result
-                            if detail.get('fixed'):
-                                record['Fixed'] = 'Yes'
-                                fixes = detail.get('fixes_applied', [])
-                                if isinstance(fixes, list):
-                                    record['Fixes_applied'] = ', '.join(fixes)
-                                else:
-                                    record['Fixes_applied'] = str(fixes)
-                    # Update FileName to converted filename format: AccessionNumber/filename
-                    if idx < len(converted_files):
-                        record['FileName'] = _build_converted_filename(accession_number, converted_files[idx])
-                    all_metadata.append(record)
-
-                    if (idx + 1) % 10 == 0:
-                        print(f"      Processed {idx + 1}/{len(records)} files...")
-            else:
-                print(f"   ℹ️  {modality} modality; reading representative file only")
-                metadata = {
-                    'SeriesFolder': series_folder,
-                    'SampleFileName': os.path.basename(sample_file),
-                    'TotalFilesInSeries': len(dicom_files),
-                    'FilesReadForMetadata': 1
-                }
-                for keyword in current_keywords:
-                    try:
-                        value = getattr(dcm, keyword, None)
-                        if value is not None:
-                            if hasattr(value, '__len__') and not isinstance(value, str):
-                                if len(value) == 1:
-                                    value = value[0]
-                                else:
-                                    value = str(value)
-                            elif hasattr(value, 'value'):
-                                value = value.value
-                            metadata[keyword] = str(value)
-                        else:
-                            metadata[keyword] = ""
-                    except Exception:
-                        metadata[keyword] = ""
-                series_quality_result = assess_series_quality_converted(converted_files, modality, series_path)
-                metadata['Low_quality'] = series_quality_result.get('low_quality', 1)
-                metadata['Low_quality_reason'] = series_quality_result.get('low_quality_reason', '')
-                # Add fix information
-                fixed_count = series_quality_result.get('fixed_count', 0)
-                if fixed_count > 0:
-                    metadata['Fixed_count'] = fixed_count
-                    metadata['Fixed_orientation'] = series_quality_result.get('fixed_orientation_count', 0)
-                    metadata['Fixed_grayscale'] = series_quality_result.get('fixed_grayscale_count', 0)
-                # Update SampleFileName to first converted filename for 3D series
-                if converted_files:
-                    metadata['SampleFileName'] = _build_converted_filename(accession_number, converted_files[0])
-                all_metadata.append(metadata)
-
-        except Exception as e:
-            logger.error(f"     ❌ Failed processing series: {e}")
-            continue
+    if records_ready is not None:
+        records_ready()
 
     if not all_metadata:
         logger.error(f"❌ No metadata extracted from {organized_dir}")
@@ -392,61 +698,42 @@ def extract_dicom_metadata(
         return None
 
     try:
-        df = pd.DataFrame(all_metadata)
-
-        column_order: List[str] = []
-        priority_columns = ['SeriesFolder', 'FileName', 'SampleFileName', 'FileIndex',
-                            'TotalFilesInSeries', 'FilesReadForMetadata', 'Low_quality', 'Low_quality_reason']
-        for col in priority_columns:
-            if col in df.columns:
-                column_order.append(col)
-
-        important_fields = ['PatientID', 'AccessionNumber', 'StudyDate', 'Modality',
-                            'SeriesNumber', 'SeriesDescription', 'InstanceNumber', 'Rows', 'Columns']
-        for field in important_fields:
-            if field in df.columns and field not in column_order:
-                column_order.append(field)
-
-        for col in df.columns:
-            if col not in column_order:
-                column_order.append(col)
-
-        df = df[column_order]
-
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='DICOM_Metadata', index=False)
-
-            summary_data: List[Dict] = []
-            for series_folder in df['SeriesFolder'].unique():
-                series_df = df[df['SeriesFolder'] == series_folder]
-                summary_row = {
-                    'SeriesFolder': series_folder,
-                    'FileCount': len(series_df),
-                    'Modality': series_df['Modality'].iloc[0] if 'Modality' in series_df.columns else '',
-                    'SeriesDescription': series_df['SeriesDescription'].iloc[0] if 'SeriesDescription' in series_df.columns else '',
-                    'PatientID': series_df['PatientID'].iloc[0] if 'PatientID' in series_df.columns else '',
-                    'AccessionNumber': series_df['AccessionNumber'].iloc[0] if 'AccessionNumber' in series_df.columns else '',
-                    'StudyDate': series_df['StudyDate'].iloc[0] if 'StudyDate' in series_df.columns else ''
-                }
-                summary_data.append(summary_row)
-
-            if summary_data:
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, sheet_name='Series_Summary', index=False)
-
-            for sheet_name in writer.sheets:
-                worksheet = writer.sheets[sheet_name]
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except Exception:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+        # 先按列汇总并排好列序再一次性构建 DataFrame，省去逐行字典转换和 df[column_order] 的整表复制
+        columns = _records_to_columns(all_metadata, _PRIORITY_COLUMNS)
+        if _parquet_enabled():
+            parquet_path = os.path.splitext(output_excel)[0] + '.parquet'
+            try:
+                _write_parquet_columns(parquet_path, columns)
+                logger.info(f"   Parquet copy: {parquet_path}")
+            except Exception as e:
+                logger.warning(f"   ⚠️  Failed to write Parquet copy: {e}")
+        df = pd.DataFrame(columns, copy=False)
+
+        summary_data: List[Dict] = []
+        for series_folder in df['SeriesFolder'].unique():
+            series_df = df[df['SeriesFolder'] == series_folder]
+            summary_row = {
+                'SeriesFolder': series_folder,
+                'FileCount': len(series_df),
+                'Modality': series_df['Modality'].iloc[0] if 'Modality' in series_df.columns else '',
+                'SeriesDescription': series_df['SeriesDescription'].iloc[0] if 'SeriesDescription' in series_df.columns else '',
+                'PatientID': series_df['PatientID'].iloc[0] if 'PatientID' in series_df.columns else '',
+                'AccessionNumber': series_df['AccessionNumber'].iloc[0] if 'AccessionNumber' in series_df.columns else '',
+                'StudyDate': series_df['StudyDate'].iloc[0] if 'StudyDate' in series_df.columns else ''
+            }
+            summary_data.append(summary_row)
+
+        sheets: List[Tuple[str, pd.DataFrame]] = [('DICOM_Metadata', df)]
+        if summary_data:
+            sheets.append(('Series_Summary', pd.DataFrame(summary_data)))
+
+        # MR 清洗结果与主表一次性写出，避免重新打开整个工作簿追加 sheet
+        cleaned_df = build_mr_cleaned_df(df)
+        if cleaned_df is not None:
+            sheets.append(('MR_Cleaned', cleaned_df))
+        _write_excel_sheets(output_excel, sheets)
+        if cleaned_df is not None:
+            print("✅ MR_clean: MR_Cleaned sheet written.")
 
         total_files_read = len(df)
         dr_mg_dx_series = df[df['Modality'].isin(['DR', 'MG', 'DX'])]['SeriesFolder'].nunique() if 'Modality' in df.columns else 0
@@ -457,7 +744,6 @@ def extract_dicom_metadata(
         if dr_mg_dx_series > 0:
             print(f"📋 DR/MG/DX series count: {dr_mg_dx_series} (all files read)")
 
-        append_mr_cleaned_sheet(df, output_excel)
         return output_excel
 
     except Exception as e:
@@ -9,7 +9,6 @@ import logging
 import os
 import shutil
 import time
-import json
 import hashlib
 from typing import Dict, List, Any, Optional, Tuple
 
@@ -18,6 +17,7 @@ logger = logging.getLogger('DICOMApp')
 
 # 从常量模块导入获取当前关键词的函数
 from src.core.constants import get_derived_keywords
+from src.utils.json_cache import read_json_cache
 
 
 def _is_derived_series(series_desc: str, image_type=None) -> bool:
@@ -123,7 +123,7 @@ def organize_dicom_files(
         logger.info(f"   📂 Series {series_folder}: found {len(files_in_dir)} files")
         for file in files_in_dir:
             filepath = os.path.join(series_path, file)
-            if os.path.isfile(filepath) and client._is_dicom_file(filepath):
+            if os.path.isfile(filepath) and client._is_dicom_file(filepath, deep_scan=True):
                 normalized_path = filepath
                 file_root, file_ext = os.path.splitext(filepath)
                 if file_ext != '.dcm':
@@ -176,7 +176,11 @@ def organize_dicom_files(
             modality = ''
             try:
                 import pydicom
-                sample_dcm = pydicom.dcmread(dicom_files[0], force=True)
+                # 样本仅用于模态与样本标签：只解析所需标签，不读取像素数据
+                sample_dcm = pydicom.dcmread(
+                    dicom_files[0], force=True, stop_before_pixels=True,
+                    specific_tags=client._get_sample_header_tags()
+                )
                 modality = str(getattr(sample_dcm, 'Modality', ''))
             except Exception:
                 modality = ''
@@ -265,8 +269,7 @@ def process_single_series(
         cache_file = os.path.join(series_path, "dicom_metadata_cache.json")
         if os.path.exists(cache_file):
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_metadata = json.load(f)
+                cached_metadata = read_json_cache(cache_file)
             except Exception:
                 pass
 
@@ -275,8 +278,7 @@ def process_single_series(
     checksum_file = os.path.join(os.path.dirname(series_path), '.checksums.json')
     if os.path.exists(checksum_file) and use_cached_metadata:
         try:
-            with open(checksum_file, 'r', encoding='utf-8') as f:
-                checksum_cache = json.load(f)
+            checksum_cache = read_json_cache(checksum_file)
         except Exception:
             pass
 
@@ -304,7 +306,7 @@ def process_single_series(
             dicom_files = []
             for file in os.listdir(series_path):
                 filepath = os.path.join(series_path, file)
-                if os.path.isfile(filepath) and client._is_dicom_file(filepath):
+                if os.path.isfile(filepath) and client._is_dicom_file(filepath, deep_scan=True):
                     normalized_path = filepath
                     file_root, file_ext = os.path.splitext(filepath)
                     if file_ext != '.dcm':
@@ -389,7 +391,11 @@ def process_single_series(
     if not modality:
         try:
             import pydicom
-            sample_dcm = pydicom.dcmread(dicom_files[0], force=True)
+            # 样本仅用于模态与样本标签：只解析所需标签，不读取像素数据
+            sample_dcm = pydicom.dcmread(
+                dicom_files[0], force=True, stop_before_pixels=True,
+                specific_tags=client._get_sample_header_tags()
+            )
             modality = str(getattr(sample_dcm, 'Modality', ''))
         except Exception:
             modality = ''
@@ -8,13 +8,14 @@
 
 import os
 import re
-import json
 import numpy as np
 import nibabel as nib
 from PIL import Image, ImageDraw, ImageFont
 from typing import Tuple, Optional, Callable, List
 from dotenv import load_dotenv
 
+from src.utils.json_cache import read_json_cache
+
 
 def _get_project_root() -> str:
     try:
@@ -307,9 +308,12 @@ def apply_windowing(image_2d: np.ndarray, dcm, modality: str = None) -> np.ndarr
     if high <= low:
         high = low + 1.0
 
-    img = np.clip(img, low, high)
-    img = (img - low) / (high - low)
-    img = (img * 255.0).astype(np.uint8)
+    # img 已是 astype 生成的副本：原地裁剪与缩放，避免额外的同尺寸 float32 临时数组
+    np.clip(img, low, high, out=img)
+    img -= low
+    img /= (high - low)
+    img *= 255.0
+    img = img.astype(np.uint8)
 
     # 处理 MONOCHROME1 反色
     try:
@@ -428,7 +432,8 @@ def _load_image_2d(preview_file: str, is_3d: bool, preview_idx: int, orientation
                 image_2d = data if data.ndim == 2 else data[0, :, :]
 
         elif preview_file.endswith(('.nii', '.nii.gz')):
-            img = nib.load(preview_file)
+            # 保持文件句柄打开：4D 首帧切片读取时（配合 indexed_gzip）可复用 gzip 索引，避免重复解压
+            img = nib.load(preview_file, keep_file_open=True)
 
             # 对多参数/时间序列（4D及以上）先提取第一个序列，
             # 再进行 canonical 重排，避免 4D 与 3D 方向处理不一致。
@@ -579,8 +584,8 @@ def normalize_orientation(orientation: str, dcm=None) -> str:
         try:
             iop = getattr(dcm, 'ImageOrientationPatient', None)
             if iop is not None and len(iop) == 6:
-                row_vec = np.array([float(iop[0]), float(iop[1]), float(iop[2])])
-                col_vec = np.array([float(iop[3]), float(iop[4]), float(iop[5])])
+                row_vec = np.asarray(iop[:3], dtype=np.float64)
+                col_vec = np.asarray(iop[3:6], dtype=np.float64)
                 normal = np.cross(row_vec, col_vec)
 
                 # 即使被判定为斜位，法向量的最大分量仍指示最接近的方位
@@ -634,8 +639,8 @@ def _get_orientation_from_dcm(dcm) -> str:
             return 'UNKNOWN'
 
         # 转换为numpy数组
-        row_vec = np.array([float(iop[0]), float(iop[1]), float(iop[2])])
-        col_vec = np.array([float(iop[3]), float(iop[4]), float(iop[5])])
+        row_vec = np.asarray(iop[:3], dtype=np.float64)
+        col_vec = np.asarray(iop[3:6], dtype=np.float64)
 
         # 计算法向量
         normal = np.cross(row_vec, col_vec)
@@ -696,8 +701,7 @@ def _correct_image_orientation(
             cache_path = os.path.join(series_dir, "dicom_metadata_cache.json")
             if os.path.exists(cache_path):
                 try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache = json.load(f)
+                    cache = read_json_cache(cache_path)
                     records = cache.get('records') or []
                     conversion_map = cache.get('conversion_map') or {}
                 except Exception:
@@ -778,8 +782,7 @@ def _get_file_dcm_info(
     try:
         cache_path = os.path.join(series_dir, "dicom_metadata_cache.json")
         if os.path.exists(cache_path):
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache = json.load(f)
+            cache = read_json_cache(cache_path)
             conversion_map = cache.get('conversion_map') or {}
             
             # 尝试从conversion_map获取
@@ -1028,7 +1031,7 @@ def _load_3d_volume(
             return data.astype(np.float32) if data.ndim == 3 else None
 
         elif preview_file.endswith(('.nii', '.nii.gz')):
-            img = nib.load(preview_file)
+            img = nib.load(preview_file, keep_file_open=True)
 
             # 处理4D+数据，提取第一个volume
             if len(img.shape) > 3:
@@ -1139,7 +1142,7 @@ def _generate_3d_triplane_preview(
 
         # 加载原始3D数据用于提取三视图（使用nibabel canonical格式）
         if preview_file.endswith(('.nii', '.nii.gz')):
-            img = nib.load(preview_file)
+            img = nib.load(preview_file, keep_file_open=True)
             if len(img.shape) > 3:
                 try:
                     slicer = (slice(None), slice(None), slice(None)) + (0,) * (len(img.shape) - 3)
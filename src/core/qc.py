@@ -8,7 +8,6 @@
 支持基于模态（Modality）的可配置阈值，从环境变量读取配置。
 """
 
-import json
 import logging
 import os
 from collections import Counter
@@ -18,6 +17,7 @@ from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
 import nibabel as nib
 from src.core.fix_nifti import fix_nifti_file
+from src.utils.json_cache import read_json_cache
 
 logger = logging.getLogger('DICOMApp')
 
@@ -370,7 +370,13 @@ def _apply_rescale(pixel_data: np.ndarray, dcm) -> np.ndarray:
     try:
         slope = float(getattr(dcm, 'RescaleSlope', 1.0))
         intercept = float(getattr(dcm, 'RescaleIntercept', 0.0))
-        return pixel_data.astype(np.float32) * slope + intercept
+        # 仅转换一次 float32（必要的拷贝，不改动调用方数组），乘加原地完成，不再分配临时整幅数组
+        out = pixel_data.astype(np.float32)
+        if slope != 1.0:
+            np.multiply(out, slope, out=out)
+        if intercept != 0.0:
+            np.add(out, intercept, out=out)
+        return out
     except Exception:
         return pixel_data.astype(np.float32)
 
@@ -408,7 +414,8 @@ def assess_image_quality(dcm, modality: Optional[str] = None) -> ImageQualityRes
         ImageQualityResult: 质量评估结果
     """
     try:
-        if not hasattr(dcm, 'pixel_array'):
+        # 只检查像素数据元素是否存在，不为判断存在性而触发整幅解码
+        if not any(keyword in dcm for keyword in ('PixelData', 'FloatPixelData', 'DoubleFloatPixelData')):
             return ImageQualityResult(
                 is_low_quality=True,
                 reasons=[QualityReasons.NO_PIXEL_DATA],
@@ -419,8 +426,8 @@ def assess_image_quality(dcm, modality: Optional[str] = None) -> ImageQualityRes
         if modality is None:
             modality = getattr(dcm, 'Modality', '')
 
-        pixel_data = dcm.pixel_array.astype(np.float32)
-        pixel_data = _apply_rescale(pixel_data, dcm)
+        # _apply_rescale 内部已转换为 float32，无需预先再复制一份
+        pixel_data = _apply_rescale(dcm.pixel_array, dcm)
         pixel_data = _apply_photometric(pixel_data, dcm)
         return assess_image_quality_from_array(pixel_data, modality)
     except Exception as e:
@@ -743,8 +750,7 @@ def assess_converted_file_quality(
             cache_path = os.path.join(file_dir, "dicom_metadata_cache.json")
             if os.path.exists(cache_path):
                 try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache = json.load(f)
+                    cache = read_json_cache(cache_path)
                     dicom_metadata = cache.get('sample_tags', {})
                 except Exception:
                     pass
@@ -941,8 +947,7 @@ def assess_series_quality_converted(
             cache_path = os.path.join(series_dir, "dicom_metadata_cache.json")
             if os.path.exists(cache_path):
                 try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache = json.load(f)
+                    cache = read_json_cache(cache_path)
                     dicom_metadata = cache.get('sample_tags', {})
                     conversion_map = cache.get('conversion_map', {})
                 except Exception as e:
@@ -5,6 +5,8 @@
 提供通用的辅助函数和工具类。
 """
 
-from src.utils.packaging import create_result_zip
+from src.utils.json_cache import read_json_cache, write_json_cache
+from src.utils.packaging import append_files_to_zip, create_result_zip, stream_result_zip
+from src.utils.task_history import TaskHistoryStore
 
-__all__ = ["create_result_zip"]
+__all__ = ["TaskHistoryStore", "append_files_to_zip", "create_result_zip", "read_json_cache", "stream_result_zip", "write_json_cache"]
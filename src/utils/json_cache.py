@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 缓存读写工具模块
+
+序列目录下的 dicom_metadata_cache.json 等缓存文件只供程序读取，
+因此以紧凑格式写出；安装了 orjson 时使用其 C 实现序列化与解析。
+调试时可设置环境变量 DEBUG_CACHE=true 改为缩进格式输出，便于人工查看。
+"""
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 可选依赖：缺失时回退到标准库 json
+    orjson = None
+
+
+def _debug_cache_enabled() -> bool:
+    """是否以缩进格式写出缓存（环境变量 DEBUG_CACHE，默认关闭）。"""
+    try:
+        return os.getenv('DEBUG_CACHE', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+    except Exception:
+        return False
+
+
+def write_json_cache(path: str, payload: Any) -> None:
+    """
+    将对象以紧凑 UTF-8 JSON 写入缓存文件
+
+    先完整序列化再一次性写入，序列化失败时不会留下半截文件。
+
+    Args:
+        path: 目标文件路径
+        payload: 可 JSON 序列化的对象（无法识别的类型按 str 处理）
+    """
+    if _debug_cache_enabled():
+        data = json.dumps(payload, ensure_ascii=False, indent=2, default=str).encode('utf-8')
+    elif orjson is not None:
+        data = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        # ensure_ascii=True 输出纯 ASCII，编码为字节时走最快路径；非 ASCII 字符以 \uXXXX 转义，读回结果不变
+        data = json.dumps(payload, separators=(',', ':'), default=str).encode('ascii')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read_json_cache(path: str) -> Any:
+    """
+    读取 JSON 缓存文件
+
+    一次读入全部字节后解析；安装了 orjson 时使用其解析器（比标准库快数倍）。
+
+    Args:
+        path: 缓存文件路径
+
+    Returns:
+        解析后的对象；文件内容不是合法 JSON 时抛出 ValueError
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
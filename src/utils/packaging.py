@@ -6,8 +6,83 @@
 """
 
 import os
+import shutil
 import zipfile
-from typing import Iterable, Optional
+from typing import Iterable, Iterator, Optional, Tuple
+
+# 流式打包时每次读取源文件/输出的数据块大小
+STREAM_CHUNK_SIZE = 1 << 20
+
+# 直接存储的文件：已是压缩格式（再次 deflate 几乎没有收益，只消耗 CPU），
+# 以及体积大、deflate 耗时远超传输节省的 DICOM 原始文件
+_PRECOMPRESSED_SUFFIXES = ('.gz', '.npz', '.zip', '.xlsx', '.png', '.jpg', '.jpeg', '.parquet', '.dcm')
+# 其余文件（json/csv/txt 等元数据）使用最快的压缩级别，打包以 I/O 为主而非 CPU
+ZIP_COMPRESS_LEVEL = 1
+
+def _write_zip_entry(zipf: zipfile.ZipFile, file_path: str, arc_name: str) -> None:
+    """从磁盘按块写入一个 ZIP 条目，内存占用与文件大小无关"""
+    zinfo = zipfile.ZipInfo.from_file(file_path, arc_name)
+    if file_path.lower().endswith(_PRECOMPRESSED_SUFFIXES):
+        zinfo.compress_type = zipfile.ZIP_STORED
+    else:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        # Python 3.13 起为公开属性 compress_level，之前版本为 _compresslevel
+        if hasattr(zinfo, 'compress_level'):
+            zinfo.compress_level = ZIP_COMPRESS_LEVEL
+        else:
+            zinfo._compresslevel = ZIP_COMPRESS_LEVEL
+    with open(file_path, 'rb') as src, \
+            zipf.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dest:
+        shutil.copyfileobj(src, dest, STREAM_CHUNK_SIZE)
+
+
+def _iter_zip_entries(
+    source_dir: str,
+    extra_files: Optional[Iterable[str]] = None,
+    include_subdirs: Optional[Iterable[str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """按打包顺序生成 (文件路径, 包内路径)；参数含义同 create_result_zip"""
+    if include_subdirs is not None:
+        # 只打包指定的子目录，跳过未通过整理阶段的过滤目录
+        allowed = set(include_subdirs)
+        for subdir_name in allowed:
+            subdir_path = os.path.join(source_dir, subdir_name)
+            if not os.path.isdir(subdir_path):
+                continue
+            for root, _, files in os.walk(subdir_path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    yield file_path, os.path.relpath(file_path, source_dir)
+    else:
+        # 打包源目录中的所有文件（原有行为）
+        for root, _, files in os.walk(source_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                yield file_path, os.path.relpath(file_path, source_dir)
+
+    # 添加额外文件到 ZIP 根目录
+    if extra_files:
+        for extra_path in extra_files:
+            if not extra_path or not os.path.exists(extra_path):
+                continue
+            # 安全检查：仅在全量打包时跳过已在源目录中的文件，避免重复。
+            # 使用 include_subdirs 时只打包指定子目录，根目录文件不会被重复添加。
+            if include_subdirs is None:
+                try:
+                    base_dir = os.path.abspath(source_dir)
+                    extra_abs = os.path.abspath(extra_path)
+                    if os.path.commonpath([base_dir, extra_abs]) == base_dir:
+                        continue
+                except Exception:
+                    pass
+            yield extra_path, os.path.basename(extra_path)
+
+
+def _check_source_dir(source_dir: str) -> None:
+    if not os.path.exists(source_dir):
+        raise FileNotFoundError(f"Source directory not found: {source_dir}")
+    if not os.path.isdir(source_dir):
+        raise NotADirectoryError(f"Source path is not a directory: {source_dir}")
 
 
 def create_result_zip(
@@ -47,51 +122,107 @@ def create_result_zip(
     source_dir = os.path.abspath(source_dir)
 
     # 检查源目录是否存在
-    if not os.path.exists(source_dir):
-        raise FileNotFoundError(f"Source directory not found: {source_dir}")
-    if not os.path.isdir(source_dir):
-        raise NotADirectoryError(f"Source path is not a directory: {source_dir}")
+    _check_source_dir(source_dir)
 
     os.makedirs(result_dir, exist_ok=True)
     zip_path = os.path.join(result_dir, f"result_{task_id}.zip")
 
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        if include_subdirs is not None:
-            # 只打包指定的子目录，跳过未通过整理阶段的过滤目录
-            allowed = set(include_subdirs)
-            for subdir_name in allowed:
-                subdir_path = os.path.join(source_dir, subdir_name)
-                if not os.path.isdir(subdir_path):
-                    continue
-                for root, _, files in os.walk(subdir_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, source_dir)
-                        zipf.write(file_path, arc_name)
-        else:
-            # 打包源目录中的所有文件（原有行为）
-            for root, _, files in os.walk(source_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arc_name = os.path.relpath(file_path, source_dir)
-                    zipf.write(file_path, arc_name)
-
-        # 添加额外文件到 ZIP 根目录
-        if extra_files:
-            for extra_path in extra_files:
-                if not extra_path or not os.path.exists(extra_path):
-                    continue
-                # 安全检查：仅在全量打包时跳过已在源目录中的文件，避免重复。
-                # 使用 include_subdirs 时只打包指定子目录，根目录文件不会被重复添加。
-                if include_subdirs is None:
-                    try:
-                        base_dir = os.path.abspath(source_dir)
-                        extra_abs = os.path.abspath(extra_path)
-                        if os.path.commonpath([base_dir, extra_abs]) == base_dir:
-                            continue
-                    except Exception:
-                        pass
-                arc_name = os.path.basename(extra_path)
-                zipf.write(extra_path, arc_name)
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
+        for file_path, arc_name in _iter_zip_entries(source_dir, extra_files, include_subdirs):
+            _write_zip_entry(zipf, file_path, arc_name)
 
     return zip_path
+
+
+def append_files_to_zip(zip_path: str, files: Iterable[str]) -> str:
+    """
+    向已生成的结果 ZIP 根目录追加文件
+
+    用于与打包并行产生的文件（如元数据 Excel）在其就绪后补入压缩包，
+    已写入的条目不会被重写。
+
+    Args:
+        zip_path: 已存在的 ZIP 文件路径
+        files: 需要追加的文件路径列表，不存在或为空的路径会被跳过
+
+    Returns:
+        str: ZIP 文件路径
+    """
+    files = [path for path in (files or []) if path and os.path.exists(path)]
+    if not files:
+        return zip_path
+    with zipfile.ZipFile(zip_path, 'a', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
+        existing = set(zipf.namelist())
+        for file_path in files:
+            arc_name = os.path.basename(file_path)
+            if arc_name in existing:
+                continue
+            _write_zip_entry(zipf, file_path, arc_name)
+    return zip_path
+
+
+class _ChunkSink:
+    """只写、不可 seek 的输出对象，收集 ZipFile 写出的字节供生成器取走"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_result_zip(
+    source_dir: str,
+    extra_files: Optional[Iterable[str]] = None,
+    include_subdirs: Optional[Iterable[str]] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    边打包边输出 ZIP 数据（生成器）
+
+    与 create_result_zip 打包相同的文件，但不落盘：以 ZIP_STORED 方式写入（DICOM/NIfTI
+    压缩收益有限，省去压缩的 CPU 开销），每读取 chunk_size 字节源数据就产出一次，
+    可直接作为 Flask Response 的响应体，下载无需等待整个 ZIP 生成。
+
+    Args:
+        source_dir: 源目录路径
+        extra_files: 可选的额外文件列表，添加到 ZIP 根目录
+        include_subdirs: 可选，仅打包指定的子目录名称集合
+        chunk_size: 每次读取源文件的字节数
+
+    Yields:
+        bytes: ZIP 数据块
+    """
+    source_dir = os.path.abspath(source_dir)
+    _check_source_dir(source_dir)
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zipf:
+        for file_path, arc_name in _iter_zip_entries(source_dir, extra_files, include_subdirs):
+            zinfo = zipfile.ZipInfo.from_file(file_path, arc_name)
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with open(file_path, 'rb') as src, \
+                    zipf.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dest:
+                while True:
+                    block = src.read(chunk_size)
+                    if not block:
+                        break
+                    dest.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
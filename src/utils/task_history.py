@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+任务历史持久化
+
+已完成任务的摘要写入 SQLite（WAL 模式），历史列表按 end_time 索引分页查询，
+内存中无需保留全部历史记录，服务重启后历史仍可查看。
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger('DICOMApp')
+
+_COLUMNS = (
+    'task_id', 'task_type', 'status', 'summary', 'start_time', 'end_time',
+    'duration', 'has_excel', 'has_zip', 'series_count'
+)
+
+
+class TaskHistoryStore:
+    """已完成任务摘要的 SQLite 存储"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                'task_id TEXT PRIMARY KEY, task_type TEXT, status TEXT, summary TEXT, '
+                'start_time REAL, end_time REAL, duration REAL, '
+                'has_excel INTEGER, has_zip INTEGER, series_count INTEGER)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_end_time ON tasks (end_time DESC)')
+
+    def record(self, entry: Dict) -> None:
+        """写入（或覆盖）一条任务摘要，entry 为 _serialize_task_history 的返回值"""
+        values = [entry.get(column) for column in _COLUMNS]
+        if values[5] is None:
+            # 排序依赖 end_time，缺失时以开始时间代替
+            values[5] = entry.get('start_time')
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO tasks ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                values,
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """按结束时间倒序返回一页任务摘要"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM tasks ORDER BY end_time DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        tasks = []
+        for row in rows:
+            item = dict(row)
+            item['has_excel'] = bool(item['has_excel'])
+            item['has_zip'] = bool(item['has_zip'])
+            tasks.append(item)
+        return tasks
@@ -12,7 +12,12 @@ Flask Web 应用主模块
 
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, Future
+import json
+import re
+import atexit
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from queue import Queue, Empty
 
 # 将项目根目录添加到 Python 路径（确保能找到 src 模块）
@@ -35,22 +40,32 @@ try:
 except ImportError:
     pass
 
-from flask import Flask, render_template, request, jsonify, send_file
-from flask_socketio import SocketIO, emit
+from flask import Flask, Request, Response, render_template, request, jsonify, send_file
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import time
 import uuid
 import threading
 import shutil
+import subprocess
+import tempfile
 import logging
-from logging.handlers import RotatingFileHandler
-from werkzeug.utils import secure_filename
+from urllib.parse import unquote
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-from dotenv import set_key
+from flask.json.provider import DefaultJSONProvider
+from dotenv import dotenv_values, set_key
 import secrets
 
+try:
+    import orjson
+except Exception:  # 可选依赖，缺失时使用标准库 json
+    orjson = None
+
 # 导入我们的DICOM处理客户端
+from src.client.pool import DICOMClientPool
 from src.client.unified import DICOMDownloadClient
-from src.utils.packaging import create_result_zip
+from src.utils.packaging import append_files_to_zip, create_result_zip, stream_result_zip
+from src.utils.task_history import TaskHistoryStore
 from src.core.constants import (
     DEFAULT_DERIVED_SERIES_KEYWORDS,
     get_derived_keywords,
@@ -70,20 +85,52 @@ def get_project_root():
     # src/web/app.py -> 向上两级到达项目根目录
     return os.path.dirname(os.path.dirname(os.path.dirname(current_file)))
 
+class UploadRequest(Request):
+    """
+    multipart 上传的文件部分直接写入上传目录下的临时文件。
+
+    Werkzeug 默认先在内存中缓冲 500KB 以内的部分、更大的写入匿名临时文件，保存时还要再整体复制一遍；
+    这里始终写入与目标同目录的具名临时文件，保存时 os.replace 原子改名即可，无需二次复制。
+    未被取走的临时文件在请求结束时删除。
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload_dir = app.config.get('UPLOAD_FOLDER') or tempfile.gettempdir()
+        stream = tempfile.NamedTemporaryFile('wb+', dir=upload_dir, prefix='.upload_', suffix='.part', delete=False)
+        self.__dict__.setdefault('_upload_temp_paths', []).append(stream.name)
+        return stream
+
+
 # Flask应用配置 - 指定静态文件和模板路径（从项目根目录查找）
 project_root = get_project_root()
 app = Flask(__name__,
             static_folder=os.path.join(project_root, 'static'),
             template_folder=os.path.join(project_root, 'templates'))
+app.request_class = UploadRequest
+
+
+@app.teardown_request
+def _cleanup_upload_temp_files(exc=None):
+    """删除本次请求中未被 os.replace 取走的上传临时文件。"""
+    for path in getattr(request, '_upload_temp_paths', ()):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# 流式上传每次读取的块大小
+UPLOAD_CHUNK_SIZE = 1 << 20
 
-_secret_key = os.environ.get('FLASK_SECRET_KEY')
-if not _secret_key:
-    # 仅用于本地/临时运行；生产环境请通过环境变量提供固定值
-    _secret_key = secrets.token_hex(32)
-app.config['SECRET_KEY'] = _secret_key
 app.config['UPLOAD_FOLDER'] = os.path.abspath('./uploads')
 app.config['RESULT_FOLDER'] = os.path.abspath('./results')
 app.config['MAX_CONTENT_LENGTH'] = 1500 * 1024 * 1024  # 1500MB最大文件大小
+# 部署在 nginx/Apache 之后时可开启 X-Sendfile：send_file 只返回 X-Sendfile 头，
+# 由前端服务器以 sendfile(2) 零拷贝发送结果文件（nginx 需配合 X-Accel-Redirect 等映射）
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() in ('true', '1', 'yes')
+# 单检查/上传任务不在磁盘生成结果 ZIP，下载时直接从整理目录边打包边发送（省去一次写盘与读盘）
+STREAM_RESULT_ZIP = os.getenv('STREAM_RESULT_ZIP', 'false').lower() in ('true', '1', 'yes')
 
 # 创建必要的目录
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -109,22 +156,123 @@ def setup_logging():
         'logs/app.log', maxBytes=10*1024*1024, backupCount=5, encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # 控制台日志
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    # 任务线程只把日志记录放入队列，文件/控制台写入（含回滚检查）由单独的监听线程完成
+    log_queue = Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
     return logger
 
 logger = setup_logging()
 
+# 启动时是否把默认清理配置写回 .env（多 worker 部署且 .env 只读时可设为 0）
+# 启动时是否把默认配置/生成的密钥写回 .env（多 worker 部署且 .env 只读时可设为 0）
+PERSIST_ENV_CONFIG = os.getenv('PERSIST_CLEANUP_CONFIG', '1') == '1'
+
+
+def _persist_env_defaults(values):
+    """只把与 .env 现有内容不同的项写回，避免每次启动都重写整个 .env"""
+    if not PERSIST_ENV_CONFIG:
+        return
+    try:
+        current = dotenv_values(ENV_FILE_PATH) if os.path.exists(ENV_FILE_PATH) else {}
+        for key, value in values.items():
+            if current.get(key) != value:
+                set_key(ENV_FILE_PATH, key, value)
+    except Exception as e:
+        logger.warning(f"无法将配置写入 {ENV_FILE_PATH}: {e}")
+
+
+# 生成的密钥保存在 instance/secret_key（已加入 .gitignore），不写入受版本控制的 .env
+SECRET_KEY_FILE_PATH = os.path.join(os.path.dirname(ENV_FILE_PATH), 'instance', 'secret_key')
+
+
+def _load_or_create_secret_key():
+    """读取本地密钥文件，不存在时生成；以独占方式创建，多个 worker 同时启动时复用同一密钥"""
+    try:
+        os.makedirs(os.path.dirname(SECRET_KEY_FILE_PATH), exist_ok=True)
+        try:
+            fd = os.open(SECRET_KEY_FILE_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(SECRET_KEY_FILE_PATH, 'r', encoding='utf-8') as f:
+                key = f.read().strip()
+            if key:
+                return key
+            # 另一 worker 刚创建、尚未写入，稍候再读
+            time.sleep(0.2)
+            with open(SECRET_KEY_FILE_PATH, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        key = secrets.token_hex(32)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(key)
+        return key
+    except Exception as e:
+        logger.warning(f"无法读写密钥文件 {SECRET_KEY_FILE_PATH}: {e}")
+        return None
+
+
+_secret_key = os.environ.get('FLASK_SECRET_KEY') or _load_or_create_secret_key()
+if not _secret_key:
+    # 仅用于本地/临时运行；生产环境请通过环境变量提供固定值
+    _secret_key = secrets.token_hex(32)
+app.config['SECRET_KEY'] = _secret_key
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 序列化 API 响应；orjson 不支持的对象或需要缩进输出时回退到默认实现"""
+
+    def dumps(self, obj, **kwargs):
+        if 'indent' not in kwargs:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class _OrjsonSocketJSON:
+    """供 python-socketio 使用的 json 模块替身（task_update 推送）"""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+        except TypeError:
+            return json.dumps(obj, *args, **kwargs)
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 # WebSocket支持
-socketio = SocketIO(app, cors_allowed_origins="*")
+# ASYNC_MODE 未设置时由 Flask-SocketIO 自动选择；gevent 部署请通过根目录 wsgi.py 启动（先完成 monkey patch）
+SOCKETIO_ASYNC_MODE = os.getenv('ASYNC_MODE') or None
+if orjson is not None:
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SOCKETIO_ASYNC_MODE, json=_OrjsonSocketJSON)
+else:
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SOCKETIO_ASYNC_MODE)
 
 # ============ 任务队列系统配置 ============
-MAX_CONCURRENT_TASKS = 3  # 最大并发任务数
+try:
+    MAX_CONCURRENT_TASKS = max(1, int(os.getenv('TASK_WORKERS', '3')))  # 最大并发任务数
+except Exception:
+    MAX_CONCURRENT_TASKS = 3
 TASK_QUEUE_MAX_SIZE = 100  # 任务队列最大长度
 
 # 全局线程池执行器 - 限制并发数
@@ -132,6 +280,8 @@ task_executor = ThreadPoolExecutor(
     max_workers=MAX_CONCURRENT_TASKS,
     thread_name_prefix='TaskWorker'
 )
+# 进程退出时取消尚未开始的任务，不等待运行中的任务
+atexit.register(lambda: task_executor.shutdown(wait=False, cancel_futures=True))
 
 # 任务队列 - 存储待处理的任务ID
 task_queue = Queue(maxsize=TASK_QUEUE_MAX_SIZE)
@@ -146,15 +296,73 @@ _running_task_count = 0
 processing_tasks = {}
 _task_lock = threading.Lock()  # 任务字典锁，防止竞态条件
 
-# 已完成任务缓存，避免每次请求全量序列化
+# 已完成任务历史：优先持久化到 SQLite，按 end_time 索引分页；初始化失败时退回内存列表
+try:
+    TASK_HISTORY_DB = os.path.abspath(os.getenv('TASK_HISTORY_DB', './tasks.db'))
+    task_history_store = TaskHistoryStore(TASK_HISTORY_DB)
+except Exception as e:
+    logger.warning(f"任务历史数据库不可用，使用内存记录: {e}")
+    task_history_store = None
+
+# 内存历史缓存（仅在 SQLite 不可用时使用）
 _completed_tasks_lock = threading.Lock()
-_completed_tasks_cache = []
 _completed_task_ids = set()
 _serialized_history_cache = []
 
 # 任务取消标志字典 - 用于真正中断任务执行
 _task_cancel_flags = {}
 
+# WebSocket 推送合并队列：任务线程只入队，由单个后台线程按窗口合并后发送
+EMIT_COALESCE_SEC = 0.1  # 合并窗口（秒），同一任务窗口内只发送最新状态
+_emit_queue = Queue()
+_emit_worker_started = False
+_emit_worker_lock = threading.Lock()
+
+
+def _emit_worker():
+    """task_update 发送线程：收集一个窗口内的更新，每个任务只发送一条（最新状态 + 窗口内全部新增日志）"""
+    while True:
+        task_id, payload = _emit_queue.get()
+        pending = {task_id: payload}
+        deadline = time.monotonic() + EMIT_COALESCE_SEC
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                task_id, payload = _emit_queue.get(timeout=remaining)
+            except Empty:
+                break
+            previous = pending.get(task_id)
+            if previous is not None and previous.get('logs_delta'):
+                # 状态取最新，日志增量按顺序拼接
+                payload['logs_delta'] = previous['logs_delta'] + payload.get('logs_delta', [])
+            pending[task_id] = payload
+
+        for task_id, payload in pending.items():
+            try:
+                # 只发送给订阅了该任务的客户端（房间名即任务ID）
+                socketio.emit('task_update', payload, to=task_id)
+            except Exception as e:
+                logger.error(f"WebSocket发送失败: {str(e)}")
+
+
+def _queue_task_update(task_id, payload):
+    """将任务更新放入合并队列，首次调用时启动发送线程"""
+    global _emit_worker_started
+    if not _emit_worker_started:
+        with _emit_worker_lock:
+            if not _emit_worker_started:
+                socketio.start_background_task(_emit_worker)
+                _emit_worker_started = True
+    _emit_queue.put((task_id, payload))
+
+# 每个任务在内存中保留的日志条数上限（更早的日志仍写入日志文件）
+try:
+    TASK_LOG_CAP = max(10, int(os.getenv('TASK_LOG_CAP', '500')))
+except Exception:
+    TASK_LOG_CAP = 500
+
 # 任务清理配置
 TASK_MAX_AGE_HOURS = 24  # 任务最大保留时间（小时）
 TASK_CLEANUP_INTERVAL = 3600  # 清理检查间隔（秒）
@@ -288,8 +496,18 @@ def _process_queue():
                 # 尝试处理队列中的下一个任务
                 _process_queue()
 
-        # 在线程池中执行
-        task_executor.submit(_task_wrapper)
+        # 在线程池中执行，保留 Future 以便取消尚未开始的任务
+        task._future = task_executor.submit(_task_wrapper)
+
+        def _on_future_done(future):
+            # 被取消的 Future 不会执行 _task_wrapper 的 finally，在此归还运行名额
+            global _running_task_count
+            if future.cancelled():
+                with _queue_lock:
+                    _running_task_count = max(0, _running_task_count - 1)
+                _process_queue()
+
+        task._future.add_done_callback(_on_future_done)
         logger.info(f"Task {task_id} started execution (running: {_running_task_count})")
 
     except Exception as e:
@@ -328,7 +546,36 @@ cleanup_thread.start()
 # 创建DICOM客户端实例用于系统状态检查（不登录）
 dicom_client_checker = DICOMDownloadClient()
 
-ENV_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
+# 任务使用的客户端池：任务结束后归还复用，后台预先创建与任务并发数相同的客户端
+client_pool = DICOMClientPool(MAX_CONCURRENT_TASKS)
+threading.Thread(target=client_pool.warm, name='ClientPoolWarm', daemon=True).start()
+
+# PACS 状态检查结果缓存：前端轮询时复用最近一次检查结果，避免每次请求都建立关联
+PACS_STATUS_TTL_SEC = 3.0
+PACS_STATUS_ERROR_TTL_SEC = 0.5  # 出错时缩短缓存时间，尽快重试
+_pacs_status_cache = {'value': None, 'error': None, 'ts': 0.0}
+_pacs_status_lock = threading.Lock()
+
+
+def _check_pacs_status_cached():
+    """返回 (是否连通, 错误信息)；在缓存有效期内直接返回上次结果"""
+    with _pacs_status_lock:
+        now = time.monotonic()
+        ttl = PACS_STATUS_ERROR_TTL_SEC if _pacs_status_cache['error'] else PACS_STATUS_TTL_SEC
+        if _pacs_status_cache['value'] is not None and now - _pacs_status_cache['ts'] < ttl:
+            return _pacs_status_cache['value'], _pacs_status_cache['error']
+
+        try:
+            connected, error = bool(dicom_client_checker.check_status()), None
+        except Exception as e:
+            connected, error = False, str(e)
+        _pacs_status_cache.update(value=connected, error=error, ts=time.monotonic())
+        return connected, error
+
+
+def _invalidate_pacs_status():
+    with _pacs_status_lock:
+        _pacs_status_cache.update(value=None, error=None, ts=0.0)
 
 
 def _parse_port(value, field_name: str) -> int:
@@ -380,33 +627,135 @@ try:
 except Exception:
     CLEANUP_TARGET_GB = 40.0
 
-# 将读取到的默认值持久化到 .env，便于用户修改与持久化配置
-try:
-    # 写入整数值时保留整型格式，浮点数保留原样
-    thr_val = str(int(CLEANUP_THRESHOLD_GB) if float(CLEANUP_THRESHOLD_GB).is_integer() else CLEANUP_THRESHOLD_GB)
-    tgt_val = str(int(CLEANUP_TARGET_GB) if float(CLEANUP_TARGET_GB).is_integer() else CLEANUP_TARGET_GB)
-    set_key(ENV_FILE_PATH, 'CLEANUP_THRESHOLD_GB', thr_val)
-    set_key(ENV_FILE_PATH, 'CLEANUP_TARGET_GB', tgt_val)
-except Exception as e:
-    logger.warning(f"无法将清理阈值写入 {ENV_FILE_PATH}: {e}")
+# 将读取到的默认值持久化到 .env，便于用户修改与持久化配置（值未变化时不写文件）
+# 写入整数值时保留整型格式，浮点数保留原样
+_persist_env_defaults({
+    'CLEANUP_THRESHOLD_GB': str(int(CLEANUP_THRESHOLD_GB) if float(CLEANUP_THRESHOLD_GB).is_integer() else CLEANUP_THRESHOLD_GB),
+    'CLEANUP_TARGET_GB': str(int(CLEANUP_TARGET_GB) if float(CLEANUP_TARGET_GB).is_integer() else CLEANUP_TARGET_GB),
+})
 
-def get_directory_size(directory):
-    """计算目录总大小（GB）"""
+def _scan_tree_size(directory):
+    """递归累加目录下所有文件大小（字节）；os.scandir 的目录项自带类型，每个文件只需一次 stat。"""
     total_size = 0
     try:
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                if os.path.exists(filepath):
-                    total_size += os.path.getsize(filepath)
-    except (OSError, IOError) as e:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total_size += _scan_tree_size(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    # 文件可能在扫描过程中被转换/清理删除
+                    continue
+    except OSError as e:
         logger.warning(f"计算目录大小时出错: {str(e)}")
-    return total_size / (1024 ** 3)  # 转换为GB
+    return total_size
+
+
+# 目录大小缓存：{目录: (时间戳, GB)}，状态轮询在短时间内重复请求时直接复用
+_dir_size_cache = {}
+_dir_size_cache_lock = threading.Lock()
+DIR_SIZE_CACHE_SEC = 5.0
+# /api/system/status 轮询使用的结果目录大小缓存时长（秒）
+STATUS_DIR_SIZE_TTL_SEC = 10.0
+
+
+def invalidate_directory_size(directory=None):
+    """使目录大小缓存失效（directory 为 None 时清空全部），在结果写入/删除后调用"""
+    with _dir_size_cache_lock:
+        if directory is None:
+            _dir_size_cache.clear()
+        else:
+            _dir_size_cache.pop(directory, None)
+
+
+def get_directory_size(directory, max_age_sec=DIR_SIZE_CACHE_SEC):
+    """计算目录总大小（GB）
+
+    顶层子目录分发到线程池并发扫描（元数据 I/O 可重叠），结果按目录缓存 max_age_sec 秒；
+    清理流程传入 0 以获取最新值。
+    """
+    now = time.monotonic()
+    if max_age_sec > 0:
+        with _dir_size_cache_lock:
+            cached = _dir_size_cache.get(directory)
+        if cached is not None and now - cached[0] < max_age_sec:
+            return cached[1]
+
+    total_size = 0
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning(f"计算目录大小时出错: {str(e)}")
+
+    if len(subdirs) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(subdirs), os.cpu_count() or 1)) as executor:
+            total_size += sum(executor.map(_scan_tree_size, subdirs))
+    elif subdirs:
+        total_size += _scan_tree_size(subdirs[0])
+
+    size_gb = total_size / (1024 ** 3)  # 转换为GB
+    if max_age_sec > 0:
+        with _dir_size_cache_lock:
+            _dir_size_cache[directory] = (now, size_gb)
+    return size_gb
+
+def _result_item_task_id(name):
+    """从结果目录项名称解析任务ID（<task_id> 目录或 result_<task_id>.zip），无法识别时返回 None"""
+    stem = name[:-4] if name.endswith('.zip') else name
+    if stem.startswith('result_'):
+        stem = stem[len('result_'):]
+    try:
+        if str(uuid.UUID(stem)) == stem:
+            return stem
+    except ValueError:
+        pass
+    return None
+
+
+def fast_rmtree(path):
+    """删除目录树；Linux 下交给 rm -rf（内核逐项 unlink，无 Python 逐文件开销），失败或其他平台回退 shutil.rmtree"""
+    if sys.platform.startswith('linux'):
+        rm_path = shutil.which('rm')
+        if rm_path:
+            try:
+                result = subprocess.run([rm_path, '-rf', '--', path],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+                if result.returncode == 0 and not os.path.exists(path):
+                    return
+                logger.warning(f"rm -rf 未能完全删除 {path}: {result.stderr.decode(errors='ignore').strip()}")
+            except OSError as e:
+                logger.warning(f"调用 rm 失败，回退 shutil.rmtree: {e}")
+    shutil.rmtree(path)
+
 
 def cleanup_old_results():
     """清理旧的结果文件，保持磁盘空间在合理范围内"""
     results_dir = app.config['RESULT_FOLDER']
-    current_size = get_directory_size(results_dir)
+
+    # 快速判断：整个文件系统已用空间都低于阈值时，结果目录必然低于阈值，无需遍历
+    try:
+        usage = shutil.disk_usage(results_dir)
+        if (usage.total - usage.free) / (1024 ** 3) < CLEANUP_THRESHOLD_GB:
+            return
+    except OSError:
+        pass
+
+    # 其次使用状态查询缓存的目录大小，明显低于阈值时跳过全量遍历
+    if get_directory_size(results_dir) < CLEANUP_THRESHOLD_GB:
+        return
+
+    current_size = get_directory_size(results_dir, max_age_sec=0)
     
     if current_size < CLEANUP_THRESHOLD_GB:
         return
@@ -414,57 +763,51 @@ def cleanup_old_results():
     logger.info(f"结果目录大小: {current_size:.2f}GB, 启动自动清理")
     
     # 获取所有子目录（任务目录和ZIP文件）
-    items_to_check = []
+    # 正在进行的任务不参与清理
+    active_task_ids = {task.task_id for task in processing_tasks.values()
+                       if task.status in ['running', 'pending']}
+
+    items_to_clean = []
     
     try:
-        # 扫描所有文件和目录
-        for item in os.listdir(results_dir):
-            item_path = os.path.join(results_dir, item)
-            if os.path.exists(item_path):
-                # 获取最后访问时间
-                atime = os.path.getatime(item_path)
-                size = 0
-                
-                if os.path.isfile(item_path):
-                    size = os.path.getsize(item_path) / (1024 ** 3)
-                elif os.path.isdir(item_path):
-                    size = get_directory_size(item_path)
-                    
-                items_to_check.append({
-                    'path': item_path,
-                    'name': item,
-                    'atime': atime,
-                    'size': size,
-                    'is_dir': os.path.isdir(item_path)
+        # 扫描所有文件和目录：每项只 stat 一次（DirEntry 缓存结果）；
+        # 目录大小推迟到真正删除前再统计，未轮到删除的目录无需遍历
+        with os.scandir(results_dir) as it:
+            for entry in it:
+                # 检查是否为活跃任务目录：已知命名（<task_id> 目录、result_<task_id>.zip）直接查集合，
+                # 其他命名退回子串匹配
+                task_id = _result_item_task_id(entry.name)
+                if task_id is not None:
+                    is_active = task_id in active_task_ids
+                else:
+                    is_active = any(active_id in entry.name for active_id in active_task_ids)
+                if is_active:
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                items_to_clean.append({
+                    'path': entry.path,
+                    'name': entry.name,
+                    # 最近使用时间：noatime 挂载下 atime 不更新，取 atime 与 mtime 的较大者
+                    'last_used': max(st.st_atime, st.st_mtime),
+                    'size': None if is_dir else st.st_size / (1024 ** 3),
+                    'is_dir': is_dir
                 })
                 
     except Exception as e:
         logger.error(f"扫描结果目录失败: {str(e)}")
         return
     
-    # 排除正在进行的任务
-    active_task_ids = [task.task_id for task in processing_tasks.values() 
-                      if task.status in ['running', 'pending']]
-    
-    # 过滤掉正在进行的任务
-    items_to_clean = []
-    for item in items_to_check:
-        # 检查是否为活跃任务目录
-        is_active = False
-        for task_id in active_task_ids:
-            if task_id in item['name']:
-                is_active = True
-                break
-        
-        if not is_active:
-            items_to_clean.append(item)
-    
     if not items_to_clean:
         logger.info("所有文件都属于活跃任务，跳过清理")
         return
     
-    # 按访问时间排序，先删除最旧的
-    items_to_clean.sort(key=lambda x: x['atime'])
+    # 按最近使用时间排序，先删除最旧的
+    items_to_clean.sort(key=lambda x: x['last_used'])
     
     cleaned_size = 0
     target_to_clean = current_size - CLEANUP_TARGET_GB
@@ -474,10 +817,12 @@ def cleanup_old_results():
             break
             
         try:
+            if item['size'] is None:
+                item['size'] = _scan_tree_size(item['path']) / (1024 ** 3)
             logger.info(f"删除: {item['name']} ({item['size']:.2f}GB)")
             
             if item['is_dir']:
-                shutil.rmtree(item['path'])
+                fast_rmtree(item['path'])
             else:
                 os.remove(item['path'])
                 
@@ -486,19 +831,38 @@ def cleanup_old_results():
         except Exception as e:
             logger.error(f"删除 {item['name']} 失败: {str(e)}")
     
+    invalidate_directory_size(results_dir)
     final_size = get_directory_size(results_dir)
     logger.info(f"清理完成: {current_size:.2f}GB → {final_size:.2f}GB (清理了 {cleaned_size:.2f}GB)")
 
-def check_and_cleanup_results():
-    """检查并清理结果目录的后台任务"""
-    def cleanup_thread():
+# 结果目录清理由单个常驻后台线程执行：任务完成时只发信号，多个任务先后完成合并为一次清理
+CLEANUP_SWEEP_INTERVAL = 60  # 无任务完成时的兜底检查间隔（秒）
+_cleanup_event = threading.Event()
+_cleanup_worker_started = False
+_cleanup_worker_lock = threading.Lock()
+
+
+def _cleanup_worker():
+    """结果目录清理线程：等待完成信号（或超时兜底），每次唤醒执行一次清理"""
+    while True:
+        _cleanup_event.wait(timeout=CLEANUP_SWEEP_INTERVAL)
+        # 先清除信号：清理期间再有任务完成会在下一轮触发
+        _cleanup_event.clear()
         try:
             cleanup_old_results()
         except Exception as e:
             logger.error(f"自动清理失败: {str(e)}")
-    
-    # 异步执行清理，避免阻塞主线程
-    threading.Thread(target=cleanup_thread, daemon=True).start()
+
+
+def check_and_cleanup_results():
+    """通知后台线程检查并清理结果目录，立即返回，不占用任务工作线程"""
+    global _cleanup_worker_started
+    if not _cleanup_worker_started:
+        with _cleanup_worker_lock:
+            if not _cleanup_worker_started:
+                threading.Thread(target=_cleanup_worker, name='ResultCleanup', daemon=True).start()
+                _cleanup_worker_started = True
+    _cleanup_event.set()
 
 class ProcessingTask:
     """处理任务类 - 修复版"""
@@ -514,11 +878,13 @@ class ProcessingTask:
         self.error = None
         self.start_time = time.time()
         self.end_time = None
-        self.logs = []
+        self.logs = deque(maxlen=TASK_LOG_CAP)
+        self._log_lock = threading.RLock()  # 可重入：_emit_update 持锁时调用 _update_payload
+        self._log_seq = 0         # 已追加的日志条数（每条日志的递增序号）
+        self._emitted_seq = 0     # 已放入推送队列的最大日志序号
         self._cancelled = False  # 取消标志
-        self._log_buffer = []     # 日志缓冲区，用于批量发送
-        self._last_emit_time = 0  # 上次发送时间
-        self._emit_interval = 0.5  # 最小发送间隔（秒）
+        self._future = None       # 线程池 Future（开始执行后设置）
+        self._zip_source = None   # 结果 ZIP 的打包参数，供流式下载按需重新打包
 
     def is_cancelled(self):
         """检查任务是否被取消"""
@@ -531,6 +897,9 @@ class ProcessingTask:
     def cancel(self):
         """标记任务为已取消"""
         self._cancelled = True
+        if self._future is not None:
+            # 尚未开始执行的任务直接从线程池移除
+            self._future.cancel()
         _task_cancel_flags[self.task_id] = True
         self.status = 'cancelled'
         self.end_time = time.time()
@@ -540,29 +909,46 @@ class ProcessingTask:
         if self.is_cancelled():
             raise InterruptedError(f"Task {self.task_id} cancelled at step: {step_name}")
 
-    def _should_emit(self):
-        """判断是否应该发送WebSocket更新（节流控制）"""
-        current_time = time.time()
-        if current_time - self._last_emit_time >= self._emit_interval:
-            self._last_emit_time = current_time
-            return True
-        return False
-
-    def _emit_update(self, force=False):
-        """发送WebSocket更新（内部方法）"""
-        if not force and not self._should_emit():
-            return
-        
-        try:
-            socketio.emit('task_update', {
-                'task_id': self.task_id,
-                'status': self.status,
-                'progress': self.progress,
-                'current_step': self.current_step,
-                'logs': self.logs[-5:]  # 只发送最新5条日志
-            })
-        except Exception as e:
-            logger.error(f"WebSocket发送失败: {str(e)}")
+    def _update_payload(self, full_logs=False):
+        """task_update 推送内容
+
+        默认只携带上次入队以来新增的日志（logs_delta）；full_logs=True 时携带内存中的全部日志，
+        用于客户端刚订阅时的补发。
+        """
+        payload = {
+            'task_id': self.task_id,
+            'status': self.status,
+            'progress': self.progress,
+            'current_step': self.current_step,
+        }
+        with self._log_lock:
+            if full_logs:
+                payload['logs'] = list(self.logs)
+            else:
+                payload['logs_delta'] = self._logs_after(self._emitted_seq)
+                self._emitted_seq = self._log_seq
+        return payload
+
+    def _logs_after(self, seq):
+        """返回序号大于 seq 的日志（调用方持有 _log_lock）；从尾部向前取，代价与新增条数成正比"""
+        return list(itertools.takewhile(lambda entry: entry['seq'] > seq, reversed(self.logs)))[::-1]
+
+    def logs_since(self, since=None):
+        """返回 (日志列表, 下次查询用的游标)；since 为 None 时返回内存中的全部日志"""
+        with self._log_lock:
+            logs = list(self.logs) if since is None else self._logs_after(since)
+            return logs, self._log_seq
+
+    def _emit_update(self):
+        """发送WebSocket更新（内部方法）
+
+        入队当前状态快照，由 _emit_worker 合并后发送；窗口内的中间进度被最新状态覆盖，
+        新增日志按顺序拼接，不会丢失。
+        快照与入队在同一把锁内完成：任务线程与取消接口等并发推送时，入队顺序与日志序号、
+        状态先后一致，合并时不会拼乱日志或让旧状态覆盖新状态。
+        """
+        with self._log_lock:
+            _queue_task_update(self.task_id, self._update_payload())
 
     def add_log(self, message, level='info'):
         """添加日志"""
@@ -571,13 +957,16 @@ class ProcessingTask:
             'level': level,
             'message': message
         }
-        self.logs.append(log_entry)
+        with self._log_lock:
+            self._log_seq += 1
+            log_entry['seq'] = self._log_seq
+            self.logs.append(log_entry)
         
         # 使用统一日志系统记录
         log_method = getattr(logger, level.lower(), logger.info)
-        log_method(f"[Task {self.task_id}] {message}")
+        log_method("[Task %s] %s", self.task_id, message)
         
-        # 通过WebSocket发送更新（节流控制）
+        # 通过WebSocket发送更新（合并队列）
         self._emit_update()
 
     def update_status(self, status, progress=None, step=None):
@@ -588,22 +977,25 @@ class ProcessingTask:
             return
         
         self.status = status
+        if status in ('completed', 'failed', 'cancelled'):
+            # 任务结束时结果目录已变化，下次状态查询重新统计
+            invalidate_directory_size(app.config['RESULT_FOLDER'])
         if progress is not None:
             self.progress = progress
         if step is not None:
             self.current_step = step
         
         # 使用 logger 记录状态转换
-        logger.info(f"Task {self.task_id} status update: {status} ({progress or 0}% - {step or 'N/A'})")
+        logger.info("Task %s status update: %s (%s%% - %s)", self.task_id, status, progress or 0, step or 'N/A')
         
-        # 通过WebSocket发送更新（强制发送状态变更）
-        self._emit_update(force=True)
+        # 通过WebSocket发送更新
+        self._emit_update()
 
 @app.route('/api/debug/test-connection')
 def test_connection():
     """测试PACS连接的调试接口"""
     try:
-        client = DICOMDownloadClient()
+        client = dicom_client_checker
         status = client.check_status()
         
         return jsonify({
@@ -715,40 +1107,111 @@ def process_upload():
             return jsonify({'error': 'Only ZIP files are supported'}), 400
         
         # 保存上传的文件
-        filename = secure_filename(file.filename)
-        timestamp = int(time.time())
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        filename, filepath = _upload_target_path(file.filename)
+        temp_path = getattr(file.stream, 'name', None)
+        if isinstance(temp_path, str) and temp_path in getattr(request, '_upload_temp_paths', ()):
+            # 上传内容已在同目录临时文件中，直接改名，无需再复制一遍
+            file.stream.close()
+            os.replace(temp_path, filepath)
+        else:
+            file.save(filepath, buffer_size=UPLOAD_CHUNK_SIZE)
         
         # 获取处理选项
         options = {}
         for key in request.form:
             options[key] = request.form[key] == 'true'
         
-        # 创建任务
-        task_id = str(uuid.uuid4())
-        task = ProcessingTask(task_id, 'upload', {
-            'filepath': filepath,
-            'filename': filename,
-            'options': options
-        })
+        return _queue_upload_task(filepath, filename, options, file.filename)
         
-        processing_tasks[task_id] = task
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # 提交到任务队列
-        if not _submit_task_to_queue(task):
-            return jsonify({'error': 'Task queue is full, please try again later'}), 503
 
-        return jsonify({
-            'task_id': task_id,
-            'status': 'queued',
-            'message': f'上传文件已加入队列，等待处理: {file.filename}'
-        })
-        
+@app.route('/api/process/upload_stream', methods=['POST'])
+def process_upload_stream():
+    """
+    处理以原始请求体（application/octet-stream）上传的 ZIP 文件
+
+    文件名通过 X-Content-Name 请求头（URL 编码）传递，处理选项通过查询参数传递。
+    请求体按块直接写入磁盘，不经过 multipart 解析，内存占用与文件大小无关。
+    """
+    try:
+        original_name = unquote(request.headers.get('X-Content-Name', '') or '')
+        if not original_name:
+            return jsonify({'error': 'No file selected'}), 400
+        if not original_name.lower().endswith('.zip'):
+            return jsonify({'error': 'Only ZIP files are supported'}), 400
+
+        filename, filepath = _upload_target_path(original_name)
+        temp_path = f"{filepath}.part"
+        written = 0
+        try:
+            with open(temp_path, 'wb') as out:
+                while True:
+                    chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    written += len(chunk)
+            if written == 0:
+                os.remove(temp_path)
+                return jsonify({'error': 'No file uploaded'}), 400
+            expected = request.content_length
+            if expected is not None and written != expected:
+                os.remove(temp_path)
+                return jsonify({'error': 'Upload incomplete'}), 400
+            os.replace(temp_path, filepath)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        options = {key: value == 'true' for key, value in request.args.items()}
+        return _queue_upload_task(filepath, filename, options, original_name)
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+# 上传文件名中允许保留的字符（其余连续字符替换为一个下划线）
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+# 上传序号：同一秒内的并发上传也不会重名
+_upload_seq = itertools.count(1)
+
+
+def fast_secure_filename(name):
+    """单次正则替换的安全文件名（只保留 ASCII 字母数字与 ._-，去掉首尾的点和下划线，防止路径穿越）"""
+    name = _UNSAFE_FILENAME_CHARS.sub('_', (name or '').strip()).strip('._')
+    return (name or 'upload')[:128]
+
+
+def _upload_target_path(original_name):
+    """根据原始文件名生成上传保存的文件名与路径（时间戳+序号前缀避免重名）。"""
+    filename = f"{int(time.time())}_{next(_upload_seq)}_{fast_secure_filename(original_name)}"
+    return filename, os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+
+def _queue_upload_task(filepath, filename, options, display_name):
+    """为已保存的上传文件创建处理任务并提交到任务队列，返回接口响应。"""
+    task_id = str(uuid.uuid4())
+    task = ProcessingTask(task_id, 'upload', {
+        'filepath': filepath,
+        'filename': filename,
+        'options': options
+    })
+
+    processing_tasks[task_id] = task
+
+    # 提交到任务队列
+    if not _submit_task_to_queue(task):
+        return jsonify({'error': 'Task queue is full, please try again later'}), 503
+
+    return jsonify({
+        'task_id': task_id,
+        'status': 'queued',
+        'message': f'上传文件已加入队列，等待处理: {display_name}'
+    })
+
 @app.route('/api/task/<task_id>/status')
 def get_task_status(task_id):
     """获取任务状态"""
@@ -756,13 +1219,16 @@ def get_task_status(task_id):
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    # ?since=<logs_next> 只返回该游标之后的新日志，轮询时无需重复传输全部日志
+    logs, logs_next = task.logs_since(request.args.get('since', type=int))
     return jsonify({
         'task_id': task.task_id,
         'status': task.status,
         'progress': task.progress,
         'current_step': task.current_step,
         'steps': task.steps,
-        'logs': task.logs,
+        'logs': logs,
+        'logs_next': logs_next,
         'result': task.result,
         'error': task.error,
         'duration': (task.end_time or time.time()) - task.start_time
@@ -822,7 +1288,7 @@ def _serialize_task_history(task: 'ProcessingTask') -> dict:
         'end_time': task.end_time,
         'duration': duration,
         'has_excel': bool(result.get('excel_file')),
-        'has_zip': bool(result.get('result_zip') or result.get('zip_file')),
+        'has_zip': bool(result.get('result_zip') or result.get('zip_file') or result.get('zip_streamed')),
         'series_count': len(result.get('series_info', {}) or {}) if isinstance(result.get('series_info'), dict) else result.get('series_count', 0)
     }
 
@@ -844,8 +1310,6 @@ def _refresh_completed_cache_from_tasks():
     completed_tasks = [t for t in processing_tasks.values() if t.status == 'completed']
     completed_tasks.sort(key=lambda x: x.end_time or x.start_time, reverse=True)
     with _completed_tasks_lock:
-        _completed_tasks_cache.clear()
-        _completed_tasks_cache.extend(completed_tasks)
         _completed_task_ids.clear()
         _completed_task_ids.update(t.task_id for t in completed_tasks)
         _serialized_history_cache.clear()
@@ -853,19 +1317,32 @@ def _refresh_completed_cache_from_tasks():
 
 
 def _record_task_completion(task: 'ProcessingTask'):
+    entry = _serialize_task_history(task)
+    if task_history_store is not None:
+        try:
+            task_history_store.record(entry)
+            return
+        except Exception as e:
+            logger.warning(f"写入任务历史失败，改用内存记录: {e}")
+
     with _completed_tasks_lock:
         if task.task_id in _completed_task_ids:
             return
         _completed_task_ids.add(task.task_id)
-        _completed_tasks_cache.insert(0, task)
-        _serialized_history_cache.insert(0, _serialize_task_history(task))
+        _serialized_history_cache.insert(0, entry)
 
 
-@app.route('/api/tasks/history')
-def get_task_history():
-    """返回已完成任务的历史列表"""
-    page = _parse_pagination_param(request.args.get('page'), 1, min_value=1)
-    page_size = _parse_pagination_param(request.args.get('page_size'), 20, min_value=1, max_value=200)
+def _query_task_history(page, page_size):
+    """返回 (当前页记录, 总数, 修正后的页码)"""
+    if task_history_store is not None:
+        try:
+            total = task_history_store.count()
+            total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+            if total_pages > 0 and page > total_pages:
+                page = total_pages
+            return task_history_store.page((page - 1) * page_size, page_size), total, page
+        except Exception as e:
+            logger.warning(f"查询任务历史失败，改用内存记录: {e}")
 
     if not _serialized_history_cache:
         _refresh_completed_cache_from_tasks()
@@ -876,8 +1353,17 @@ def get_task_history():
         page = total_pages
 
     start = (page - 1) * page_size
-    end = start + page_size
-    paged_tasks = _serialized_history_cache[start:end]
+    return _serialized_history_cache[start:start + page_size], total, page
+
+
+@app.route('/api/tasks/history')
+def get_task_history():
+    """返回已完成任务的历史列表"""
+    page = _parse_pagination_param(request.args.get('page'), 1, min_value=1)
+    page_size = _parse_pagination_param(request.args.get('page_size'), 20, min_value=1, max_value=200)
+
+    paged_tasks, total, page = _query_task_history(page, page_size)
+    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
 
     return jsonify({
         'tasks': paged_tasks,
@@ -901,8 +1387,8 @@ def cancel_task(task_id):
     task.cancel()
     task.add_log('任务已被用户取消', 'warning')
     
-    # 强制发送更新
-    task._emit_update(force=True)
+    # 发送更新
+    task._emit_update()
     
     return jsonify({'message': 'Task cancelled'})
 
@@ -932,6 +1418,29 @@ def download_result(task_id, file_type):
                 download_name=f"metadata_{task_id}.xlsx",
                 mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
+        elif task._zip_source and (
+            file_type == 'stream_zip'
+            or (file_type in ('zip', 'result_zip') and (
+                request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+                or not (task.result.get('result_zip') or task.result.get('zip_file'))
+            ))
+        ):
+            # 边打包边发送（ZIP_STORED），不依赖磁盘上的结果 ZIP：
+            # stream_zip、zip?stream=1，或任务未生成磁盘 ZIP（STREAM_RESULT_ZIP）时使用
+            source_dir = task._zip_source['source_dir']
+            if not os.path.isdir(source_dir):
+                logger.error(f"流式打包源目录不存在: {source_dir}")
+                return jsonify({'error': f'Result directory not found: {source_dir}'}), 404
+            logger.info(f"流式下载ZIP: source={source_dir}")
+            return Response(
+                stream_result_zip(
+                    source_dir,
+                    extra_files=task._zip_source.get('extra_files'),
+                    include_subdirs=task._zip_source.get('include_subdirs')
+                ),
+                mimetype='application/zip',
+                headers={'Content-Disposition': f'attachment; filename=organized_{task_id}.zip'}
+            )
         elif (file_type == 'zip' or file_type == 'result_zip') and (task.result.get('zip_file') or task.result.get('result_zip')):
             path = task.result.get('result_zip') or task.result.get('zip_file')
             logger.info(f"下载ZIP文件: path={path}, exists={os.path.exists(path) if path else False}")
@@ -943,9 +1452,14 @@ def download_result(task_id, file_type):
             # Windows下使用pathlib处理路径
             from pathlib import Path
             abs_path = str(Path(path).resolve())
-            logger.info(f"绝对路径: {abs_path}, exists={os.path.exists(abs_path)}")
+            # 一次 stat 同时判断存在性与大小
+            try:
+                file_size = os.stat(abs_path).st_size
+            except OSError:
+                file_size = None
+            logger.info(f"绝对路径: {abs_path}, exists={file_size is not None}")
             
-            if not os.path.exists(abs_path):
+            if file_size is None:
                 logger.error(f"ZIP文件不存在: {abs_path}")
                 # 尝试列出results目录内容帮助调试
                 try:
@@ -957,21 +1471,22 @@ def download_result(task_id, file_type):
                 return jsonify({'error': f'ZIP file not found: {abs_path}'}), 404
             
             # 检查文件大小
-            try:
-                file_size = os.path.getsize(abs_path)
-                logger.info(f"ZIP文件大小: {file_size} bytes")
-                if file_size == 0:
-                    logger.error("ZIP文件大小为0")
-                    return jsonify({'error': 'ZIP file is empty'}), 500
-            except Exception as size_e:
-                logger.error(f"无法获取文件大小: {size_e}")
+            logger.info(f"ZIP文件大小: {file_size} bytes")
+            if file_size == 0:
+                logger.error("ZIP文件大小为0")
+                return jsonify({'error': 'ZIP file is empty'}), 500
             
             logger.info(f"开始发送文件: {abs_path}")
+            # 以路径交给 send_file：服务器提供 wsgi.file_wrapper（gevent/eventlet/gunicorn）时
+            # 由其以 sendfile(2) 发送，开启 USE_X_SENDFILE 时交给前端服务器发送；
+            # conditional 支持 Range/If-None-Match，断点续传与重复下载无需重发整个文件
             response = send_file(
                 abs_path,
                 as_attachment=True,
                 download_name=f"organized_{task_id}.zip",
-                mimetype='application/zip'
+                mimetype='application/zip',
+                conditional=True,
+                etag=True
             )
             logger.info(f"文件发送成功: {abs_path}")
             return response
@@ -989,22 +1504,16 @@ def download_result(task_id, file_type):
 def system_status():
     """获取系统状态"""
     # 检查DICOM服务状态
-    dicom_status = 'unknown'
-    error_msg = None
-    try:
-        # 每次调用创建独立的客户端，避免持久连接状态异常
-        client = DICOMDownloadClient()
-        if client.check_status():
-            dicom_status = 'connected'
-        else:
-            dicom_status = 'disconnected'
-    except Exception as e:
+    # 复用全局检查客户端（check_status 每次自行建立并释放关联）并缓存结果
+    connected, error_msg = _check_pacs_status_cached()
+    if error_msg:
         dicom_status = 'error'
-        error_msg = str(e)
         logger.error(f"DICOM状态检查失败: {error_msg}")
+    else:
+        dicom_status = 'connected' if connected else 'disconnected'
     
     # 获取存储空间信息
-    results_size_gb = get_directory_size(app.config['RESULT_FOLDER'])
+    results_size_gb = get_directory_size(app.config['RESULT_FOLDER'], max_age_sec=STATUS_DIR_SIZE_TTL_SEC)
     
     response = {
         'status': 'running',
@@ -1213,7 +1722,7 @@ def get_system_monitoring():
     # 获取PACS连接状态
     pacs_status = {}
     try:
-        if dicom_client_checker.check_status():
+        if _check_pacs_status_cached()[0]:
             pacs_status = {
                 'connected': True,
                 'config': {
@@ -1317,6 +1826,9 @@ def set_pacs_config():
 
         # Refresh global checker client
         dicom_client_checker = DICOMDownloadClient()
+        _invalidate_pacs_status()
+        # 池中客户端仍使用旧配置，丢弃后按新配置创建
+        client_pool.invalidate()
 
         return jsonify({'message': 'Configuration saved'}), 200
     except Exception as e:
@@ -1363,12 +1875,12 @@ def process_single_task(task):
         task.check_cancellation("initial_connect")
         
         # 添加调试日志
-        logger.debug(f"开始处理任务: {task.task_id}")
-        logger.debug(f"AccessionNumber: {task.parameters['accession_number']}")
+        logger.debug("开始处理任务: %s", task.task_id)
+        logger.debug("AccessionNumber: %s", task.parameters['accession_number'])
         
-        # 创建新的DICOM客户端实例
+        # 从客户端池借出DICOM客户端实例（任务结束后归还）
         try:
-            task_client = DICOMDownloadClient()
+            task_client = client_pool.acquire()
             task.add_log("DICOM client created successfully")
         except Exception as e:
             task.add_log(f"Failed to create DICOM client: {str(e)}", 'error')
@@ -1413,19 +1925,28 @@ def process_single_task(task):
                 task.add_log(msg)
             except Exception:
                 pass
-            logger.debug(f"MR_PROGRESS[{stage}]: {msg}")
+            logger.debug("MR_PROGRESS[%s]: %s", stage, msg)
 
         task_client.progress_callback = _mr_progress
         
         # Attach download progress callback to update task status during C-MOVE
+        # 仅在整数百分比变化、距上次更新超过0.5秒或最后一个series时更新状态
+        last_progress = {'pct': -1, 't': 0.0}
+
         def _download_progress(current_series, total_series, series_name, progress_pct):
             try:
                 # 检查取消标志
                 if task.is_cancelled():
                     raise InterruptedError("Task cancelled during download")
                 
-                step_name = f"Downloading series {current_series}/{total_series}: {series_name}"
-                task.update_status('running', progress_pct, step_name)
+                now = time.monotonic()
+                pct = int(progress_pct)
+                if (pct != last_progress['pct'] or now - last_progress['t'] > 0.5
+                        or current_series == total_series):
+                    last_progress['pct'] = pct
+                    last_progress['t'] = now
+                    step_name = f"Downloading series {current_series}/{total_series}: {series_name}"
+                    task.update_status('running', progress_pct, step_name)
                 if current_series % 3 == 0 or current_series == total_series:  # 每3个series记录一次日志，避免日志过多
                     task.add_log(f"Downloaded {current_series}/{total_series} series: {series_name}")
             except InterruptedError:
@@ -1520,18 +2041,30 @@ def process_single_task(task):
                 # 创建结果ZIP文件
                 if results.get('organized_dir'):
                     task.add_log('Creating result ZIP...')
-                    logger.info(f"Creating ZIP: source={results['organized_dir']}, task_id={task.task_id}, result_dir={app.config['RESULT_FOLDER']}")
+                    logger.info("Creating ZIP: source=%s, task_id=%s, result_dir=%s",
+                                results['organized_dir'], task.task_id, app.config['RESULT_FOLDER'])
                     try:
-                        zip_path = create_result_zip(
-                            results['organized_dir'],
-                            task.task_id,
-                            app.config['RESULT_FOLDER'],
-                            extra_files=[results.get('excel_file')],
-                            include_subdirs=set(results.get('series_info', {}).keys())
-                        )
-                        results['result_zip'] = zip_path
-                        task.add_log(f'Result ZIP created: {zip_path}')
-                        logger.info(f"ZIP created successfully: {zip_path}, exists={os.path.exists(zip_path)}")
+                        task._zip_source = {
+                            'source_dir': results['organized_dir'],
+                            'extra_files': [results.get('excel_file')],
+                            'include_subdirs': set(results.get('series_info', {}).keys())
+                        }
+                        if STREAM_RESULT_ZIP:
+                            # 不生成磁盘 ZIP，下载时从 _zip_source 流式打包
+                            results['zip_streamed'] = True
+                            task.add_log('Result ZIP will be streamed on download')
+                        else:
+                            zip_path = create_result_zip(
+                                task._zip_source['source_dir'],
+                                task.task_id,
+                                app.config['RESULT_FOLDER'],
+                                extra_files=task._zip_source['extra_files'],
+                                include_subdirs=task._zip_source['include_subdirs']
+                            )
+                            results['result_zip'] = zip_path
+                            task.add_log(f'Result ZIP created: {zip_path}')
+                            if logger.isEnabledFor(logging.INFO):
+                                logger.info("ZIP created successfully: %s, exists=%s", zip_path, os.path.exists(zip_path))
                     except Exception as zip_e:
                         logger.error(f"Failed to create ZIP: {zip_e}", exc_info=True)
                         task.add_log(f'Failed to create ZIP: {str(zip_e)}', 'error')
@@ -1544,7 +2077,7 @@ def process_single_task(task):
                 _record_task_completion(task)
                 
                 # 输出成功日志
-                logger.debug(f"任务完成: {task.task_id}")
+                logger.debug("任务完成: %s", task.task_id)
                 
                 # 任务完成后检查并清理结果目录
                 check_and_cleanup_results()
@@ -1563,7 +2096,7 @@ def process_single_task(task):
         # 任务被取消，不要标记为失败
         task.add_log('Process cancelled by user', 'warning')
         # 状态已在cancel()方法中设置
-        logger.info(f"任务被取消: {task.task_id}")
+        logger.info("任务被取消: %s", task.task_id)
     except Exception as e:
         error_msg = str(e)
         logger.error(f"任务处理失败: {task.task_id}, 错误: {error_msg}")
@@ -1578,10 +2111,20 @@ def process_single_task(task):
             try:
                 task_client.logout()
                 task.add_log("Logged out from DICOM service")
-                logger.debug(f"已登出DICOM服务")
+                logger.debug("已登出DICOM服务")
             except Exception as e:
                 task.add_log(f"Error during logout: {str(e)}", 'warning')
                 logger.warning(f"登出失败: {str(e)}")
+        client_pool.release(task_client)
+
+def _batch_worker_count(options, total):
+    """批量任务并发处理的检查数：任务选项 batch_workers 优先，其次环境变量 BATCH_WORKERS"""
+    try:
+        workers = int(options.get('batch_workers') or os.getenv('BATCH_WORKERS', '4'))
+    except (TypeError, ValueError):
+        workers = 4
+    return max(1, min(workers, total))
+
 
 def process_batch_task(task):
     """处理批量AccessionNumber任务 - 修复版，支持去重和取消检查"""
@@ -1626,8 +2169,8 @@ def process_batch_task(task):
         # 检查取消标志
         task.check_cancellation("before_connect")
         
-        # 创建新的DICOM客户端实例并登录
-        task_client = DICOMDownloadClient()
+        # 从客户端池借出DICOM客户端实例并登录（任务结束后归还）
+        task_client = client_pool.acquire()
         
         # 自动登录（兼容性接口：当前DICOM客户端不做真实认证）
         task.add_log("Logging in to DICOM service...")
@@ -1645,31 +2188,57 @@ def process_batch_task(task):
                 task.add_log(msg)
             except Exception:
                 pass
-            logger.debug(f"MR_PROGRESS[{stage}]: {msg}")
+            logger.debug("MR_PROGRESS[%s]: %s", stage, msg)
 
         task_client.progress_callback = _mr_progress
         
         task.update_status('running', 10, 'Initializing batch process')
         task.add_log(f"Start batch processing {len(accession_numbers)} studies")
         
-        results = []
         total = len(accession_numbers)
-        
-        for i, accno in enumerate(accession_numbers):
+        results = [None] * total
+        total_processed = total_failed = 0
+        batch_workers = _batch_worker_count(options, total)
+        if batch_workers > 1:
+            task.add_log(f"Processing up to {batch_workers} studies concurrently")
+
+        # 每个工作线程使用独立的客户端（下载统计、失败追踪等实例状态不能共享），
+        # C-MOVE 仍由客户端的类级锁串行，解压/整理/转换阶段在检查之间重叠；
+        # 任务开始时已登录的客户端交给第一个工作线程使用
+        worker_local = threading.local()
+        worker_clients = []
+        handoff_clients = [task_client]
+        progress_lock = threading.Lock()
+        done_count = [0]
+
+        def _worker_client():
+            client = getattr(worker_local, 'client', None)
+            if client is None:
+                with progress_lock:
+                    client = handoff_clients.pop() if handoff_clients else None
+                if client is None:
+                    client = client_pool.acquire()
+                    client.login(username, password)
+                    client.progress_callback = _mr_progress
+                worker_local.client = client
+                with progress_lock:
+                    worker_clients.append(client)
+            return client
+
+        def _run_one(i, accno):
             # 检查取消标志
             task.check_cancellation(f"before_processing_{accno}")
-            
-            # 计算进度 (10-90%用于处理，剩余用于整理)
-            progress = 10 + int((i / total) * 80)
-            task.update_status('running', progress, f'Processing {accno} ({i+1}/{total})')
             task.add_log(f'Processing study {i+1}/{total}: {accno}')
             
-            # 创建单独的结果目录
-            result_dir = os.path.join(app.config['RESULT_FOLDER'], task.task_id, accno)
-            os.makedirs(result_dir, exist_ok=True)
+            # 创建单独的结果目录（父目录已在循环外创建，这里只需一次 mkdir）
+            result_dir = os.path.join(batch_result_dir, accno)
+            try:
+                os.mkdir(result_dir)
+            except FileExistsError:
+                pass
             
             try:
-                result = task_client.process_complete_workflow(
+                result = _worker_client().process_complete_workflow(
                     accession_number=accno,
                     base_output_dir=result_dir,
                     auto_extract=options.get('auto_extract', True),
@@ -1681,18 +2250,57 @@ def process_batch_task(task):
                     min_series_files=min_series_files,
                     exclude_derived=exclude_derived
                 )
-                results.append(result)
                 task.add_log(f'{accno} Process completed')
-                
+            except InterruptedError:
+                raise
             except Exception as e:
                 task.add_log(f'{accno} Process failed: {str(e)}', 'error')
-                results.append({'accession_number': accno, 'error': str(e)})
+                result = {'accession_number': accno, 'error': str(e)}
+
+            # 计算进度 (10-90%用于处理，剩余用于整理)
+            with progress_lock:
+                done_count[0] += 1
+                done = done_count[0]
+            task.update_status('running', 10 + int((done / total) * 80), f'Processed {accno} ({done}/{total})')
+            return result
+
+        batch_result_dir = os.path.join(app.config['RESULT_FOLDER'], task.task_id)
+        os.makedirs(batch_result_dir, exist_ok=True)
+
+        try:
+            with ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='BatchWorker') as batch_executor:
+                futures = {batch_executor.submit(_run_one, i, accno): i
+                           for i, accno in enumerate(accession_numbers)}
+                try:
+                    for future in as_completed(futures):
+                        result = results[futures[future]] = future.result()
+                        # 成功/失败数在收集结果时累计，无需事后再遍历
+                        if result.get('success'):
+                            total_processed += 1
+                        if result.get('error'):
+                            total_failed += 1
+                except InterruptedError:
+                    # 取消尚未开始的检查，已在处理中的检查完成后退出
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            for client in worker_clients:
+                try:
+                    client.logout()
+                except Exception:
+                    pass
+                client_pool.release(client)
+            if not handoff_clients:
+                # 已由工作线程登出并归还
+                task_client = None
+                client_logged_in = False
         
         task.update_status('running', 95, 'Creating batch results')
         task.add_log("Creating batch result files...")
         
         # 合并结果
-        batch_result_dir = os.path.join(app.config['RESULT_FOLDER'], task.task_id)
+        task._zip_source = {'source_dir': batch_result_dir}
         zip_path = create_result_zip(
             batch_result_dir,
             f"batch_{task.task_id}",
@@ -1700,9 +2308,6 @@ def process_batch_task(task):
         )
         
         # 计算详细的批处理统计信息
-        total_processed = len([r for r in results if r.get('success')])
-        total_failed = len([r for r in results if r.get('error')])
-        
         # 收集质量统计数据
         quality_stats = {
             'normal': 0,
@@ -1798,9 +2403,11 @@ def process_batch_task(task):
                 task.add_log("Logged out from DICOM service")
             except Exception as e:
                 task.add_log(f"Error during logout: {str(e)}", 'warning')
+        client_pool.release(task_client)
 
 def process_upload_task(task):
     """处理上传文件任务 - 修复版，支持取消检查"""
+    local_client = None
     try:
         filepath = task.parameters['filepath']
         options = task.parameters['options']
@@ -1811,8 +2418,8 @@ def process_upload_task(task):
         # 检查取消标志
         task.check_cancellation("initial")
         
-        # 创建本地DICOM客户端实例（无需登录，仅用于本地文件处理）
-        local_client = DICOMDownloadClient()
+        # 借出本地DICOM客户端实例（仅用于本地文件处理，任务结束后归还）
+        local_client = client_pool.acquire()
         
         # 检查取消标志
         task.check_cancellation("after_client_create")
@@ -1830,12 +2437,15 @@ def process_upload_task(task):
         # 检查取消标志
         task.check_cancellation("before_processing")
         
-        result = local_client.process_upload_workflow(filepath, result_dir, options)
+        # 元数据提取放到下面与打包并行执行，这里只做解压与整理转换
+        workflow_options = dict(options or {})
+        auto_metadata = workflow_options.get('auto_metadata', True)
+        workflow_options['auto_metadata'] = False
+        result = local_client.process_upload_workflow(filepath, result_dir, workflow_options)
 
         if result.get('success'):
             organized_dir = result.get('organized_dir')
             series_info = result.get('series_info', {})
-            excel_file = result.get('excel_file')
 
             # 检查取消标志
             task.check_cancellation("before_create_zip")
@@ -1843,19 +2453,40 @@ def process_upload_task(task):
             task.update_status('running', 95, 'Creating result files')
             task.add_log("Creating result files...")
             zip_source = organized_dir or result_dir
-            zip_path = create_result_zip(
-                zip_source,
-                task.task_id,
-                app.config['RESULT_FOLDER'],
-                extra_files=[excel_file],
-                include_subdirs=set(series_info.keys())
-            )
+            # 质量评估会自动修复 NIfTI（临时文件写入序列目录后替换原文件），须在打包前完成；
+            # 之后的 DataFrame 构建、MR 清洗与 Excel/Parquet 写出（位于 organized_dir 的上级目录）
+            # 不再触碰序列文件，与 ZIP 打包并行进行，Excel 就绪后再追加进压缩包
+            with ThreadPoolExecutor(max_workers=1) as metadata_executor:
+                metadata_future = None
+                if auto_metadata:
+                    records_ready = threading.Event()
+                    metadata_future = metadata_executor.submit(
+                        local_client.extract_dicom_metadata, organized_dir, None, records_ready.set
+                    )
+                    # 提取过程中出错提前结束时 records_ready 不会被设置，以 Future 完成为准
+                    while not records_ready.wait(0.2) and not metadata_future.done():
+                        pass
+                zip_path = None if STREAM_RESULT_ZIP else create_result_zip(
+                    zip_source,
+                    task.task_id,
+                    app.config['RESULT_FOLDER'],
+                    include_subdirs=set(series_info.keys())
+                )
+                excel_file = metadata_future.result() if metadata_future else None
+            if zip_path:
+                append_files_to_zip(zip_path, [excel_file])
+            task._zip_source = {
+                'source_dir': zip_source,
+                'extra_files': [excel_file],
+                'include_subdirs': set(series_info.keys())
+            }
 
             task.result = {
                 'extract_dir': result.get('extract_dir'),
                 'organized_dir': organized_dir,
                 'excel_file': excel_file,
                 'result_zip': zip_path,
+                'zip_streamed': zip_path is None,
                 'series_count': len(series_info)
             }
 
@@ -1881,6 +2512,8 @@ def process_upload_task(task):
         task.update_status('failed')
         task.error = str(e)
         task.end_time = time.time()
+    finally:
+        client_pool.release(local_client)
 
 
 # WebSocket事件处理
@@ -1894,10 +2527,21 @@ def handle_disconnect():
 
 @socketio.on('subscribe_task')
 def handle_subscribe_task(data):
-    """订阅任务更新"""
+    """订阅任务更新：加入以任务ID命名的房间，task_update 只推送给订阅者"""
     task_id = data.get('task_id')
-    if task_id in processing_tasks:
+    task = processing_tasks.get(task_id)
+    if task:
+        join_room(task_id)
         emit('task_subscribed', {'task_id': task_id})
+        # 订阅前可能已有状态变化，立即补发一次当前状态
+        emit('task_update', task._update_payload(full_logs=True))
+
+@socketio.on('unsubscribe_task')
+def handle_unsubscribe_task(data):
+    """取消订阅任务更新"""
+    task_id = data.get('task_id')
+    if task_id:
+        leave_room(task_id)
 
 def _ensure_ssl_cert(ssl_dir):
     """生成或复用自签名 SSL 证书，返回 (cert_path, key_path)。"""
@@ -2002,10 +2646,13 @@ if __name__ == '__main__':
 
     logger.info(f"📡 访问地址: {protocol}://172.17.250.136:5005")
     
-    # 检查DICOM服务连接状态
+    # 检查DICOM服务连接状态：复用全局检查客户端，结果写入状态缓存供首次前端轮询直接使用
     try:
-        checker = DICOMDownloadClient()
-        if checker.check_status():
+        checker = dicom_client_checker
+        connected, error_msg = _check_pacs_status_cached()
+        if error_msg:
+            raise Exception(error_msg)
+        if connected:
             logger.info("✅ PACS服务连接正常")
             logger.info(f"   - PACS IP: {checker.pacs_config['PACS_IP']}")
             logger.info(f"   - PACS Port: {checker.pacs_config['PACS_PORT']}")
@@ -4,6 +4,8 @@ class DICOMProcessor {
     constructor() {
         this.socket = null;
         this.currentTask = null;
+        this.subscribedTaskId = null;
+        this.lastLogSeq = 0;
         this.selectedFile = null;
         this.pacsConfigLoaded = false;
         this.successModal = null;
@@ -1337,18 +1339,21 @@ class DICOMProcessor {
         }
 
         this.isProcessing = true;
-        const formData = new FormData();
-        formData.append('file', this.selectedFile);
-        
+        // 文件以原始请求体流式上传（服务端按块直接写盘），处理选项放在查询参数中
+        const params = new URLSearchParams();
         const options = this.getProcessingOptions();
         for (const [key, value] of Object.entries(options)) {
-            formData.append(key, value);
+            params.append(key, value);
         }
 
         try {
-            const response = await fetch('/api/process/upload', {
+            const response = await fetch(`/api/process/upload_stream?${params.toString()}`, {
                 method: 'POST',
-                body: formData
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'X-Content-Name': encodeURIComponent(this.selectedFile.name)
+                },
+                body: this.selectedFile
             });
 
             const data = await response.json();
@@ -1408,6 +1413,11 @@ class DICOMProcessor {
 
     // 订阅任务更新
     subscribeToTask(taskId) {
+        // 服务端按任务分房间推送，切换任务时离开上一个任务的房间
+        if (this.subscribedTaskId && this.subscribedTaskId !== taskId) {
+            this.socket.emit('unsubscribe_task', { task_id: this.subscribedTaskId });
+        }
+        this.subscribedTaskId = taskId;
         this.socket.emit('subscribe_task', { task_id: taskId });
     }
 
@@ -1424,8 +1434,10 @@ class DICOMProcessor {
         this.updateStatus(data.status);
         
         // 更新日志
-        if (data.logs && data.logs.length > 0) {
-            this.updateLogs(data.logs);
+        // logs_delta 为上次推送以来的新增日志；logs 为订阅时补发的全部日志
+        const logEntries = data.logs_delta || data.logs;
+        if (logEntries && logEntries.length > 0) {
+            this.updateLogs(logEntries);
         }
 
         // 如果任务完成
@@ -1559,11 +1571,15 @@ class DICOMProcessor {
             logContainer.innerHTML = '';
         }
 
-        // 获取当前已显示的日志数量
-        const currentLogCount = logContainer.querySelectorAll('.log-entry').length;
-        
-        // 只添加新日志（增量更新）
-        const newLogs = logs.slice(currentLogCount);
+        // 只添加新日志（增量更新）：按日志序号去重，没有序号时按已显示数量截取
+        let newLogs;
+        if (logs[0].seq !== undefined) {
+            newLogs = logs.filter(log => log.seq > this.lastLogSeq);
+            this.lastLogSeq = Math.max(this.lastLogSeq, logs[logs.length - 1].seq);
+        } else {
+            const currentLogCount = logContainer.querySelectorAll('.log-entry').length;
+            newLogs = logs.slice(currentLogCount);
+        }
         
         newLogs.forEach(log => {
             const logEntry = document.createElement('div');
@@ -1591,6 +1607,7 @@ class DICOMProcessor {
 
     // 清空日志
     clearLogs() {
+        this.lastLogSeq = 0;
         const logContainer = document.getElementById('logContainer');
         if (logContainer) {
             logContainer.innerHTML = '<div class="text-muted text-center p-3">等待处理开始...</div>';
@@ -1611,7 +1628,8 @@ class DICOMProcessor {
         
         // 获取任务结果
         try {
-            const response = await fetch(`/api/task/${this.currentTask.id}/status`);
+            // 只需要结果，since 游标跳过已显示的日志
+            const response = await fetch(`/api/task/${this.currentTask.id}/status?since=${this.lastLogSeq}`);
             const data = await response.json();
             
             if (response.ok && data.result) {
@@ -1677,7 +1695,7 @@ class DICOMProcessor {
     normalizeResultForRender(result) {
         const safe = {
             excel_file: Boolean(result && result.excel_file),
-            result_zip: Boolean(result && result.result_zip),
+            result_zip: Boolean(result && (result.result_zip || result.zip_streamed)),
             total_processed: Number((result && result.total_processed) || 0),
             total_failed: Number((result && result.total_failed) || 0),
             series_count: Number((result && result.series_count) || 0),
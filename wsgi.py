@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gevent 部署入口
+
+在导入任何其他模块之前完成 gevent monkey patch，再加载 src.web.app，
+使大文件上传/下载与状态轮询以协程方式并发，不再排队等待工作线程。
+
+启动方式:
+    gunicorn -k gevent -w 1 wsgi:app
+    python wsgi.py
+
+注意: Flask-SocketIO 的任务状态保存在进程内，只能使用单个 worker（-w 1）。
+不对 threading 打补丁：下载/转换任务在 ThreadPoolExecutor 与 pynetdicom 的
+原生线程中运行，协程化后 CPU 密集的转换会阻塞整个事件循环。
+"""
+
+from gevent import monkey
+
+monkey.patch_all(thread=False)
+
+import os
+import sys
+
+os.environ.setdefault('ASYNC_MODE', 'gevent')
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.web.app import app, socketio  # noqa: E402
+
+if __name__ == '__main__':
+    socketio.run(app, host='0.0.0.0', port=5005, debug=False)